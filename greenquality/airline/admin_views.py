@@ -1,245 +1,119 @@
-"""Функции для панели администратора"""
-import re
+"""Функции для панели администратора и панели менеджера (таблицы — airline/panel_registry.py)"""
+import hashlib
+from urllib.parse import urlencode
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.contrib.messages import get_messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
-from django.utils.dateparse import parse_date, parse_datetime
+from django.core.cache import cache
 from django.urls import reverse
-from django.db import models as django_models
-from decimal import Decimal, InvalidOperation
-from .models import (
-    User, Account, Role, Payment, Ticket, Flight, Passenger,
-    Airport, Class, BaggageType, Baggage, Airplane, AuditLog
-)
+from django.utils import timezone
+from django.db import transaction
+from .models import Account, FlightSchedule
 from .exceptions_utils import get_user_friendly_message
-from .audit_utils import model_instance_to_audit_dict, get_record_id_for_audit, log_audit
+from .audit_utils import model_instance_to_audit_dict, get_record_id_for_audit, log_audit, log_audit_bulk
+from .pagination import EstimatedCountPaginator
+from .panel_export import EXPORT_FORMATS, export_lines
+from .panel_import import ImportFileError, import_csv
+from .panel_registry import PANELS, TABLES
+from .principal import clear_principal_cache_for, get_principal
+from .schedules import ScheduleError, generate_schedule_flights
+from .validation import validate_crud_data
 
 
-def _validate_crud_data(model, data, action, instance=None):
-    """
-    Валидация данных для CRUD. Возвращает список строк с ошибками (пустой — если всё ок).
-    """
-    errors = []
-    # Только конкретные поля модели (без обратных связей)
-    for field in model._meta.fields:
-        if getattr(field, 'primary_key', False) or isinstance(field, django_models.AutoField):
-            continue
-        if getattr(field, 'auto_now_add', False) or getattr(field, 'auto_now', False):
-            continue
+def _generate_schedule_flights(request, record_id, account_id):
+    """Создание рейсов по расписанию из панели администратора"""
+    redirect_url = '/admin-panel/?table=FlightSchedule'
+    try:
+        schedule = FlightSchedule.objects.get(pk=record_id)
+        report = generate_schedule_flights(
+            schedule,
+            skip_conflicts=request.POST.get('skip_conflicts') == '1',
+            changed_by_account_id=account_id,
+        )
+    except FlightSchedule.DoesNotExist:
+        messages.error(request, 'Расписание не найдено')
+        return redirect(redirect_url)
+    except ScheduleError as e:
+        messages.error(request, str(e))
+        return redirect(redirect_url)
 
-        value = data.get(field.name)
-        is_empty = value is None or value == '' or (isinstance(value, str) and not value.strip())
-
-        # Обязательность при создании
-        if action == 'create':
-            if not field.null and not getattr(field, 'blank', True):
-                if is_empty:
-                    label = getattr(field, 'verbose_name', field.name)
-                    errors.append(f'Поле «{label}» обязательно для заполнения.')
-                    continue
-        elif action == 'update':
-            if is_empty and not field.null and not getattr(field, 'blank', True):
-                continue
-
-        if is_empty:
-            continue
+    if report['conflicts'] and not report['created']:
+        first = report['conflicts'][0][0][:16].replace('T', ' ')
+        messages.error(
+            request,
+            f"Самолёт занят: пересечений с другими рейсами — {len(report['conflicts'])} "
+            f"(первое — {first}). Рейсы не созданы."
+        )
+    else:
+        skipped = f", пропущено пересечений: {len(report['conflicts'])}" if report['conflicts'] else ''
+        messages.success(request, f"Создано рейсов: {len(report['created'])}, мест: {report['seats']}{skipped}")
+    return redirect(redirect_url)
 
-        # Длина строки
-        if isinstance(field, django_models.CharField) and hasattr(field, 'max_length'):
-            if len(str(value)) > field.max_length:
-                label = getattr(field, 'verbose_name', field.name)
-                errors.append(f'Поле «{label}» не должно превышать {field.max_length} символов.')
-
-        # Телефон: только цифры (допускается + в начале)
-        if field.name == 'phone' and value:
-            if not re.match(r'^\+?\d+$', str(value)):
-                label = getattr(field, 'verbose_name', field.name)
-                errors.append(f'Поле «{label}» должно содержать только цифры (в начале допускается +).')
-        # Номер паспорта: только цифры и пробелы
-        if field.name == 'passport_number' and value:
-            if not re.match(r'^[\d\s]+$', str(value)):
-                label = getattr(field, 'verbose_name', field.name)
-                errors.append(f'Поле «{label}» должно содержать только цифры и пробелы.')
-
-        # Выбор из списка (choices)
-        if getattr(field, 'choices', None):
-            allowed = [str(c[0]) for c in field.choices]
-            if str(value) not in allowed:
-                label = getattr(field, 'verbose_name', field.name)
-                errors.append(f'Поле «{label}» должно быть одним из: {", ".join(allowed)}.')
-
-        # Decimal: корректное число и не отрицательное где нужно
-        if isinstance(field, django_models.DecimalField):
-            try:
-                d = Decimal(str(value))
-                non_negative = field.name in (
-                    'total_cost', 'price', 'max_weight_kg', 'base_price', 'weight_kg',
-                    'capacity', 'economy_capacity', 'business_capacity', 'first_capacity', 'rows', 'seats_row'
-                )
-                if non_negative and d < 0:
-                    label = getattr(field, 'verbose_name', field.name)
-                    errors.append(f'Поле «{label}» должно быть не меньше нуля.')
-            except (InvalidOperation, TypeError, ValueError):
-                label = getattr(field, 'verbose_name', field.name)
-                errors.append(f'Поле «{label}» должно быть числом.')
-
-        # Integer: не отрицательный где нужно
-        if isinstance(field, django_models.IntegerField) and not isinstance(field, django_models.AutoField):
-            try:
-                v = int(value)
-                if field.name in ('capacity', 'economy_capacity', 'business_capacity', 'first_capacity', 'rows', 'seats_row') and v < 0:
-                    label = getattr(field, 'verbose_name', field.name)
-                    errors.append(f'Поле «{label}» должно быть не меньше нуля.')
-            except (TypeError, ValueError):
-                label = getattr(field, 'verbose_name', field.name)
-                errors.append(f'Поле «{label}» должно быть целым числом.')
 
-    return errors
+def _panel_url(panel, table_name=None):
+    url = reverse(panel.url_name)
+    return f'{url}?table={table_name}' if table_name else url
 
 
-def admin_panel(request):
-    """Панель администратора с CRUD для всех таблиц"""
-    # Проверка авторизации
+def _page_range(page_obj):
+    """Диапазон номеров страниц для отображения (макс. 10)"""
+    num_pages = page_obj.paginator.num_pages
+    if num_pages <= 10:
+        return list(range(1, num_pages + 1))
+    start = max(1, min(page_obj.number - 4, num_pages - 9))
+    end = min(num_pages, start + 9)
+    return list(range(start, end + 1))
+
+
+def _panel_queryset(request, table):
+    """
+    Выборка таблицы панели по GET: фильтры столбцов и поиск (PanelTable.filter),
+    порядок (sort_by, order=asc/desc) — общая для страницы панели и выгрузки.
+    Возвращает (queryset, состояние: sort_by, sort_order, filters — применённые параметры).
+    """
+    objects, filters = table.filter(table.queryset(), request.GET)
+    sort_by = request.GET.get('sort_by', '').strip()
+    sort_order = request.GET.get('order', 'asc').lower()
+    if sort_order not in ('asc', 'desc'):
+        sort_order = 'asc'
+    if sort_by and sort_by in table.fields:
+        order_field = sort_by if sort_order == 'asc' else f'-{sort_by}'
+        # pk — второй ключ: порядок страниц при равных значениях не меняется
+        objects = objects.order_by(order_field, '-pk' if sort_order == 'desc' else 'pk')
+    else:
+        sort_by = ''
+        sort_order = 'asc'
+        objects = objects.order_by('-pk')
+    return objects, {'sort_by': sort_by, 'sort_order': sort_order, 'filters': filters}
+
+
+def _render_panel(request, panel):
+    """Страница панели: список записей выбранной таблицы с сортировкой и пагинацией"""
     if 'account_id' not in request.session:
-        messages.error(request, 'Для доступа к панели администратора необходимо войти в систему')
+        messages.error(request, f'Для доступа к {panel.title} необходимо войти в систему')
         return redirect('login')
-    
-    account_id = request.session['account_id']
-    
+
     try:
-        account = Account.objects.get(id_account=account_id)
-        # Проверка роли администратора
-        if not account.role_id or account.role_id.role_name != 'ADMIN':
-            messages.error(request, 'У вас нет доступа к панели администратора')
+        principal = get_principal(request)
+        if principal.role_name != panel.role:
+            messages.error(request, f'У вас нет доступа к {panel.title}')
             return redirect('index')
-        
-        # Определяем все модели для отображения
-        models_info = {
-            'Role': {
-                'model': Role,
-                'name': 'Роли',
-                'fields': ['id_role', 'role_name'],
-                'readonly': False,
-            },
-            'Account': {
-                'model': Account,
-                'name': 'Аккаунты',
-                'fields': ['id_account', 'email', 'role_id', 'created_at'],
-                'readonly': False,
-            },
-            'User': {
-                'model': User,
-                'name': 'Пользователи',
-                'fields': ['id_user', 'account_id', 'first_name', 'last_name', 'patronymic', 'phone', 'passport_number', 'birthday'],
-                'readonly': False,
-            },
-            'Airport': {
-                'model': Airport,
-                'name': 'Аэропорты',
-                'fields': ['id_airport', 'name', 'city', 'country'],
-                'readonly': False,
-            },
-            'Airplane': {
-                'model': Airplane,
-                'name': 'Самолеты',
-                'fields': ['id_airplane', 'model', 'registration_number', 'capacity', 'economy_capacity', 'business_capacity', 'first_capacity', 'rows', 'seats_row'],
-                'readonly': False,
-            },
-            'Flight': {
-                'model': Flight,
-                'name': 'Рейсы',
-                'fields': ['id_flight', 'airplane_id', 'departure_airport_id', 'arrival_airport_id', 'departure_time', 'arrival_time', 'status'],
-                'readonly': False,
-            },
-            'Passenger': {
-                'model': Passenger,
-                'name': 'Пассажиры',
-                'fields': ['id_passenger', 'first_name', 'last_name', 'patronymic', 'passport_number', 'birthday'],
-                'readonly': False,
-            },
-            'Class': {
-                'model': Class,
-                'name': 'Классы обслуживания',
-                'fields': ['id_class', 'class_name'],
-                'readonly': False,
-            },
-            'Payment': {
-                'model': Payment,
-                'name': 'Платежи',
-                'fields': ['id_payment', 'user_id', 'payment_date', 'total_cost', 'payment_method', 'status'],
-                'readonly': False,
-            },
-            'Ticket': {
-                'model': Ticket,
-                'name': 'Билеты',
-                'fields': ['id_ticket', 'flight_id', 'class_id', 'seat_number', 'price', 'status', 'passenger_id', 'payment_id'],
-                'readonly': False,
-            },
-            'BaggageType': {
-                'model': BaggageType,
-                'name': 'Типы багажа',
-                'fields': ['id_baggage_type', 'type_name', 'max_weight_kg', 'description', 'base_price'],
-                'readonly': False,
-            },
-            'Baggage': {
-                'model': Baggage,
-                'name': 'Багаж',
-                'fields': ['id_baggage', 'ticket_id', 'baggage_type_id', 'weight_kg', 'baggage_tag', 'status', 'registered_at'],
-                'readonly': False,
-            },
-            'AuditLog': {
-                'model': AuditLog,
-                'name': 'Журнал аудита',
-                'fields': ['id_audit', 'table_name', 'record_id', 'operation', 'changed_by', 'changed_at', 'old_data', 'new_data'],
-                'readonly': True,  # Только просмотр
-            },
-        }
-        
+
         # Получаем выбранную таблицу из GET параметра
-        selected_table = request.GET.get('table', 'Role')
-        if selected_table not in models_info:
-            selected_table = 'Role'
-        
-        model_info = models_info[selected_table]
-        model = model_info['model']
-        
-        # Получаем все записи выбранной таблицы
-        objects = model.objects.all()
-        
-        # Применяем select_related для ForeignKey полей
-        if selected_table == 'Account':
-            objects = objects.select_related('role_id')
-        elif selected_table == 'User':
-            objects = objects.select_related('account_id')
-        elif selected_table == 'Flight':
-            objects = objects.select_related('airplane_id', 'departure_airport_id', 'arrival_airport_id')
-        elif selected_table == 'Ticket':
-            objects = objects.select_related('flight_id', 'class_id', 'passenger_id', 'payment_id')
-        elif selected_table == 'Payment':
-            objects = objects.select_related('user_id')
-        elif selected_table == 'Baggage':
-            objects = objects.select_related('ticket_id', 'baggage_type_id')
-        elif selected_table == 'AuditLog':
-            objects = objects.select_related('changed_by')
-        
-        # Сортировка по столбцу (из GET: sort_by, order=asc/desc)
-        sort_by = request.GET.get('sort_by', '').strip()
-        sort_order = request.GET.get('order', 'asc').lower()
-        if sort_order not in ('asc', 'desc'):
-            sort_order = 'asc'
-        if sort_by and sort_by in model_info['fields']:
-            order_field = sort_by if sort_order == 'asc' else f'-{sort_by}'
-            objects = objects.order_by(order_field)
-        else:
-            sort_by = ''
-            sort_order = 'asc'
-            objects = objects.order_by('-pk')
-        
-        # Пагинация: 10 записей на странице
-        paginator = Paginator(objects, 10)
+        selected_table = request.GET.get('table', panel.default_table)
+        if selected_table not in panel.tables:
+            selected_table = panel.default_table
+        model_info = panel.tables[selected_table]
+        objects, state = _panel_queryset(request, model_info)
+
+        # Пагинация: 10 записей на странице; число записей большой таблицы — по оценке,
+        # точное — по запросу (?exact=1)
+        exact_count = request.GET.get('exact') == '1'
+        paginator = EstimatedCountPaginator(objects, 10, exact=exact_count)
         page_num = request.GET.get('page', 1)
         try:
             page_obj = paginator.page(page_num)
@@ -247,39 +121,36 @@ def admin_panel(request):
             page_obj = paginator.page(1)
         except EmptyPage:
             page_obj = paginator.page(paginator.num_pages)
-        
-        # Диапазон страниц для отображения (макс. 10)
-        num_pages = paginator.num_pages
-        current = page_obj.number
-        if num_pages <= 10:
-            page_range_display = list(range(1, num_pages + 1))
-        else:
-            start = max(1, min(current - 4, num_pages - 9))
-            end = min(num_pages, start + 9)
-            page_range_display = list(range(start, end + 1))
-        
+
         # Удаляем сообщения об успешном входе из панели
         storage = get_messages(request)
         for message in storage:
             if message.message == 'Вы успешно вошли в систему!':
                 storage.used = False
                 break
-        
+
         context = {
-            'models_info': models_info,
+            'models_info': panel.tables,
             'selected_table': selected_table,
             'model_info': model_info,
             'objects': page_obj.object_list,
             'page_obj': page_obj,
-            'page_range_display': page_range_display,
-            'fields': model_info['fields'],
-            'panel_type': 'admin',
-            'sort_by': sort_by,
-            'sort_order': sort_order,
+            'page_range_display': _page_range(page_obj),
+            'fields': model_info.fields,
+            'panel_type': panel.key,
+            'sort_by': state['sort_by'],
+            'sort_order': state['sort_order'],
+            'filter_values': state['filters'],
+            'filter_fields': [
+                {**spec, 'values': [state['filters'].get(param, '') for param in spec['params']]}
+                for spec in model_info.filters
+            ],
+            # Фильтры и поиск — в ссылках сортировки, страниц и выгрузки
+            'filter_query': '&' + urlencode(state['filters']) if state['filters'] else '',
+            'exact_count': exact_count,
         }
-        
         return render(request, 'admin_panel.html', context)
-        
+
     except Account.DoesNotExist:
         messages.error(request, 'Аккаунт не найден')
         return redirect('login')
@@ -288,52 +159,216 @@ def admin_panel(request):
         return redirect('index')
 
 
-def admin_crud(request):
-    """Обработка CRUD операций для панели администратора"""
-    # Проверка авторизации
+# Не больше стольких записей за одну массовую операцию
+BULK_MAX_RECORDS = 1000
+
+
+class BulkEditError(Exception):
+    """Ошибка массовой операции; текст показывается пользователю"""
+
+
+def _audit_value(value):
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _audit_record_id(pk):
+    # Как get_record_id_for_audit: для строковых ключей — 0, ключ есть в данных
+    return pk if isinstance(pk, int) else 0
+
+
+def _bulk_delete(table, record_ids, account_id):
+    """
+    Удаляет выбранные записи одной транзакцией. Данные для аудита — одним
+    запросом до удаления, записи аудита — одним bulk_create.
+    """
+    model = table.model
+    concrete = [f for f in model._meta.concrete_fields if f.name != 'password']
+    with transaction.atomic():
+        rows = list(model.objects.select_for_update().filter(pk__in=record_ids)
+                    .values_list('pk', *(f.attname for f in concrete)))
+        if not rows:
+            raise BulkEditError('Выбранные записи не найдены')
+        _total, deleted = model.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        log_audit_bulk((
+            (table.key, _audit_record_id(row[0]), 'DELETE',
+             {f.name: _audit_value(value) for f, value in zip(concrete, row[1:])}, None)
+            for row in rows
+        ), account_id)
+    # Не полагаясь на сигналы удаления: кеш ролей сбрасывается явно, как после массового изменения
+    clear_principal_cache_for(model)
+    return deleted.get(model._meta.label, len(rows))
+
+
+def _bulk_update(table, record_ids, field_name, raw_value, account_id):
+    """
+    Записывает одно значение поля во все выбранные записи (QuerySet.update)
+    одной транзакцией. Прежние значения — одним запросом, аудит — одним bulk_create.
+    """
+    if field_name not in table.bulk_fields:
+        raise BulkEditError('Это поле нельзя изменить для нескольких записей')
+    model = table.model
+    field = model._meta.get_field(field_name)
+
+    if raw_value in (None, ''):
+        if not field.null:
+            raise BulkEditError(f'Поле «{field.verbose_name}» обязательно для заполнения.')
+        value = None
+    elif field_name in table.fk_fields:
+        related_model = table.fk_fields[field_name]
+        if not related_model.objects.filter(pk=raw_value).exists():
+            raise BulkEditError('Связанная запись не найдена. Выберите существующее значение.')
+        value = raw_value
+    else:
+        data = table.convert({field_name: raw_value})
+        errors = validate_crud_data(model, data, 'update')
+        if errors:
+            raise BulkEditError(' '.join(errors))
+        value = data[field_name]
+
+    with transaction.atomic():
+        rows = list(model.objects.select_for_update().filter(pk__in=record_ids)
+                    .values_list('pk', field.attname))
+        if not rows:
+            raise BulkEditError('Выбранные записи не найдены')
+        updated = model.objects.filter(pk__in=[row[0] for row in rows]).update(**{field.attname: value})
+        pk_name = model._meta.pk.name
+        new_value = _audit_value(value)
+        log_audit_bulk((
+            (table.key, _audit_record_id(pk), 'UPDATE',
+             {pk_name: _audit_value(pk), field_name: _audit_value(old)},
+             {pk_name: _audit_value(pk), field_name: new_value})
+            for pk, old in rows
+        ), account_id)
+    # QuerySet.update не шлёт post_save: смена роли аккаунтов должна действовать сразу
+    clear_principal_cache_for(model)
+    return updated
+
+
+# Сколько ошибок строк загружаемого файла показывать в сообщениях
+IMPORT_ERRORS_SHOWN = 20
+
+
+def _import_file(request, table, account_id):
+    """Загрузка CSV из формы панели (panel_import.py); итог и ошибки строк — в сообщениях"""
+    upload = request.FILES.get('import_file')
+    if upload is None:
+        messages.error(request, 'Файл не выбран')
+        return
+    try:
+        summary = import_csv(table, upload.file, account_id, filename=upload.name)
+    except ImportFileError as e:
+        messages.error(request, str(e))
+        return
+    except Exception as e:
+        messages.error(request, get_user_friendly_message(e, 'create'))
+        return
+
+    errors = summary['errors']
+    text = f"Загружено строк: {summary['inserted'] + summary['updated']} из {summary['rows']} " \
+           f"(добавлено {summary['inserted']}, обновлено {summary['updated']})"
+    if errors:
+        messages.warning(request, f'{text}; строк с ошибками: {len(errors)}')
+        for line, error in errors[:IMPORT_ERRORS_SHOWN]:
+            messages.error(request, f'Строка {line}: {error}')
+        if len(errors) > IMPORT_ERRORS_SHOWN:
+            messages.error(request, f'…и ещё строк с ошибками: {len(errors) - IMPORT_ERRORS_SHOWN}')
+    else:
+        messages.success(request, text)
+
+
+def _collect_form_data(request, table, action):
+    """
+    Значения формы CRUD, приведённые к типам полей таблицы.
+    Возвращает (data, ошибка); ошибка — текст сообщения или None.
+    """
+    data = {}
+    password_value = None
+    for key, value in request.POST.items():
+        if key in ('csrfmiddlewaretoken', 'table_name', 'action', 'record_id'):
+            continue
+        if key == 'password':
+            # Отдельно обрабатываем пароль
+            password_value = value
+        elif value:  # Только непустые значения для остальных полей
+            data[key] = value
+
+    # Внешние ключи: id из формы -> связанная запись (один запрос на модель)
+    if not table.resolve_related(data):
+        return None, 'Связанная запись не найдена. Выберите существующее значение.'
+
+    # Пароль хешируется; при изменении аккаунта пустой пароль оставляет прежний
+    if table.model is Account:
+        if password_value:
+            data['password'] = make_password(password_value)
+        elif action == 'create':
+            return None, 'Пароль обязателен при создании аккаунта'
+
+    return table.convert(data), None
+
+
+def _crud(request, panel):
+    """Обработка CRUD операций (create, update, delete) для таблиц панели"""
     if 'account_id' not in request.session:
-        messages.error(request, 'Для доступа к панели администратора необходимо войти в систему')
+        messages.error(request, f'Для доступа к {panel.title} необходимо войти в систему')
         return redirect('login')
-    
+
     account_id = request.session['account_id']
-    
+
     try:
-        account = Account.objects.get(id_account=account_id)
-        # Проверка роли администратора
-        if not account.role_id or account.role_id.role_name != 'ADMIN':
-            messages.error(request, 'У вас нет доступа к панели администратора')
+        principal = get_principal(request)
+        if principal.role_name != panel.role:
+            messages.error(request, f'У вас нет доступа к {panel.title}')
             return redirect('index')
-        
+
         table_name = request.POST.get('table_name')
-        action = request.POST.get('action')  # create, update, delete
+        action = request.POST.get('action')  # create, update, delete, bulk_*, import
         record_id = request.POST.get('record_id')
-        
-        # Маппинг имен таблиц на модели
-        model_map = {
-            'Role': Role,
-            'Account': Account,
-            'User': User,
-            'Airport': Airport,
-            'Airplane': Airplane,
-            'Flight': Flight,
-            'Passenger': Passenger,
-            'Class': Class,
-            'Payment': Payment,
-            'Ticket': Ticket,
-            'BaggageType': BaggageType,
-            'Baggage': Baggage,
-        }
-        
-        if table_name not in model_map:
-            messages.error(request, 'Неизвестная таблица')
-            return redirect('/admin-panel/')
-        
-        model = model_map[table_name]
-        
+
+        table = panel.writable_table(table_name)
+        if table is None:
+            messages.error(request, 'У вас нет доступа к этой таблице' if table_name in TABLES else 'Неизвестная таблица')
+            return redirect(_panel_url(panel))
+        model = table.model
+        redirect_url = _panel_url(panel, table_name)
+
+        if action == 'generate_flights' and model is FlightSchedule:
+            return _generate_schedule_flights(request, record_id, account_id)
+
+        if action == 'import':
+            _import_file(request, table, account_id)
+            return redirect(redirect_url)
+
+        if action in ('bulk_delete', 'bulk_update'):
+            record_ids = request.POST.getlist('record_ids')
+            if not record_ids:
+                messages.error(request, 'Не выбрано ни одной записи')
+                return redirect(redirect_url)
+            if len(record_ids) > BULK_MAX_RECORDS:
+                messages.error(request, f'Выбрано слишком много записей ({len(record_ids)}): '
+                                        f'за один раз можно изменить или удалить не больше {BULK_MAX_RECORDS}')
+                return redirect(redirect_url)
+            try:
+                if action == 'bulk_delete':
+                    count = _bulk_delete(table, record_ids, account_id)
+                    messages.success(request, f'Удалено записей: {count}')
+                else:
+                    count = _bulk_update(table, record_ids, request.POST.get('field'),
+                                         request.POST.get('value', ''), account_id)
+                    messages.success(request, f'Изменено записей: {count}')
+            except BulkEditError as e:
+                messages.error(request, str(e))
+            except Exception as e:
+                messages.error(request, get_user_friendly_message(e, 'delete' if action == 'bulk_delete' else 'update'))
+            return redirect(redirect_url)
+
         if action == 'delete':
             if not record_id:
                 messages.error(request, 'ID записи не указан')
-                return redirect(f'/admin-panel/?table={table_name}')
+                return redirect(redirect_url)
             try:
                 obj = model.objects.get(pk=record_id)
                 old_data = model_instance_to_audit_dict(obj)
@@ -345,90 +380,13 @@ def admin_crud(request):
                 messages.error(request, 'Запись не найдена')
             except Exception as e:
                 messages.error(request, get_user_friendly_message(e, 'delete'))
-            return redirect(f'/admin-panel/?table={table_name}')
-        
+            return redirect(redirect_url)
+
         elif action in ['create', 'update']:
-            # Получаем данные из POST
-            data = {}
-            password_field_present = False
-            password_value = None
-            
-            for key, value in request.POST.items():
-                if key not in ['csrfmiddlewaretoken', 'table_name', 'action', 'record_id']:
-                    if key == 'password':
-                        # Отдельно обрабатываем пароль
-                        password_field_present = True
-                        password_value = value
-                    elif value:  # Только непустые значения для остальных полей
-                        data[key] = value
-            
-            # Обрабатываем ForeignKey поля
-            fk_fields_map = {
-                'role_id': Role,
-                'account_id': Account,
-                'user_id': User,
-                'airplane_id': Airplane,
-                'departure_airport_id': Airport,
-                'arrival_airport_id': Airport,
-                'class_id': Class,
-                'passenger_id': Passenger,
-                'flight_id': Flight,
-                'payment_id': Payment,
-                'ticket_id': Ticket,
-                'baggage_type_id': BaggageType,
-            }
-            
-            for field_name, related_model in fk_fields_map.items():
-                if field_name in data and data[field_name]:
-                    try:
-                        data[field_name] = related_model.objects.get(pk=data[field_name])
-                    except related_model.DoesNotExist:
-                        messages.error(request, 'Связанная запись не найдена. Выберите существующее значение.')
-                        return redirect(f'/admin-panel/?table={table_name}')
-                elif field_name in data:
-                    data[field_name] = None
-            
-            # Обрабатываем пароль отдельно (только для таблицы Account)
-            if table_name == 'Account':
-                if action == 'create':
-                    if not password_field_present or not password_value:
-                        messages.error(request, 'Пароль обязателен при создании аккаунта')
-                        return redirect(f'/admin-panel/?table={table_name}')
-                    data['password'] = make_password(password_value)
-                elif action == 'update':
-                    if password_field_present and password_value:
-                        data['password'] = make_password(password_value)
-            
-            if 'birthday' in data:
-                if data['birthday']:
-                    try:
-                        data['birthday'] = parse_date(data['birthday'])
-                    except:
-                        data['birthday'] = None
-                else:
-                    data['birthday'] = None
-            
-            # Обрабатываем Decimal поля
-            decimal_fields = ['total_cost', 'price', 'max_weight_kg', 'base_price', 'weight_kg']
-            for field_name in decimal_fields:
-                if field_name in data and data[field_name]:
-                    try:
-                        data[field_name] = Decimal(str(data[field_name]))
-                    except:
-                        pass
-            
-            # Обрабатываем datetime поля
-            if 'departure_time' in data or 'arrival_time' in data:
-                if 'departure_time' in data and data['departure_time']:
-                    try:
-                        data['departure_time'] = parse_datetime(data['departure_time'])
-                    except Exception:
-                        pass
-                if 'arrival_time' in data and data['arrival_time']:
-                    try:
-                        data['arrival_time'] = parse_datetime(data['arrival_time'])
-                    except Exception:
-                        pass
+            data, error = _collect_form_data(request, table, action)
+            if error:
+                messages.error(request, error)
+                return redirect(redirect_url)
 
             # Валидация перед созданием/обновлением
             instance = None
@@ -437,11 +395,11 @@ def admin_crud(request):
                     instance = model.objects.get(pk=record_id)
                 except model.DoesNotExist:
                     pass
-            validation_errors = _validate_crud_data(model, data, action, instance=instance)
+            validation_errors = validate_crud_data(model, data, action, instance=instance)
             if validation_errors:
                 for err in validation_errors:
                     messages.error(request, err)
-                return redirect(f'/admin-panel/?table={table_name}')
+                return redirect(redirect_url)
 
             if action == 'create':
                 # Создаем новую запись
@@ -457,9 +415,9 @@ def admin_crud(request):
                 # Обновляем существующую запись
                 if not record_id:
                     messages.error(request, 'ID записи не указан')
-                    return redirect(f'/admin-panel/?table={table_name}')
+                    return redirect(redirect_url)
                 try:
-                    obj = model.objects.get(pk=record_id)
+                    obj = instance or model.objects.get(pk=record_id)
                     old_data = model_instance_to_audit_dict(obj)
                     for key, value in data.items():
                         setattr(obj, key, value)
@@ -472,11 +430,11 @@ def admin_crud(request):
                     messages.error(request, 'Запись не найдена')
                 except Exception as e:
                     messages.error(request, get_user_friendly_message(e, 'update'))
-            
-            return redirect(f'/admin-panel/?table={table_name}')
-        
-        return redirect('/admin-panel/')
-        
+
+            return redirect(redirect_url)
+
+        return redirect(_panel_url(panel))
+
     except Account.DoesNotExist:
         messages.error(request, 'Аккаунт не найден')
         return redirect('login')
@@ -485,526 +443,170 @@ def admin_crud(request):
         return redirect('index')
 
 
-def admin_get_record(request):
-    """Получение данных записи для редактирования"""
-    # Проверка авторизации
+def _export(request, panel):
+    """Выгрузка таблицы панели (?table=, ?format=csv|jsonl) потоком, в порядке страницы панели"""
+    if 'account_id' not in request.session:
+        messages.error(request, f'Для доступа к {panel.title} необходимо войти в систему')
+        return redirect('login')
+
+    try:
+        principal = get_principal(request)
+        if principal.role_name != panel.role:
+            messages.error(request, f'У вас нет доступа к {panel.title}')
+            return redirect('index')
+
+        table_name = request.GET.get('table')
+        table = panel.tables.get(table_name)
+        if table is None:
+            messages.error(request, 'У вас нет доступа к этой таблице' if table_name in TABLES else 'Неизвестная таблица')
+            return redirect(_panel_url(panel))
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            messages.error(request, 'Неподдерживаемый формат экспорта')
+            return redirect(_panel_url(panel, table_name))
+
+        objects, _state = _panel_queryset(request, table)
+        response = StreamingHttpResponse(export_lines(table, objects, fmt), content_type=EXPORT_FORMATS[fmt])
+        filename = f"{table.model._meta.db_table}-{timezone.localdate():%Y%m%d}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    except Account.DoesNotExist:
+        messages.error(request, 'Аккаунт не найден')
+        return redirect('login')
+    except Exception as e:
+        messages.error(request, get_user_friendly_message(e, 'export'))
+        return redirect(_panel_url(panel))
+
+
+def _json_access_error(request, panel):
+    """Ответ с ошибкой для JSON-запросов панели или None, если доступ есть"""
     if 'account_id' not in request.session:
         return JsonResponse({'error': 'Не авторизован'}, status=401)
-    
-    account_id = request.session['account_id']
-    
+    if get_principal(request).role_name != panel.role:
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    return None
+
+
+def _get_record(request, panel):
+    """Получение данных записи для редактирования"""
     try:
-        account = Account.objects.get(id_account=account_id)
-        if not account.role_id or account.role_id.role_name != 'ADMIN':
-            return JsonResponse({'error': 'Нет доступа'}, status=403)
-        
+        error = _json_access_error(request, panel)
+        if error:
+            return error
+
         table_name = request.GET.get('table')
-        record_id = request.GET.get('id')
-        
-        model_map = {
-            'Role': Role,
-            'Account': Account,
-            'User': User,
-            'Airport': Airport,
-            'Airplane': Airplane,
-            'Flight': Flight,
-            'Passenger': Passenger,
-            'Class': Class,
-            'Payment': Payment,
-            'Ticket': Ticket,
-            'BaggageType': BaggageType,
-            'Baggage': Baggage,
-        }
-        
-        if table_name not in model_map:
+        table = panel.writable_table(table_name)
+        if table is None:
+            if table_name in TABLES:
+                return JsonResponse({'error': 'У вас нет доступа к этой таблице'}, status=403)
             return JsonResponse({'error': 'Неизвестная таблица'}, status=400)
-        
-        model = model_map[table_name]
-        obj = model.objects.get(pk=record_id)
-        
+
+        obj = table.model.objects.get(pk=request.GET.get('id'))
+
         # Преобразуем объект в словарь
         data = {}
-        for field in model._meta.get_fields():
-            if hasattr(obj, field.name):
-                # Не возвращаем пароль при редактировании (безопасность)
-                if field.name == 'password':
-                    continue
-                value = getattr(obj, field.name)
+        for field_name in table.record_fields:
+            if field_name in table.fk_fields:
+                # id связанной записи — из столбца, без отдельного запроса
+                data[field_name] = getattr(obj, table.model._meta.get_field(field_name).attname)
+            elif hasattr(obj, field_name):
+                value = getattr(obj, field_name)
                 if value is None:
-                    data[field.name] = None
+                    data[field_name] = None
                 elif hasattr(value, 'pk'):  # ForeignKey
-                    data[field.name] = value.pk
+                    data[field_name] = value.pk
                 elif hasattr(value, 'isoformat'):  # DateTime или Date
-                    data[field.name] = value.isoformat()
+                    data[field_name] = value.isoformat()
                 else:
-                    data[field.name] = str(value)
-        
+                    data[field_name] = str(value)
+
         return JsonResponse(data)
-        
+
     except Exception as e:
         return JsonResponse({'error': get_user_friendly_message(e, 'load')}, status=500)
 
 
-def admin_get_options(request):
-    """Получение опций для select полей"""
-    # Проверка авторизации
-    if 'account_id' not in request.session:
-        return JsonResponse({'error': 'Не авторизован'}, status=401)
-    
-    account_id = request.session['account_id']
-    
+def _get_options(request, panel):
+    """
+    Опции для select полей: поиск по началу подписи или номеру (?q=), не больше
+    PANEL_OPTIONS_LIMIT; ?selected=<id> добавляет текущее значение поля.
+    Результаты поиска кешируются на PANEL_OPTIONS_CACHE_TTL секунд.
+    """
     try:
-        account = Account.objects.get(id_account=account_id)
-        if not account.role_id or account.role_id.role_name != 'ADMIN':
-            return JsonResponse({'error': 'Нет доступа'}, status=403)
-        
+        error = _json_access_error(request, panel)
+        if error:
+            return error
+
         model_name = request.GET.get('model')
-        
-        model_map = {
-            'Role': (Role, 'id_role', 'role_name'),
-            'Account': (Account, 'id_account', 'email'),
-            'User': (User, 'id_user', lambda x: f"{x.first_name} {x.last_name}"),
-            'Airport': (Airport, 'id_airport', 'name'),
-            'Airplane': (Airplane, 'id_airplane', 'model'),
-            'Flight': (Flight, 'id_flight', lambda x: f"GQ{x.id_flight:03d}"),
-            'Passenger': (Passenger, 'id_passenger', lambda x: f"{x.first_name} {x.last_name}"),
-            'Class': (Class, 'id_class', 'class_name'),
-            'Payment': (Payment, 'id_payment', 'id_payment'),
-            'Ticket': (Ticket, 'id_ticket', 'id_ticket'),
-            'BaggageType': (BaggageType, 'id_baggage_type', 'type_name'),
-            'Baggage': (Baggage, 'id_baggage', 'baggage_tag'),
-        }
-        
-        if model_name not in model_map:
+        if model_name not in panel.options:
             return JsonResponse({'error': 'Неизвестная модель'}, status=400)
-        
-        model, pk_field, display_field = model_map[model_name]
-        objects = model.objects.all()[:100]  # Ограничиваем для производительности
-        
-        options = []
-        for obj in objects:
-            pk_value = getattr(obj, pk_field)
-            if callable(display_field):
-                display_value = display_field(obj)
-            else:
-                display_value = getattr(obj, display_field)
-            options.append({
-                'value': pk_value,
-                'text': str(display_value)
-            })
-        
+        source = panel.options[model_name]
+
+        query = ' '.join(request.GET.get('q', '').split())[:100]
+        digest = hashlib.sha256(query.encode()).hexdigest()[:32]
+        cache_key = f'panel-options:{model_name}:{digest}'
+        options = cache.get(cache_key)
+        if options is None:
+            options = source.search(query, settings.PANEL_OPTIONS_LIMIT)
+            cache.set(cache_key, options, settings.PANEL_OPTIONS_CACHE_TTL)
+
+        selected = request.GET.get('selected')
+        if selected and not any(str(option['value']) == selected for option in options):
+            current = source.get(selected)
+            if current:
+                options = [current] + options
         return JsonResponse(options, safe=False)
-        
+
     except Exception as e:
         return JsonResponse({'error': get_user_friendly_message(e, 'load')}, status=500)
 
 
+def admin_panel(request):
+    """Панель администратора с CRUD для всех таблиц"""
+    return _render_panel(request, PANELS['admin'])
+
+
+def admin_crud(request):
+    """Обработка CRUD операций для панели администратора"""
+    return _crud(request, PANELS['admin'])
+
+
+def admin_get_record(request):
+    """Получение данных записи для редактирования"""
+    return _get_record(request, PANELS['admin'])
+
+
+def admin_get_options(request):
+    """Получение опций для select полей"""
+    return _get_options(request, PANELS['admin'])
+
+
+def admin_export(request):
+    """Выгрузка таблицы панели администратора в CSV/JSONL"""
+    return _export(request, PANELS['admin'])
+
+
 def manager_panel(request):
     """Панель менеджера с CRUD для ограниченного набора таблиц"""
-    # Проверка авторизации
-    if 'account_id' not in request.session:
-        messages.error(request, 'Для доступа к панели менеджера необходимо войти в систему')
-        return redirect('login')
-    
-    account_id = request.session['account_id']
-    
-    try:
-        account = Account.objects.get(id_account=account_id)
-        # Проверка роли менеджера
-        if not account.role_id or account.role_id.role_name != 'MANAGER':
-            messages.error(request, 'У вас нет доступа к панели менеджера')
-            return redirect('index')
-        
-        # Определяем доступные модели для менеджера (ограниченный список)
-        models_info = {
-            'Flight': {
-                'model': Flight,
-                'name': 'Рейсы',
-                'fields': ['id_flight', 'airplane_id', 'departure_airport_id', 'arrival_airport_id', 'departure_time', 'arrival_time', 'status'],
-                'readonly': False,
-            },
-            'Passenger': {
-                'model': Passenger,
-                'name': 'Пассажиры',
-                'fields': ['id_passenger', 'first_name', 'last_name', 'patronymic', 'passport_number', 'birthday'],
-                'readonly': False,
-            },
-            'Payment': {
-                'model': Payment,
-                'name': 'Платежи',
-                'fields': ['id_payment', 'user_id', 'payment_date', 'total_cost', 'payment_method', 'status'],
-                'readonly': False,
-            },
-            'Ticket': {
-                'model': Ticket,
-                'name': 'Билеты',
-                'fields': ['id_ticket', 'flight_id', 'class_id', 'seat_number', 'price', 'status', 'passenger_id', 'payment_id'],
-                'readonly': False,
-            },
-            'Baggage': {
-                'model': Baggage,
-                'name': 'Багаж',
-                'fields': ['id_baggage', 'ticket_id', 'baggage_type_id', 'weight_kg', 'baggage_tag', 'status', 'registered_at'],
-                'readonly': False,
-            },
-        }
-        
-        # Получаем выбранную таблицу из GET параметра
-        selected_table = request.GET.get('table', 'Flight')
-        if selected_table not in models_info:
-            selected_table = 'Flight'
-        
-        model_info = models_info[selected_table]
-        model = model_info['model']
-        
-        # Получаем все записи выбранной таблицы
-        objects = model.objects.all()
-        
-        # Применяем select_related для ForeignKey полей
-        if selected_table == 'Flight':
-            objects = objects.select_related('airplane_id', 'departure_airport_id', 'arrival_airport_id')
-        elif selected_table == 'Ticket':
-            objects = objects.select_related('flight_id', 'class_id', 'passenger_id', 'payment_id')
-        elif selected_table == 'Payment':
-            objects = objects.select_related('user_id')
-        elif selected_table == 'Baggage':
-            objects = objects.select_related('ticket_id', 'baggage_type_id')
-        
-        # Сортировка по столбцу (из GET: sort_by, order=asc/desc)
-        sort_by = request.GET.get('sort_by', '').strip()
-        sort_order = request.GET.get('order', 'asc').lower()
-        if sort_order not in ('asc', 'desc'):
-            sort_order = 'asc'
-        if sort_by and sort_by in model_info['fields']:
-            order_field = sort_by if sort_order == 'asc' else f'-{sort_by}'
-            objects = objects.order_by(order_field)
-        else:
-            sort_by = ''
-            sort_order = 'asc'
-            objects = objects.order_by('-pk')
-        
-        # Пагинация: 10 записей на странице
-        paginator = Paginator(objects, 10)
-        page_num = request.GET.get('page', 1)
-        try:
-            page_obj = paginator.page(page_num)
-        except PageNotAnInteger:
-            page_obj = paginator.page(1)
-        except EmptyPage:
-            page_obj = paginator.page(paginator.num_pages)
-        
-        # Диапазон страниц для отображения (макс. 10)
-        num_pages = paginator.num_pages
-        current = page_obj.number
-        if num_pages <= 10:
-            page_range_display = list(range(1, num_pages + 1))
-        else:
-            start = max(1, min(current - 4, num_pages - 9))
-            end = min(num_pages, start + 9)
-            page_range_display = list(range(start, end + 1))
-        
-        # Удаляем сообщения об успешном входе из панели
-        storage = get_messages(request)
-        for message in storage:
-            if message.message == 'Вы успешно вошли в систему!':
-                storage.used = False
-                break
-        
-        context = {
-            'models_info': models_info,
-            'selected_table': selected_table,
-            'model_info': model_info,
-            'objects': page_obj.object_list,
-            'page_obj': page_obj,
-            'page_range_display': page_range_display,
-            'fields': model_info['fields'],
-            'panel_type': 'manager',
-            'sort_by': sort_by,
-            'sort_order': sort_order,
-        }
-        
-        return render(request, 'admin_panel.html', context)
-        
-    except Account.DoesNotExist:
-        messages.error(request, 'Аккаунт не найден')
-        return redirect('login')
-    except Exception as e:
-        messages.error(request, get_user_friendly_message(e))
-        return redirect('index')
+    return _render_panel(request, PANELS['manager'])
 
 
 def manager_crud(request):
     """Обработка CRUD операций для панели менеджера"""
-    # Проверка авторизации
-    if 'account_id' not in request.session:
-        messages.error(request, 'Для доступа к панели менеджера необходимо войти в систему')
-        return redirect('login')
-    
-    account_id = request.session['account_id']
-    
-    try:
-        account = Account.objects.get(id_account=account_id)
-        # Проверка роли менеджера
-        if not account.role_id or account.role_id.role_name != 'MANAGER':
-            messages.error(request, 'У вас нет доступа к панели менеджера')
-            return redirect('index')
-        
-        table_name = request.POST.get('table_name')
-        action = request.POST.get('action')  # create, update, delete
-        record_id = request.POST.get('record_id')
-        
-        # Маппинг имен таблиц на модели (только доступные для менеджера)
-        model_map = {
-            'Flight': Flight,
-            'Passenger': Passenger,
-            'Payment': Payment,
-            'Ticket': Ticket,
-            'Baggage': Baggage,
-        }
-        
-        if table_name not in model_map:
-            messages.error(request, 'У вас нет доступа к этой таблице')
-            return redirect('manager_panel')
-        
-        model = model_map[table_name]
-        
-        if action == 'delete':
-            if not record_id:
-                messages.error(request, 'ID записи не указан')
-                return redirect('manager_panel')
-            try:
-                obj = model.objects.get(pk=record_id)
-                old_data = model_instance_to_audit_dict(obj)
-                rid = get_record_id_for_audit(obj)
-                obj.delete()
-                log_audit(table_name, rid, 'DELETE', account_id, old_data=old_data, new_data=None)
-                messages.success(request, 'Запись успешно удалена')
-            except model.DoesNotExist:
-                messages.error(request, 'Запись не найдена')
-            except Exception as e:
-                messages.error(request, get_user_friendly_message(e, 'delete'))
-            return redirect(f'/manager-panel/?table={table_name}')
-        
-        elif action in ['create', 'update']:
-            # Получаем данные из POST
-            data = {}
-            for key, value in request.POST.items():
-                if key not in ['csrfmiddlewaretoken', 'table_name', 'action', 'record_id']:
-                    if value:  # Только непустые значения
-                        data[key] = value
-            
-            # Обрабатываем ForeignKey поля
-            fk_fields_map = {
-                'airplane_id': Airplane,
-                'departure_airport_id': Airport,
-                'arrival_airport_id': Airport,
-                'user_id': User,
-                'class_id': Class,
-                'passenger_id': Passenger,
-                'flight_id': Flight,
-                'payment_id': Payment,
-                'ticket_id': Ticket,
-                'baggage_type_id': BaggageType,
-            }
-            
-            for field_name, related_model in fk_fields_map.items():
-                if field_name in data and data[field_name]:
-                    try:
-                        data[field_name] = related_model.objects.get(pk=data[field_name])
-                    except related_model.DoesNotExist:
-                        messages.error(request, 'Связанная запись не найдена. Выберите существующее значение.')
-                        return redirect(f'/manager-panel/?table={table_name}')
-                elif field_name in data:
-                    data[field_name] = None
-            
-            # Обрабатываем специальные поля
-            if 'birthday' in data:
-                if data['birthday']:
-                    try:
-                        from django.utils.dateparse import parse_date
-                        data['birthday'] = parse_date(data['birthday'])
-                    except:
-                        data['birthday'] = None
-                else:
-                    data['birthday'] = None
-            
-            # Обрабатываем Decimal поля
-            decimal_fields = ['total_cost', 'price', 'weight_kg']
-            for field_name in decimal_fields:
-                if field_name in data and data[field_name]:
-                    try:
-                        data[field_name] = Decimal(str(data[field_name]))
-                    except:
-                        pass
-            
-            # Обрабатываем datetime поля
-            if 'departure_time' in data or 'arrival_time' in data or 'payment_date' in data or 'registered_at' in data:
-                from django.utils.dateparse import parse_datetime
-                datetime_fields = ['departure_time', 'arrival_time', 'payment_date', 'registered_at']
-                for field_name in datetime_fields:
-                    if field_name in data and data[field_name]:
-                        try:
-                            data[field_name] = parse_datetime(data[field_name])
-                        except Exception:
-                            pass
-
-            # Валидация перед созданием/обновлением
-            instance = None
-            if action == 'update' and record_id:
-                try:
-                    instance = model.objects.get(pk=record_id)
-                except model.DoesNotExist:
-                    pass
-            validation_errors = _validate_crud_data(model, data, action, instance=instance)
-            if validation_errors:
-                for err in validation_errors:
-                    messages.error(request, err)
-                return redirect(f'/manager-panel/?table={table_name}')
-
-            if action == 'create':
-                # Создаем новую запись
-                try:
-                    obj = model.objects.create(**data)
-                    new_data = model_instance_to_audit_dict(obj)
-                    rid = get_record_id_for_audit(obj)
-                    log_audit(table_name, rid, 'INSERT', account_id, old_data=None, new_data=new_data)
-                    messages.success(request, 'Запись успешно создана')
-                except Exception as e:
-                    messages.error(request, get_user_friendly_message(e, 'create'))
-            elif action == 'update':
-                # Обновляем существующую запись
-                if not record_id:
-                    messages.error(request, 'ID записи не указан')
-                    return redirect(f'/manager-panel/?table={table_name}')
-                try:
-                    obj = model.objects.get(pk=record_id)
-                    old_data = model_instance_to_audit_dict(obj)
-                    for key, value in data.items():
-                        setattr(obj, key, value)
-                    obj.save()
-                    new_data = model_instance_to_audit_dict(obj)
-                    rid = get_record_id_for_audit(obj)
-                    log_audit(table_name, rid, 'UPDATE', account_id, old_data=old_data, new_data=new_data)
-                    messages.success(request, 'Запись успешно обновлена')
-                except model.DoesNotExist:
-                    messages.error(request, 'Запись не найдена')
-                except Exception as e:
-                    messages.error(request, get_user_friendly_message(e, 'update'))
-            
-            return redirect(f'/manager-panel/?table={table_name}')
-        
-        return redirect('manager_panel')
-        
-    except Account.DoesNotExist:
-        messages.error(request, 'Аккаунт не найден')
-        return redirect('login')
-    except Exception as e:
-        messages.error(request, get_user_friendly_message(e))
-        return redirect('index')
+    return _crud(request, PANELS['manager'])
 
 
 def manager_get_record(request):
     """Получение данных записи для редактирования (для менеджера)"""
-    # Проверка авторизации
-    if 'account_id' not in request.session:
-        return JsonResponse({'error': 'Не авторизован'}, status=401)
-    
-    account_id = request.session['account_id']
-    
-    try:
-        account = Account.objects.get(id_account=account_id)
-        if not account.role_id or account.role_id.role_name != 'MANAGER':
-            return JsonResponse({'error': 'Нет доступа'}, status=403)
-        
-        table_name = request.GET.get('table')
-        record_id = request.GET.get('id')
-        
-        # Маппинг имен таблиц на модели (только доступные для менеджера)
-        model_map = {
-            'Flight': Flight,
-            'Passenger': Passenger,
-            'Payment': Payment,
-            'Ticket': Ticket,
-            'Baggage': Baggage,
-        }
-        
-        if table_name not in model_map:
-            return JsonResponse({'error': 'У вас нет доступа к этой таблице'}, status=403)
-        
-        model = model_map[table_name]
-        obj = model.objects.get(pk=record_id)
-        
-        # Преобразуем объект в словарь
-        data = {}
-        for field in model._meta.get_fields():
-            if hasattr(obj, field.name):
-                # Не возвращаем пароль при редактировании (безопасность)
-                if field.name == 'password':
-                    continue
-                value = getattr(obj, field.name)
-                if value is None:
-                    data[field.name] = None
-                elif hasattr(value, 'pk'):  # ForeignKey
-                    data[field.name] = value.pk
-                elif hasattr(value, 'isoformat'):  # DateTime или Date
-                    data[field.name] = value.isoformat()
-                else:
-                    data[field.name] = str(value)
-        
-        return JsonResponse(data)
-        
-    except Exception as e:
-        return JsonResponse({'error': get_user_friendly_message(e, 'load')}, status=500)
+    return _get_record(request, PANELS['manager'])
 
 
 def manager_get_options(request):
     """Получение опций для select полей (для менеджера)"""
-    # Проверка авторизации
-    if 'account_id' not in request.session:
-        return JsonResponse({'error': 'Не авторизован'}, status=401)
-    
-    account_id = request.session['account_id']
-    
-    try:
-        account = Account.objects.get(id_account=account_id)
-        if not account.role_id or account.role_id.role_name != 'MANAGER':
-            return JsonResponse({'error': 'Нет доступа'}, status=403)
-        
-        model_name = request.GET.get('model')
-        
-        # Маппинг для опций (включая связанные модели)
-        model_map = {
-            'Airplane': (Airplane, 'id_airplane', 'model'),
-            'Airport': (Airport, 'id_airport', 'name'),
-            'User': (User, 'id_user', lambda x: f"{x.first_name} {x.last_name}"),
-            'Class': (Class, 'id_class', 'class_name'),
-            'Passenger': (Passenger, 'id_passenger', lambda x: f"{x.first_name} {x.last_name}"),
-            'Flight': (Flight, 'id_flight', lambda x: f"GQ{x.id_flight:03d}"),
-            'Payment': (Payment, 'id_payment', 'id_payment'),
-            'Ticket': (Ticket, 'id_ticket', 'id_ticket'),
-            'BaggageType': (BaggageType, 'id_baggage_type', 'type_name'),
-            'Baggage': (Baggage, 'id_baggage', 'baggage_tag'),
-        }
-        
-        if model_name not in model_map:
-            return JsonResponse({'error': 'Неизвестная модель'}, status=400)
-        
-        model, pk_field, display_field = model_map[model_name]
-        objects = model.objects.all()[:100]  # Ограничиваем для производительности
-        
-        options = []
-        for obj in objects:
-            pk_value = getattr(obj, pk_field)
-            if callable(display_field):
-                display_value = display_field(obj)
-            else:
-                display_value = getattr(obj, display_field)
-            options.append({
-                'value': pk_value,
-                'text': str(display_value)
-            })
-        
-        return JsonResponse(options, safe=False)
-        
-    except Exception as e:
-        return JsonResponse({'error': get_user_friendly_message(e, 'load')}, status=500)
+    return _get_options(request, PANELS['manager'])
+
+
+def manager_export(request):
+    """Выгрузка таблицы панели менеджера в CSV/JSONL"""
+    return _export(request, PANELS['manager'])
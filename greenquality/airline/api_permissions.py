@@ -1,10 +1,11 @@
 """
 Права доступа для REST API.
-Доступ к API имеют только авторизованные администраторы.
+Доступ к API имеют только авторизованные администраторы — по токену
+(airline/api_tokens.py) или по сессии.
 """
 from rest_framework import permissions
 
-from .models import Account
+from .principal import Principal, resolve_principal
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -15,11 +16,11 @@ class IsAdminUser(permissions.BasePermission):
     message = 'Доступ к API разрешён только администраторам. Войдите в систему как администратор.'
 
     def has_permission(self, request, view):
-        account_id = request.session.get('account_id')
-        if not account_id:
-            return False
-        try:
-            account = Account.objects.get(id_account=account_id)
-            return account.role_id and account.role_id.role_name == 'ADMIN'
-        except Account.DoesNotExist:
-            return False
+        # Токен API: роль записана в токене, сессия не читается
+        if isinstance(request.user, Principal):
+            return request.user.is_admin
+        # Сессия: роль определена PrincipalMiddleware один раз за запрос
+        principal = getattr(request, 'principal', None)
+        if principal is None:
+            principal = resolve_principal(request.session.get('account_id'))
+        return bool(principal and principal.is_admin)
@@ -0,0 +1,123 @@
+"""
+Токены REST API без сессии.
+
+Токен — подписанная (SECRET_KEY, django.core.signing) строка с номером
+аккаунта, ролью и идентификатором токена (jti); срок действия —
+API_TOKEN_TTL секунд. Проверка подписи и срока выполняется в памяти, без
+запросов к accounts и django_session:
+
+    POST /api/token/         {"email": ..., "password": ...} -> {"token": ..., "expires_at": ...}
+    GET  /api/flights/       Authorization: Bearer <token>
+    POST /api/token/revoke/  Authorization: Bearer <token>
+
+Отозванные токены хранятся в api_token_revocations до истечения их срока.
+Каждый процесс держит множество отозванных jti в памяти и перечитывает его
+не чаще раза в API_TOKEN_REVOCATION_REFRESH секунд; отзыв в том же процессе
+действует сразу. Роль записана в токен: после смены роли старые токены
+действуют до истечения срока, если их не отозвать.
+"""
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+
+from .models import ApiTokenRevocation
+from .principal import Principal
+
+
+TOKEN_SALT = 'greenquality.api-token'
+DEFAULT_TOKEN_TTL = 3600
+DEFAULT_REVOCATION_REFRESH = 30
+
+_revoked = set()
+_revoked_loaded_at = None
+_lock = threading.Lock()
+
+
+def token_ttl():
+    return getattr(settings, 'API_TOKEN_TTL', DEFAULT_TOKEN_TTL)
+
+
+def issue_token(account_id, role_name):
+    """Новый токен аккаунта. Возвращает (токен, срок действия)."""
+    expires_at = timezone.now() + timedelta(seconds=token_ttl())
+    payload = {
+        'a': account_id,
+        'r': role_name,
+        'j': secrets.token_hex(16),
+        'e': int(expires_at.timestamp()),
+    }
+    return signing.dumps(payload, salt=TOKEN_SALT, compress=True), expires_at
+
+
+def decode_token(token):
+    """Данные токена {a, r, j, e}; signing.BadSignature при неверной подписи или истёкшем сроке."""
+    payload = signing.loads(token, salt=TOKEN_SALT)
+    if payload.get('e', 0) <= time.time():
+        raise signing.SignatureExpired('Срок действия токена истёк')
+    return payload
+
+
+def _revoked_ids():
+    global _revoked, _revoked_loaded_at
+    refresh = getattr(settings, 'API_TOKEN_REVOCATION_REFRESH', DEFAULT_REVOCATION_REFRESH)
+    now = time.monotonic()
+    with _lock:
+        if _revoked_loaded_at is not None and now - _revoked_loaded_at < refresh:
+            return _revoked
+    revoked = set(ApiTokenRevocation.objects.filter(
+        expires_at__gt=timezone.now()).values_list('jti', flat=True))
+    with _lock:
+        _revoked, _revoked_loaded_at = revoked, now
+    return revoked
+
+
+def is_revoked(payload):
+    return payload['j'] in _revoked_ids()
+
+
+def revoke_token(payload):
+    """Отзывает токен; заодно удаляет записи об отзыве токенов с истёкшим сроком."""
+    expires_at = datetime.fromtimestamp(payload['e'], tz=dt_timezone.utc)
+    ApiTokenRevocation.objects.filter(expires_at__lte=timezone.now()).delete()
+    ApiTokenRevocation.objects.get_or_create(
+        jti=payload['j'], defaults={'account_id': payload['a'], 'expires_at': expires_at})
+    with _lock:
+        _revoked.add(payload['j'])
+
+
+def reset_revocation_cache():
+    global _revoked_loaded_at
+    with _lock:
+        _revoked.clear()
+        _revoked_loaded_at = None
+
+
+class BearerTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Аутентификация DRF по заголовку Authorization: Bearer <токен>.
+    request.user — Principal из токена (user_id не заполняется), request.auth — данные токена.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Неверный заголовок Authorization')
+        try:
+            payload = decode_token(header[1].decode())
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Токен недействителен или истёк')
+        if is_revoked(payload):
+            raise exceptions.AuthenticationFailed('Токен отозван')
+        return Principal(payload['a'], payload['r'], None), payload
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -7,7 +7,8 @@ from .api_views import (
     AirportViewSet, FlightViewSet, TicketViewSet,
     UserViewSet, AccountViewSet, PaymentViewSet,
     PassengerViewSet, ClassViewSet, AirplaneViewSet,
-    RoleViewSet, BaggageViewSet, BaggageTypeViewSet
+    RoleViewSet, BaggageViewSet, BaggageTypeViewSet, ArchivedTicketViewSet,
+    ApiTokenView, ApiTokenRevokeView
 )
 
 # Создаем роутер для автоматической генерации URL маршрутов
@@ -26,8 +27,12 @@ router.register(r'airplanes', AirplaneViewSet, basename='airplane')
 router.register(r'roles', RoleViewSet, basename='role')
 router.register(r'baggage', BaggageViewSet, basename='baggage')
 router.register(r'baggage-types', BaggageTypeViewSet, basename='baggage-type')
+router.register(r'archived-tickets', ArchivedTicketViewSet, basename='archived-ticket')
 
 # URL patterns для API
 urlpatterns = [
+    # Токены API (airline/api_tokens.py)
+    path('token/', ApiTokenView.as_view(), name='api-token'),
+    path('token/revoke/', ApiTokenRevokeView.as_view(), name='api-token-revoke'),
     path('', include(router.urls)),
 ]
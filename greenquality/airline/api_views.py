@@ -5,19 +5,78 @@ API Views для Django REST Framework
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.db.models import Q
 from .models import (
     Airport, Flight, Ticket, User, Account, Payment,
-    Passenger, Class, Airplane, Role, Baggage, BaggageType
+    Passenger, Class, Airplane, Role, Baggage, BaggageType, ArchivedTicket
 )
+from .api_tokens import BearerTokenAuthentication, issue_token, revoke_token
+from .cancellation import CancellationError, cancel_flight, cancel_payment, cancel_tickets
+from .hashers import verify_password
+from .login_throttle import check_login_attempt, reset_login_throttle
+from .principal import Principal
+from .rebooking import RebookingError, rebook_cancelled_flight
 from .serializers import (
     AirportSerializer, FlightSerializer, TicketSerializer,
     UserSerializer, AccountSerializer, PaymentSerializer,
     PassengerSerializer, ClassSerializer, AirplaneSerializer,
-    RoleSerializer, BaggageSerializer, BaggageTypeSerializer
+    RoleSerializer, BaggageSerializer, BaggageTypeSerializer, ArchivedTicketSerializer
 )
 
 
+def _account_id(request):
+    """Аккаунт, выполняющий запрос API: из токена или из сессии"""
+    if isinstance(request.user, Principal):
+        return request.user.account_id
+    return request.session.get('account_id')
+
+
+class ApiTokenView(APIView):
+    """
+    Выдача токена API по email и паролю администратора.
+    POST /api/token/ {"email": ..., "password": ...}
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        email = request.data.get('email')
+        password = request.data.get('password')
+        if not email or not password:
+            return Response({'error': 'Укажите email и password'}, status=status.HTTP_400_BAD_REQUEST)
+        wait = check_login_attempt(request, email)
+        if wait:
+            return Response({'error': f'Слишком много попыток входа. Повторите через {wait} с'},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(wait)})
+        account = Account.objects.select_related('role_id').filter(email=email).first()
+        if account is None or not verify_password(account, password):
+            return Response({'error': 'Неверный email или пароль'}, status=status.HTTP_401_UNAUTHORIZED)
+        reset_login_throttle(email)
+        role_name = account.role_id.role_name if account.role_id else None
+        if role_name != 'ADMIN':
+            return Response({'error': 'Доступ к API разрешён только администраторам'},
+                            status=status.HTTP_403_FORBIDDEN)
+        token, expires_at = issue_token(account.id_account, role_name)
+        return Response({'token': token, 'token_type': 'Bearer', 'expires_at': expires_at.isoformat()})
+
+
+class ApiTokenRevokeView(APIView):
+    """
+    Отзыв токена, которым подписан запрос.
+    POST /api/token/revoke/ с заголовком Authorization: Bearer <токен>
+    """
+    authentication_classes = [BearerTokenAuthentication]
+    permission_classes = []
+
+    def post(self, request):
+        if not isinstance(request.auth, dict):
+            return Response({'error': 'Нужен заголовок Authorization: Bearer <токен>'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+        revoke_token(request.auth)
+        return Response({'revoked': True})
+
+
 class AirportViewSet(viewsets.ModelViewSet):
     """
     ViewSet для работы с аэропортами
@@ -75,6 +134,35 @@ class FlightViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(flights, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def rebook(self, request, pk=None):
+        """Пересадка пассажиров отменённого рейса (dry_run=true — только план)"""
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            window_hours = int(request.data.get('window_hours', 48))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'window_hours must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            report = rebook_cancelled_flight(
+                pk, window_hours=window_hours, dry_run=dry_run,
+                changed_by_account_id=_account_id(request),
+            )
+        except RebookingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Отмена рейса: пересадка пассажиров, возврат билетов, для которых не нашлось места"""
+        try:
+            report = cancel_flight(pk, changed_by_account_id=_account_id(request))
+        except CancellationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
 
 class TicketViewSet(viewsets.ModelViewSet):
     """
@@ -103,6 +191,15 @@ class TicketViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(tickets, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Отмена билета: место возвращается в продажу"""
+        try:
+            report = cancel_tickets([pk], changed_by_account_id=_account_id(request))
+        except CancellationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -141,6 +238,15 @@ class PaymentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(payments, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def refund(self, request, pk=None):
+        """Возврат платежа: все его билеты возвращаются в продажу"""
+        try:
+            report = cancel_payment(pk, changed_by_account_id=_account_id(request))
+        except CancellationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
 
 class PassengerViewSet(viewsets.ModelViewSet):
     """
@@ -188,3 +294,23 @@ class BaggageViewSet(viewsets.ModelViewSet):
     """
     queryset = Baggage.objects.select_related('ticket_id', 'baggage_type_id').all()
     serializer_class = BaggageSerializer
+
+
+class ArchivedTicketViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet для архивных билетов (только чтение) — для службы поддержки.
+    Фильтры: ?passenger_id=, ?payment_id=, ?baggage_tag=
+    """
+    serializer_class = ArchivedTicketSerializer
+
+    def get_queryset(self):
+        tickets = ArchivedTicket.objects.select_related('flight_id').prefetch_related(
+            'baggage_items').order_by('id_ticket')
+        params = self.request.query_params
+        if params.get('passenger_id'):
+            tickets = tickets.filter(passenger_id=params['passenger_id'])
+        if params.get('payment_id'):
+            tickets = tickets.filter(payment_id=params['payment_id'])
+        if params.get('baggage_tag'):
+            tickets = tickets.filter(baggage_items__baggage_tag=params['baggage_tag'])
+        return tickets
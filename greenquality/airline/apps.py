@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AirlineConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'airline'
+
+    def ready(self):
+        # Сигналы сброса кеша принципалов
+        from . import principal  # noqa: F401
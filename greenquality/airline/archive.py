@@ -0,0 +1,152 @@
+"""
+Архив выполненных рейсов.
+
+Рейсы со статусом COMPLETED, прилетевшие раньше, чем ARCHIVE_AFTER_MONTHS
+месяцев назад, переносятся вместе с билетами и багажом в таблицы archive_*
+и удаляются из живых таблиц. Перенос идёт пачками по batch_size рейсов,
+каждая пачка — отдельная транзакция из нескольких INSERT ... SELECT / DELETE.
+Свободные места (AVAILABLE) не архивируются.
+
+Платежи остаются в таблице payments: архивный билет хранит номер платежа
+и пассажира. Выручка архивного рейса сохраняется в flight_revenue_summary —
+по ней v_airports_revenue_report учитывает перенесённые рейсы.
+
+Чтение архива: API /api/archived-tickets/ (поиск по билету, платежу,
+пассажиру, бирке багажа) и таблица «Архивные билеты» в панелях.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .audit_utils import log_audit_bulk, model_instance_to_audit_dict
+from .models import Flight, FlightRevenueSummary
+from .seat_layout import OCCUPIED_STATUSES
+
+
+ARCHIVE_BATCH_SIZE = 200
+DEFAULT_ARCHIVE_AFTER_MONTHS = 12
+
+
+def archive_after_months():
+    return getattr(settings, 'ARCHIVE_AFTER_MONTHS', DEFAULT_ARCHIVE_AFTER_MONTHS)
+
+
+def archive_cutoff(months=None, now=None):
+    """Граница архивации (месяц — 30 дней): рейсы, прилетевшие раньше неё, переносятся в архив."""
+    months = archive_after_months() if months is None else months
+    return (now or timezone.now()) - timedelta(days=30 * months)
+
+
+def archivable_flights(cutoff):
+    return Flight.objects.filter(status='COMPLETED', arrival_time__lt=cutoff).order_by('id_flight')
+
+
+def _archive_batch(cur, flight_ids, cutoff, archived_at):
+    """
+    Переносит пачку рейсов. Возвращает (билетов, багажа, выручка).
+    Условие flight_departure < cutoff ограничивает чтение tickets старыми секциями.
+    """
+    ids = ', '.join(['%s'] * len(flight_ids))
+    occupied = ', '.join(f"'{s}'" for s in OCCUPIED_STATUSES)
+
+    cur.execute(f"""
+        INSERT INTO archive_flights (id_flight, airplane_id, departure_airport_id, arrival_airport_id,
+                                     departure_time, arrival_time, status, archived_at)
+        SELECT id_flight, airplane_id, departure_airport_id, arrival_airport_id,
+               departure_time, arrival_time, status, %s
+        FROM flights WHERE id_flight IN ({ids})
+    """, [archived_at, *flight_ids])
+
+    # Итоги считаются по тем же правилам, что calc_flight_revenue
+    cur.execute(f"""
+        INSERT INTO flight_revenue_summary (id_flight, departure_airport_id, arrival_airport_id,
+                                            departure_time, tickets_sold, revenue)
+        SELECT f.id_flight, f.departure_airport_id, f.arrival_airport_id, f.departure_time,
+               COUNT(t.id_ticket), COALESCE(SUM(t.price), 0)
+        FROM flights f
+        LEFT JOIN tickets t ON t.flight_id = f.id_flight AND t.flight_departure < %s
+                           AND t.status IN ({occupied})
+        WHERE f.id_flight IN ({ids})
+        GROUP BY f.id_flight, f.departure_airport_id, f.arrival_airport_id, f.departure_time
+    """, [cutoff, *flight_ids])
+    cur.execute(f"SELECT COALESCE(SUM(revenue), 0) FROM flight_revenue_summary WHERE id_flight IN ({ids})",
+                flight_ids)
+    revenue = Decimal(str(cur.fetchone()[0]))
+
+    cur.execute(f"""
+        INSERT INTO archive_tickets (id_ticket, flight_id, class_id, seat_number, price, status,
+                                     passenger_id, payment_id)
+        SELECT id_ticket, flight_id, class_id, seat_number, price, status, passenger_id, payment_id
+        FROM tickets WHERE flight_id IN ({ids}) AND flight_departure < %s AND status <> 'AVAILABLE'
+    """, [*flight_ids, cutoff])
+    tickets = cur.rowcount
+
+    cur.execute(f"""
+        INSERT INTO archive_baggage (id_baggage, ticket_id, baggage_type_id, weight_kg, baggage_tag,
+                                     status, registered_at)
+        SELECT b.id_baggage, b.ticket_id, b.baggage_type_id, b.weight_kg, b.baggage_tag,
+               b.status, b.registered_at
+        FROM baggage b
+        JOIN tickets t ON t.id_ticket = b.ticket_id
+        WHERE t.flight_id IN ({ids}) AND t.flight_departure < %s AND t.status <> 'AVAILABLE'
+    """, [*flight_ids, cutoff])
+    baggage = cur.rowcount
+
+    cur.execute(f"DELETE FROM baggage WHERE flight_departure < %s AND ticket_id IN "
+                f"(SELECT id_ticket FROM tickets WHERE flight_id IN ({ids}))", [cutoff, *flight_ids])
+    cur.execute(f"DELETE FROM tickets WHERE flight_id IN ({ids}) AND flight_departure < %s",
+                [*flight_ids, cutoff])
+    cur.execute(f"DELETE FROM flights WHERE id_flight IN ({ids})", flight_ids)
+    return tickets, baggage, revenue
+
+
+def archive_completed_flights(months=None, batch_size=ARCHIVE_BATCH_SIZE, dry_run=False,
+                              changed_by_account_id=None):
+    """
+    Переносит выполненные рейсы старше months месяцев в архив.
+    Возвращает сводку {cutoff, flights, tickets, baggage, revenue, batches, dry_run}.
+    """
+    cutoff = archive_cutoff(months)
+    summary = {
+        'cutoff': cutoff, 'flights': 0, 'tickets': 0, 'baggage': 0,
+        'revenue': Decimal('0'), 'batches': 0, 'dry_run': dry_run,
+    }
+    if dry_run:
+        summary['flights'] = archivable_flights(cutoff).count()
+        return summary
+
+    while True:
+        with transaction.atomic():
+            flights = list(archivable_flights(cutoff).select_for_update(skip_locked=True)[:batch_size])
+            if not flights:
+                break
+            flight_ids = [flight.id_flight for flight in flights]
+            archived_at = timezone.now()
+            with connection.cursor() as cur:
+                if connection.vendor == 'postgresql':
+                    # Триггеры аудита не пишут строку на каждый удалённый билет
+                    cur.execute("SELECT set_config('greenquality.archiving', 'on', true)")
+                tickets, baggage, revenue = _archive_batch(cur, flight_ids, cutoff, archived_at)
+                if connection.vendor == 'postgresql':
+                    cur.execute("SELECT set_config('greenquality.archiving', '', true)")
+
+            # Запись аудита на каждый рейс: данные рейса и его итоги в архиве
+            totals = {row.id_flight: row for row in FlightRevenueSummary.objects.filter(id_flight__in=flight_ids)}
+            log_audit_bulk((
+                ('Flight', flight.id_flight, 'DELETE', model_instance_to_audit_dict(flight), {
+                    'archived_at': archived_at.isoformat(),
+                    'tickets_sold': totals[flight.id_flight].tickets_sold,
+                    'revenue': str(totals[flight.id_flight].revenue),
+                })
+                for flight in flights
+            ), changed_by_account_id)
+        summary['flights'] += len(flight_ids)
+        summary['tickets'] += tickets
+        summary['baggage'] += baggage
+        summary['revenue'] += revenue
+        summary['batches'] += 1
+    return summary
+
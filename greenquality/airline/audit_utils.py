@@ -1,7 +1,7 @@
 """
 Утилиты для записи в журнал аудита: кто/когда/что изменил, данные до и после.
 """
-from django.db import models
+from django.db import models, transaction
 
 from .models import AuditLog, Account
 
@@ -9,12 +9,16 @@ from .models import AuditLog, Account
 def model_instance_to_audit_dict(instance):
     """
     Преобразует экземпляр модели в словарь для old_data/new_data.
-    Исключает пароль, ForeignKey представляются как pk.
+    Исключает пароль, ForeignKey представляются как pk (значение столбца,
+    без загрузки связанной записи).
     """
     if instance is None:
         return None
     result = {}
     for field in instance._meta.get_fields():
+        if field.many_to_one and field.concrete:
+            result[field.name] = getattr(instance, field.attname)
+            continue
         if not hasattr(instance, field.name):
             continue
         if field.name == 'password':
@@ -49,7 +53,7 @@ def log_audit(table_name, record_id, operation, changed_by_account_id, old_data=
     Записывает запись в журнал аудита.
 
     :param table_name: имя таблицы/модели (напр. 'User', 'Flight')
-    :param record_id: id записи (int; для строковых PK — 0)
+    :param record_id: id записи (int; для строковых PK — 0; None — сводная запись по файлу)
     :param operation: 'INSERT', 'UPDATE' или 'DELETE'
     :param changed_by_account_id: id_account пользователя (или None)
     :param old_data: данные до изменения (dict; для INSERT — None)
@@ -72,3 +76,35 @@ def log_audit(table_name, record_id, operation, changed_by_account_id, old_data=
         )
     except Exception:
         pass  # не ломаем основную операцию при ошибке аудита
+
+
+def log_audit_bulk(entries, changed_by_account_id=None):
+    """
+    Записывает пачку записей аудита одним INSERT (bulk_create).
+
+    :param entries: итерируемое из кортежей
+        (table_name, record_id, operation, old_data, new_data)
+    :param changed_by_account_id: id_account пользователя (или None)
+    :return: количество записанных строк
+    """
+    try:
+        changed_by_id = None
+        if changed_by_account_id and Account.objects.filter(id_account=changed_by_account_id).exists():
+            changed_by_id = changed_by_account_id
+        rows = [
+            AuditLog(
+                table_name=table_name,
+                record_id=record_id,
+                operation=operation,
+                old_data=old_data,
+                new_data=new_data,
+                changed_by_id=changed_by_id,
+            )
+            for table_name, record_id, operation, old_data, new_data in entries
+        ]
+        # Точка сохранения: ошибка аудита не должна ломать внешнюю транзакцию
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+    except Exception:
+        return 0  # не ломаем основную операцию при ошибке аудита
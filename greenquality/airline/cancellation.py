@@ -0,0 +1,201 @@
+"""
+Отмена билетов и возврат платежей.
+
+Отменённый билет возвращается в продажу: строка (flight_id, seat_number)
+остаётся, но получает статус AVAILABLE без пассажира и платежа, поэтому
+место снова можно купить. В режиме lazy (airline/inventory.py) строка
+удаляется — свободное место выводится из схемы салона. Все изменения — пакетные UPDATE/DELETE в одной
+транзакции; загрузка и выручка рейса (calc_flight_occupancy,
+calc_flight_revenue) считаются по статусам билетов и сразу остаются верными.
+
+Отмена рейса сначала пересаживает пассажиров на рейсы того же маршрута
+(airline/rebooking.py); возврат оформляется только тем, кому не нашлось места.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .audit_utils import log_audit_bulk
+from .inventory import is_lazy
+from .models import Baggage, Flight, Payment, Ticket
+from .rebooking import DEFAULT_WINDOW_HOURS, rebook_cancelled_flight
+from .seat_layout import OCCUPIED_STATUSES
+
+
+# Статусы, из которых билет можно вернуть в продажу
+RELEASABLE_STATUSES = OCCUPIED_STATUSES + ('CANCELLED',)
+
+# Рейсы, которые ещё можно отменить и билеты на которые пользователь может сдать
+CANCELLABLE_FLIGHT_STATUSES = ('SCHEDULED', 'DELAYED')
+# Отмена пользователем: только действующий билет на ещё не вылетевший рейс
+USER_CANCELLABLE_TICKET_STATUSES = ('BOOKED', 'PAID')
+
+
+class CancellationError(Exception):
+    """Отмена невозможна (нет подходящих билетов, платёж не найден и т.п.)."""
+
+
+def _release(ticket_qs, changed_by_account_id=None, hold_processing=False):
+    """
+    Возвращает в продажу билеты из queryset и закрывает платежи, у которых не
+    осталось действующих билетов: оплаченные — возвратом (REFUNDED), ещё не
+    списанные — отменой (CANCELLED). Билеты платежа, который сейчас проводит
+    обработчик (PROCESSING), не отменяются: по умолчанию отмена отклоняется
+    целиком, с hold_processing=True такие билеты остаются проданными и
+    попадают в сводку (tickets_held, payments_processing). Возвращает сводку.
+    """
+    with transaction.atomic():
+        rows = list(
+            ticket_qs.select_for_update().filter(status__in=RELEASABLE_STATUSES).values(
+                'id_ticket', 'flight_id', 'seat_number', 'status', 'price',
+                'passenger_id', 'payment_id',
+            )
+        )
+        if not rows:
+            raise CancellationError('Нет билетов для отмены')
+
+        payment_ids = {r['payment_id'] for r in rows if r['payment_id']}
+        # Платежи блокируются, чтобы обработчик платежей не забрал их во время отмены
+        payment_status = dict(
+            Payment.objects.select_for_update().filter(id_payment__in=payment_ids)
+            .values_list('id_payment', 'status')
+        )
+        processing = sorted(pid for pid, status in payment_status.items() if status == 'PROCESSING')
+        if processing and not hold_processing:
+            raise CancellationError(f'Платёж №{processing[0]} ещё обрабатывается — повторите отмену позже')
+        held = [r['id_ticket'] for r in rows if payment_status.get(r['payment_id']) == 'PROCESSING']
+        if held:
+            rows = [r for r in rows if payment_status.get(r['payment_id']) != 'PROCESSING']
+            payment_ids -= set(processing)
+        ticket_ids = [r['id_ticket'] for r in rows]
+
+        lazy = is_lazy()
+        Baggage.objects.filter(ticket_id__in=ticket_ids).delete()
+        if lazy:
+            Ticket.objects.filter(id_ticket__in=ticket_ids).delete()
+        else:
+            Ticket.objects.filter(id_ticket__in=ticket_ids).update(
+                status='AVAILABLE', price=0, passenger_id=None, payment_id=None,
+            )
+
+        # Платежи, где не осталось действующих билетов, закрываются: списанные
+        # (COMPLETED) — возвратом, ещё не списанные (PENDING) — отменой
+        closed = set(Payment.objects.filter(id_payment__in=payment_ids).exclude(
+            ticket__status__in=OCCUPIED_STATUSES).values_list('id_payment', flat=True))
+        refunded_ids = sorted(pid for pid in closed if payment_status[pid] == 'COMPLETED')
+        voided_ids = sorted(pid for pid in closed if payment_status[pid] == 'PENDING')
+        Payment.objects.filter(id_payment__in=refunded_ids).update(status='REFUNDED')
+        Payment.objects.filter(id_payment__in=voided_ids).update(status='CANCELLED')
+
+        released = None if lazy else {
+            'status': 'AVAILABLE', 'passenger_id': None, 'payment_id': None, 'price': '0'}
+        entries = [
+            (
+                'Ticket', r['id_ticket'], 'DELETE' if lazy else 'UPDATE',
+                {'status': r['status'], 'passenger_id': r['passenger_id'],
+                 'payment_id': r['payment_id'], 'price': str(r['price'])},
+                released,
+            )
+            for r in rows
+        ]
+        entries.extend(
+            ('Payment', pid, 'UPDATE', {'status': 'COMPLETED'}, {'status': 'REFUNDED'})
+            for pid in refunded_ids
+        )
+        entries.extend(
+            ('Payment', pid, 'UPDATE', {'status': 'PENDING'}, {'status': 'CANCELLED'})
+            for pid in voided_ids
+        )
+        log_audit_bulk(entries, changed_by_account_id)
+
+    return {
+        'tickets_released': len(rows),
+        'payments_refunded': refunded_ids,
+        'payments_cancelled': voided_ids,
+        # К возврату — только билеты, деньги за которые уже списаны
+        'refund_amount': sum(
+            (r['price'] for r in rows if payment_status.get(r['payment_id']) == 'COMPLETED'), Decimal('0')),
+        'released_by_flight': dict(Counter(r['flight_id'] for r in rows)),
+        # Не отменены: платёж в обработке — отмену нужно повторить (cancel_payment)
+        'tickets_held': held,
+        'payments_processing': processing,
+    }
+
+
+def cancel_tickets(ticket_ids, changed_by_account_id=None):
+    """Отмена отдельных билетов по id."""
+    return _release(Ticket.objects.filter(id_ticket__in=list(ticket_ids)), changed_by_account_id)
+
+
+def user_cancel_error(ticket, flight, payment):
+    """Почему пользователь не может отменить билет (текст ошибки) или None, если может."""
+    if ticket.status not in USER_CANCELLABLE_TICKET_STATUSES:
+        return 'Билет уже отменён или использован'
+    if flight.status not in CANCELLABLE_FLIGHT_STATUSES:
+        return 'Рейс отменён или выполнен — отмена билета недоступна'
+    if flight.departure_time <= timezone.now():
+        return 'Рейс уже вылетел — отмена билета недоступна'
+    if payment is not None and payment.status == 'PROCESSING':
+        return 'Платёж ещё обрабатывается — попробуйте отменить билет позже'
+    return None
+
+
+def cancel_user_ticket(ticket_id, account_id):
+    """
+    Отмена билета пользователем: билет должен принадлежать пользователю (через
+    его платёж) и проходить правила user_cancel_error. Платёж блокируется на
+    время отмены, чтобы обработчик платежей не забрал его в работу.
+    """
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update(of=('self',)).filter(
+            ticket__id_ticket=ticket_id, user_id__account_id=account_id).first()
+        if payment is None:
+            raise CancellationError('Билет не найден')
+        ticket = Ticket.objects.select_related('flight_id').get(id_ticket=ticket_id)
+        error = user_cancel_error(ticket, ticket.flight_id, payment)
+        if error:
+            raise CancellationError(error)
+        return cancel_tickets([ticket_id], changed_by_account_id=account_id)
+
+
+def cancel_payment(payment_id, changed_by_account_id=None):
+    """Отмена всех билетов платежа и возврат платежа."""
+    if not Payment.objects.filter(id_payment=payment_id).exists():
+        raise CancellationError('Платёж не найден')
+    return _release(Ticket.objects.filter(payment_id=payment_id), changed_by_account_id)
+
+
+def cancel_flight(flight_id, changed_by_account_id=None, window_hours=DEFAULT_WINDOW_HOURS):
+    """
+    Отмена рейса SCHEDULED/DELAYED: статус CANCELLED, пассажиры пересаживаются
+    на рейсы того же маршрута (airline/rebooking.py), билеты, для которых места
+    не нашлось, возвращаются в продажу с возвратом платежей. Всё — в одной
+    транзакции. В сводке к результату _release добавляется rebooked — число
+    пересаженных билетов. Билеты платежей в обработке (PROCESSING) не
+    отменяются и перечисляются в tickets_held и payments_processing — их
+    отменяют повторно через cancel_payment, когда обработка закончится.
+    """
+    with transaction.atomic():
+        flight = Flight.objects.select_for_update().filter(id_flight=flight_id).first()
+        if flight is None:
+            raise CancellationError('Рейс не найден')
+        if flight.status not in CANCELLABLE_FLIGHT_STATUSES:
+            raise CancellationError('Отменить можно только запланированный или задержанный рейс')
+        Flight.objects.filter(id_flight=flight_id).update(status='CANCELLED')
+
+        rebooked = rebook_cancelled_flight(
+            flight_id, window_hours=window_hours, changed_by_account_id=changed_by_account_id)['moves']
+        remaining = Ticket.objects.filter(flight_id=flight_id)
+        if remaining.filter(status__in=RELEASABLE_STATUSES).exists():
+            report = _release(remaining, changed_by_account_id, hold_processing=True)
+        else:
+            # Всех пересадили — возвращать нечего
+            report = {
+                'tickets_released': 0, 'payments_refunded': [], 'payments_cancelled': [],
+                'refund_amount': Decimal('0'), 'released_by_flight': {},
+                'tickets_held': [], 'payments_processing': [],
+            }
+    report['rebooked'] = len(rebooked)
+    return report
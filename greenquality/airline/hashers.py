@@ -0,0 +1,46 @@
+"""
+Хешеры паролей с настраиваемой стоимостью.
+
+Имена алгоритмов совпадают со стандартными хешерами Django, поэтому
+сохранённые хеши проверяются как раньше. Если стоимость в настройках
+изменилась или выбран другой профиль (PASSWORD_HASHER_PROFILE), хеш
+пересчитывается при следующем успешном входе (см. verify_password).
+
+    pbkdf2 — PASSWORD_PBKDF2_ITERATIONS итераций PBKDF2-SHA256
+    scrypt — PASSWORD_SCRYPT_WORK_FACTOR (N), память ~ 128 * N * r байт
+    argon2 — PASSWORD_ARGON2_TIME_COST, PASSWORD_ARGON2_MEMORY_COST (КиБ);
+             нужен пакет argon2-cffi (pip install argon2-cffi)
+
+Замер скорости: python manage.py benchmark_password_hashers
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _setting(name, default):
+    return getattr(settings, name, None) or default
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = _setting('PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = _setting('PASSWORD_SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    time_cost = _setting('PASSWORD_ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = _setting('PASSWORD_ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
+
+
+def verify_password(account, password):
+    """
+    Проверяет пароль аккаунта. Если хеш создан другим алгоритмом или с другой
+    стоимостью, сохраняет новый хеш (без сигналов и полного save()).
+    """
+    def rehash(raw_password):
+        account.password = hashers.make_password(raw_password)
+        type(account).objects.filter(pk=account.pk).update(password=account.password)
+
+    return hashers.check_password(password, account.password, setter=rehash)
@@ -0,0 +1,114 @@
+"""
+Проверка планов горячих запросов проекта (python manage.py index_advisor).
+
+HOT_QUERIES — запросы, которые выполняются на каждой странице рейса, в
+профиле пользователя, при обработке платежей и в отчётах. Для каждого
+выполняется EXPLAIN (без выполнения самого запроса); последовательное
+чтение таблицы, в которой не меньше min_rows строк, считается находкой —
+для такого условия нужен индекс.
+
+PostgreSQL: план в формате JSON, число строк — pg_class.reltuples.
+SQLite (локальная разработка): строки плана SCAN <таблица>, число строк — COUNT(*).
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import AuditLog, Baggage, Payment, Ticket
+from .seat_layout import OCCUPIED_STATUSES
+
+
+DEFAULT_MIN_ROWS = 10000
+
+# (имя, где выполняется, фабрика запроса). Значения параметров — примерные:
+# EXPLAIN строит план без чтения данных
+HOT_QUERIES = [
+    ('tickets_by_flight_status', 'Схема мест и загрузка рейса',
+     lambda: Ticket.objects.filter(flight_id=1, status__in=OCCUPIED_STATUSES)),
+    ('tickets_by_payment', 'Билеты заказа (профиль, подтверждение покупки)',
+     lambda: Ticket.objects.filter(payment_id=1)),
+    ('payments_by_user', 'История покупок в профиле',
+     lambda: Payment.objects.filter(user_id=1).order_by('-payment_date')),
+    ('payments_pending', 'Обработка платежей (process_payments)',
+     lambda: Payment.objects.filter(status='PENDING').order_by('payment_date')),
+    ('payments_recent_completed', 'Статистика выручки за период',
+     lambda: Payment.objects.filter(status='COMPLETED',
+                                    payment_date__gte=timezone.now() - timedelta(days=30))),
+    ('audit_by_table', 'Просмотр журнала аудита по таблице',
+     lambda: AuditLog.objects.filter(table_name='Ticket').order_by('-changed_at')),
+    ('baggage_by_ticket', 'Багаж билета (отмена, регистрация)',
+     lambda: Baggage.objects.filter(ticket_id=1)),
+    ('baggage_by_tag', 'Поиск багажа по бирке',
+     lambda: Baggage.objects.filter(baggage_tag='GQ0000000000')),
+]
+
+
+def min_rows_default():
+    return getattr(settings, 'INDEX_ADVISOR_MIN_ROWS', DEFAULT_MIN_ROWS)
+
+
+def _pg_seq_scans(plan):
+    """Таблицы, читаемые узлами Seq Scan плана PostgreSQL (с секциями)."""
+    tables = []
+    if plan.get('Node Type') == 'Seq Scan':
+        tables.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        tables.extend(_pg_seq_scans(child))
+    return tables
+
+
+def _pg_row_estimates(tables):
+    with connection.cursor() as cur:
+        cur.execute("SELECT relname, GREATEST(reltuples, 0)::BIGINT FROM pg_class "
+                    "WHERE relname = ANY(%s) AND relkind = 'r'", [list(tables)])
+        return dict(cur.fetchall())
+
+
+def _sqlite_seq_scans(queryset):
+    """Строки плана 'SCAN <таблица>' без индекса; алиасы Django не использует."""
+    tables = []
+    for line in queryset.explain().splitlines():
+        detail = line.split('SCAN ', 1)
+        if len(detail) == 2 and 'USING' not in detail[1] and 'CONSTANT ROW' not in detail[1]:
+            tables.append(detail[1].split()[0].strip('"'))
+    return tables
+
+
+def _sqlite_row_counts(tables):
+    counts = {}
+    with connection.cursor() as cur:
+        for table in tables:
+            cur.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            counts[table] = cur.fetchone()[0]
+    return counts
+
+
+def explain_hot_queries(min_rows=None):
+    """
+    Проверяет планы HOT_QUERIES. Возвращает список
+    {name, description, seq_scans: [(таблица, строк)], flagged}, где flagged —
+    есть последовательное чтение таблицы не меньше min_rows строк.
+    """
+    min_rows = min_rows_default() if min_rows is None else min_rows
+    results = []
+    for name, description, make_queryset in HOT_QUERIES:
+        queryset = make_queryset()
+        if connection.vendor == 'postgresql':
+            plan = json.loads(queryset.explain(format='json'))
+            plan = (plan[0] if isinstance(plan, list) else plan)['Plan']
+            tables = _pg_seq_scans(plan)
+            rows = _pg_row_estimates(set(tables)) if tables else {}
+        else:
+            tables = _sqlite_seq_scans(queryset)
+            rows = _sqlite_row_counts(set(tables)) if tables else {}
+        seq_scans = [(table, rows.get(table, 0)) for table in tables]
+        results.append({
+            'name': name,
+            'description': description,
+            'seq_scans': seq_scans,
+            'flagged': any(count >= min_rows for _table, count in seq_scans),
+        })
+    return results
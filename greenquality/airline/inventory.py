@@ -0,0 +1,132 @@
+"""
+Учёт мест рейса (строк tickets со статусом AVAILABLE).
+
+Два режима (настройка TICKET_INVENTORY_MODE):
+  eager — при создании рейса триггер создаёт строку на каждое место
+          (свободные места — строки AVAILABLE);
+  lazy  — свободные места не хранятся: они выводятся из схемы салона
+          (airline/seat_layout.py), а строка билета создаётся только при
+          бронировании/продаже; двойную продажу места исключает
+          ограничение unique_flight_seat.
+
+Переход между режимами — команда ticket_inventory: переключает триггер
+(параметр БД greenquality.ticket_inventory) и удаляет или создаёт строки
+свободных мест у существующих рейсов.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce, Least, NullIf
+
+from .models import Class, Flight, Ticket
+from .seat_layout import DEFAULT_ROWS, DEFAULT_SEATS_ROW, SEAT_LETTERS, SeatLayout
+
+
+INVENTORY_MODES = ('eager', 'lazy')
+PRUNE_BATCH_SIZE = 10000
+
+
+def inventory_mode():
+    mode = getattr(settings, 'TICKET_INVENTORY_MODE', 'eager')
+    return mode if mode in INVENTORY_MODES else 'eager'
+
+
+def is_lazy():
+    return inventory_mode() == 'lazy'
+
+
+def set_database_mode(mode):
+    """Переключает триггер генерации мест (только PostgreSQL; для новых подключений и текущего)."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cur:
+        cur.execute(
+            "DO $$ BEGIN EXECUTE format("
+            "'ALTER DATABASE %%I SET greenquality.ticket_inventory = %%L', current_database(), %s); "
+            "END $$",
+            [mode],
+        )
+        cur.execute("SELECT set_config('greenquality.ticket_inventory', %s, false)", [mode])
+    return True
+
+
+def materialize_seats(flight_ids):
+    """
+    Создаёт недостающие строки AVAILABLE для рейсов одним INSERT ... SELECT
+    (функция materialize_flight_seats из scripts/triggers.sql). Возвращает
+    число созданных строк.
+    """
+    flight_ids = list(flight_ids)
+    if not flight_ids:
+        return 0
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cur:
+            cur.execute("SELECT materialize_flight_seats(%s::INTEGER[])", [flight_ids])
+            return cur.fetchone()[0]
+
+    # Другие СУБД (локальные тесты): та же раскладка через SeatLayout
+    classes = {c.class_name: c for c in Class.objects.all()}
+    economy = classes.get('ECONOMY')
+    if economy is None:
+        raise ValueError('Класс ECONOMY не найден в таблице class')
+    tickets = []
+    for flight in Flight.objects.select_related('airplane_id').filter(id_flight__in=flight_ids):
+        layout = SeatLayout.for_airplane(flight.airplane_id)
+        for seat in layout.seats():
+            class_obj = classes.get(layout.class_for_seat(seat), economy)
+            tickets.append(Ticket(
+                flight_id=flight, class_id=class_obj, seat_number=seat,
+                price=class_obj.base_price, status='AVAILABLE',
+                flight_departure=flight.departure_time,
+            ))
+    with transaction.atomic():
+        before = Ticket.objects.filter(flight_id__in=flight_ids).count()
+        Ticket.objects.bulk_create(tickets, batch_size=1000, ignore_conflicts=True)
+        return Ticket.objects.filter(flight_id__in=flight_ids).count() - before
+
+
+def prune_available_seats(flight_ids=None, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Удаляет строки свободных мест (AVAILABLE) пачками по batch_size, чтобы не
+    держать долгие блокировки на больших таблицах. Возвращает число удалённых строк.
+    """
+    qs = Ticket.objects.filter(status='AVAILABLE', passenger_id__isnull=True, payment_id__isnull=True)
+    if flight_ids is not None:
+        qs = qs.filter(flight_id__in=list(flight_ids))
+    deleted = 0
+    while True:
+        ids = list(qs.values_list('id_ticket', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += Ticket.objects.filter(id_ticket__in=ids).delete()[0]
+
+
+def total_seats():
+    """Число мест на всех рейсах по схемам салонов."""
+    per_row = Least(
+        Coalesce(NullIf('airplane_id__seats_row', 0), DEFAULT_SEATS_ROW),
+        Value(len(SEAT_LETTERS)),
+    )
+    rows = Coalesce(NullIf('airplane_id__rows', 0), DEFAULT_ROWS)
+    return Flight.objects.aggregate(
+        total=Sum(rows * per_row, output_field=IntegerField()))['total'] or 0
+
+
+def ticket_status_counts():
+    """
+    Количество билетов по статусам: [{'status': ..., 'count': ...}] по алфавиту.
+    В режиме lazy свободные места (AVAILABLE) считаются по схеме салона.
+    """
+    counts = dict(Ticket.objects.values_list('status').annotate(count=Count('id_ticket')))
+    if is_lazy():
+        materialized = sum(c for status, c in counts.items() if status != 'AVAILABLE')
+        counts['AVAILABLE'] = max(total_seats() - materialized, 0)
+    return [{'status': status, 'count': counts[status]} for status in sorted(counts) if counts[status]]
+
+
+def total_ticket_count():
+    """Всего билетов (мест), включая свободные — одинаково в обоих режимах."""
+    if is_lazy():
+        return sum(item['count'] for item in ticket_status_counts())
+    return Ticket.objects.count()
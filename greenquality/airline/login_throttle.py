@@ -0,0 +1,80 @@
+"""
+Ограничение попыток входа до проверки пароля.
+
+Проверка пароля (PBKDF2/scrypt/argon2) намеренно дорогая, поэтому перебор
+паролей нагружает процессор сервера. Перед check_password каждая попытка
+берёт токен из двух корзин: по IP-адресу клиента и по email. Корзина вмещает
+*_BURST токенов и пополняется на *_PER_MINUTE токенов в минуту; пустая
+корзина — отказ без обращения к БД и без хеширования.
+
+Состояние корзин хранится в кеше Django (CACHES): по умолчанию это память
+процесса, при нескольких процессах сервера — общий кеш (Redis, Memcached).
+Чтение и запись корзины не атомарны: при одновременных попытках лимит может
+быть превышен на несколько попыток, что для защиты от перебора допустимо.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+KEY_PREFIX = 'login-throttle'
+
+# Область -> (настройка ёмкости, настройка пополнения, значения по умолчанию)
+SCOPES = {
+    'ip': ('LOGIN_THROTTLE_IP_BURST', 'LOGIN_THROTTLE_IP_PER_MINUTE', 20, 10),
+    'email': ('LOGIN_THROTTLE_EMAIL_BURST', 'LOGIN_THROTTLE_EMAIL_PER_MINUTE', 5, 5),
+}
+
+
+def _limits(scope):
+    burst_name, rate_name, burst_default, rate_default = SCOPES[scope]
+    return getattr(settings, burst_name, burst_default), getattr(settings, rate_name, rate_default)
+
+
+def _cache_key(scope, value):
+    # Email может содержать символы, недопустимые в ключах Memcached
+    digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+    return f'{KEY_PREFIX}:{scope}:{digest}'
+
+
+def take_token(scope, value, now=None):
+    """
+    Берёт токен из корзины scope/value. Возвращает 0, если попытка разрешена,
+    иначе — через сколько секунд появится следующий токен.
+    """
+    burst, per_minute = _limits(scope)
+    if burst <= 0 or per_minute <= 0:
+        return 0
+    now = time.time() if now is None else now
+    key = _cache_key(scope, value)
+    tokens, updated_at = cache.get(key) or (burst, now)
+    tokens = min(burst, tokens + max(0, now - updated_at) * per_minute / 60)
+    if tokens < 1:
+        return (1 - tokens) * 60 / per_minute
+    # Полная корзина не отличается от отсутствующей — запись живёт, пока корзина не наполнится
+    cache.set(key, (tokens - 1, now), timeout=math.ceil(burst * 60 / per_minute))
+    return 0
+
+
+def client_ip(request):
+    # X-Forwarded-For не учитывается: его может подставить сам клиент
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def check_login_attempt(request, email):
+    """
+    Учитывает попытку входа по IP и email. Возвращает 0, если попытку можно
+    выполнить, иначе — сколько секунд (с округлением вверх) подождать.
+    """
+    wait = take_token('ip', client_ip(request))
+    if not wait:
+        wait = take_token('email', (email or '').strip().lower())
+    return math.ceil(wait)
+
+
+def reset_login_throttle(email):
+    """Сбрасывает корзину email после успешного входа."""
+    cache.delete(_cache_key('email', (email or '').strip().lower()))
@@ -0,0 +1,45 @@
+"""
+Перенос выполненных рейсов в архив (см. airline/archive.py).
+
+    python manage.py archive_flights --dry-run         # сколько рейсов будет перенесено
+    python manage.py archive_flights                   # старше ARCHIVE_AFTER_MONTHS месяцев
+    python manage.py archive_flights --months 6 --batch-size 100
+
+Рекомендуется запускать ночью по расписанию (cron / Планировщик заданий).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.archive import ARCHIVE_BATCH_SIZE, archive_completed_flights
+
+
+class Command(BaseCommand):
+    help = 'Переносит выполненные рейсы с билетами и багажом в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help='Возраст рейса в месяцах (по умолчанию ARCHIVE_AFTER_MONTHS)')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help='Рейсов в одной транзакции')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать рейсы, ничего не переносить')
+
+    def handle(self, *args, **options):
+        if options['months'] is not None and options['months'] < 1:
+            raise CommandError('--months должен быть не меньше 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+
+        summary = archive_completed_flights(
+            months=options['months'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        cutoff = summary['cutoff'].strftime('%d.%m.%Y')
+        if summary['dry_run']:
+            self.stdout.write(f"Рейсов, прилетевших до {cutoff}, к переносу: {summary['flights']}")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено в архив (прилёт до {cutoff}): рейсов {summary['flights']}, "
+            f"билетов {summary['tickets']}, багажа {summary['baggage']}, "
+            f"выручка {summary['revenue']} ₽, транзакций {summary['batches']}"
+        ))
@@ -0,0 +1,67 @@
+"""
+Замер скорости хешеров паролей (airline/hashers.py) с текущей стоимостью.
+
+Хеширует пароль в одном потоке заданное время и выводит число хешей в
+секунду на одно ядро — столько проверок пароля при входе выдерживает один
+процесс сервера. По нему подбирают стоимость (PASSWORD_PBKDF2_ITERATIONS и
+др.) и пределы LOGIN_THROTTLE_*.
+
+    python manage.py benchmark_password_hashers                  # все профили
+    python manage.py benchmark_password_hashers --profile scrypt --seconds 5
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def _cost(hasher):
+    if hasattr(hasher, 'iterations'):
+        return f'iterations={hasher.iterations}'
+    if hasattr(hasher, 'work_factor'):
+        return f'N={hasher.work_factor}, r={hasher.block_size}, p={hasher.parallelism}'
+    return f'time_cost={hasher.time_cost}, memory_cost={hasher.memory_cost} КиБ, parallelism={hasher.parallelism}'
+
+
+class Command(BaseCommand):
+    help = 'Замеряет число хешей паролей в секунду на ядро для профилей хеширования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(settings.PASSWORD_HASHER_PROFILES), action='append',
+                            help='Профиль хеширования (можно несколько; по умолчанию все)')
+        parser.add_argument('--seconds', type=float, default=2.0, help='Время замера одного профиля')
+
+    def handle(self, *args, **options):
+        if options['seconds'] <= 0:
+            raise CommandError('--seconds должен быть больше 0')
+        profiles = options['profile'] or list(settings.PASSWORD_HASHER_PROFILES)
+
+        self.stdout.write(f"Текущий профиль: {settings.PASSWORD_HASHER_PROFILE}, ядер: {os.cpu_count()}")
+        for profile in profiles:
+            hasher = import_string(settings.PASSWORD_HASHER_PROFILES[profile])()
+            try:
+                rate = self._measure(hasher, options['seconds'])
+            except ValueError as e:
+                # Нет библиотеки алгоритма (argon2-cffi)
+                self.stdout.write(self.style.WARNING(f"  {profile:8} недоступен: {e}"))
+                continue
+            self.stdout.write(
+                f"  {profile:8} {rate:8.1f} хешей/с на ядро  ({1000 / rate:.1f} мс на хеш; {_cost(hasher)})"
+            )
+
+    def _measure(self, hasher, seconds):
+        salt = hasher.salt()
+        hasher.encode(BENCHMARK_PASSWORD, salt)  # прогрев и проверка доступности алгоритма
+        count = 0
+        started = time.perf_counter()
+        while True:
+            hasher.encode(BENCHMARK_PASSWORD, salt)
+            count += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds:
+                return count / elapsed
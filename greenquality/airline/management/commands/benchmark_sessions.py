@@ -0,0 +1,94 @@
+"""
+Замер обращений к хранилищу сессий при просмотре страниц вошедшим пользователем.
+
+Для каждого варианта SESSION_ENGINE входит временным пользователем и
+открывает страницы сайта N раз, считая запросы к django_session (чтение и
+запись) и повторные выдачи cookie сессии. Всё выполняется в транзакции,
+которая откатывается, — данные не меняются.
+
+    python manage.py benchmark_sessions                      # db, cached_db, signed_cookies
+    python manage.py benchmark_sessions --views 200 --profile cached_db
+"""
+import re
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from airline.models import Account, Role
+
+
+PAGES = ('index', 'flights', 'about', 'contacts')
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+_WRITE_SQL = re.compile(r'^\s*(INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Замеряет чтение и запись сессий при просмотре страниц (транзакция откатывается)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', type=int, default=100, help='Сколько страниц открыть')
+        parser.add_argument('--profile', choices=sorted(settings.SESSION_ENGINES), action='append',
+                            help='Вариант хранилища сессий (можно несколько; по умолчанию все)')
+
+    def handle(self, *args, **options):
+        if options['views'] < 1:
+            raise CommandError('--views должен быть не меньше 1')
+        profiles = options['profile'] or list(settings.SESSION_ENGINES)
+
+        self.stdout.write(f"Просмотров страниц: {options['views']} ({', '.join(PAGES)})")
+        for profile in profiles:
+            result = self._measure(profile, options['views'])
+            self.stdout.write(
+                f"  {profile:15} чтений django_session: {result['reads']:5}  "
+                f"записей: {result['writes']:5}  выдач cookie: {result['cookies']:5}  "
+                f"время: {result['elapsed']:.2f} с"
+            )
+        self.stdout.write('  Транзакция откатена, данные не изменены')
+
+    def _measure(self, profile, views):
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != '*' and not h.startswith('.')), 'localhost')
+        result = {}
+        try:
+            with transaction.atomic(), override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[profile]):
+                role, _ = Role.objects.get_or_create(role_name='USER')
+                account = Account.objects.create(
+                    email=f'session-benchmark-{profile}@greenquality.local',
+                    password=make_password(BENCHMARK_PASSWORD), role_id=role,
+                )
+                client = Client(HTTP_HOST=host)
+                client.post(reverse('login'), {'email': account.email, 'password': BENCHMARK_PASSWORD})
+                if 'account_id' not in client.session:
+                    raise CommandError('Не удалось войти временным пользователем')
+
+                cookies = 0
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    for i in range(views):
+                        response = client.get(reverse(PAGES[i % len(PAGES)]))
+                        cookies += settings.SESSION_COOKIE_NAME in response.cookies
+                elapsed = time.perf_counter() - started
+
+                session_sql = [q['sql'] for q in queries.captured_queries if 'django_session' in q['sql']]
+                writes = sum(1 for sql in session_sql if _WRITE_SQL.match(sql))
+                result = {
+                    'reads': len(session_sql) - writes,
+                    'writes': writes,
+                    'cookies': cookies,
+                    'elapsed': elapsed,
+                }
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result
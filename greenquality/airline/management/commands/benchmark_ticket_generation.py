@@ -0,0 +1,129 @@
+"""
+Замер генерации билетов триггером generate_tickets_for_flight (только PostgreSQL).
+
+Создаёт N рейсов одним INSERT в транзакции, считает записанные строки
+(tickets, audit_log) и откатывает транзакцию — данные не меняются.
+
+    python manage.py benchmark_ticket_generation                 # 1000 рейсов
+    python manage.py benchmark_ticket_generation --flights 200 --airplane 4
+    python manage.py benchmark_ticket_generation --legacy        # для сравнения: построчная версия
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+# Прежняя реализация: INSERT на каждое место, каждый INSERT пишет строку аудита.
+# Подменяется только внутри транзакции замера.
+LEGACY_SQL = """
+CREATE OR REPLACE FUNCTION generate_tickets_for_flight_legacy()
+RETURNS TRIGGER AS $$
+DECLARE
+    a_rows INT;
+    a_seats_row INT;
+    r INT;
+    s INT;
+    seat_letters TEXT[] := ARRAY['A','B','C','D','E','F','G','H'];
+    economy_class_id INT;
+BEGIN
+    SELECT COALESCE(rows, 30), COALESCE(seats_row, 6)
+    INTO a_rows, a_seats_row
+    FROM airplanes WHERE id_airplane = NEW.airplane_id;
+
+    SELECT id_class INTO economy_class_id FROM class WHERE class_name = 'ECONOMY' LIMIT 1;
+
+    FOR r IN 1..a_rows LOOP
+        FOR s IN 1..a_seats_row LOOP
+            INSERT INTO tickets (flight_id, class_id, seat_number, price, status, passenger_id, payment_id,
+                                 flight_departure)
+            VALUES (NEW.id_flight, economy_class_id, r::TEXT || seat_letters[s], 0, 'AVAILABLE', NULL, NULL,
+                    NEW.departure_time);
+        END LOOP;
+    END LOOP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tr_generate_tickets_after_flight_insert ON flights;
+CREATE TRIGGER tr_generate_tickets_after_flight_insert
+    AFTER INSERT ON flights
+    FOR EACH ROW EXECUTE FUNCTION generate_tickets_for_flight_legacy();
+
+DROP TRIGGER IF EXISTS audit_tickets_insert ON tickets;
+CREATE TRIGGER audit_tickets_insert
+    AFTER INSERT ON tickets
+    FOR EACH ROW EXECUTE FUNCTION audit_trigger_insert();
+"""
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Замеряет создание рейсов с генерацией билетов триггером (транзакция откатывается)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flights', type=int, default=1000, help='Сколько рейсов создать')
+        parser.add_argument('--airplane', type=int, default=None,
+                            help='id самолёта (по умолчанию — самый вместительный)')
+        parser.add_argument('--legacy', action='store_true',
+                            help='Замерить прежнюю построчную генерацию (INSERT на каждое место)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Замер выполняется только на PostgreSQL (триггеры из scripts/triggers.sql)')
+
+        count = options['flights']
+        result = {}
+        try:
+            with transaction.atomic(), connection.cursor() as cur:
+                if options['airplane']:
+                    cur.execute("SELECT id_airplane FROM airplanes WHERE id_airplane = %s",
+                                [options['airplane']])
+                else:
+                    cur.execute("SELECT id_airplane FROM airplanes "
+                                "ORDER BY COALESCE(rows, 30) * COALESCE(seats_row, 6) DESC LIMIT 1")
+                row = cur.fetchone()
+                cur.execute("SELECT id_airport FROM airports ORDER BY id_airport LIMIT 2")
+                airports = [r[0] for r in cur.fetchall()]
+                if not row or len(airports) < 2:
+                    raise CommandError('Нужны самолёт и два аэропорта')
+                airplane_id = row[0]
+
+                if options['legacy']:
+                    cur.execute(LEGACY_SQL)
+
+                cur.execute("SELECT (SELECT COUNT(*) FROM tickets), (SELECT COUNT(*) FROM audit_log)")
+                tickets_before, audit_before = cur.fetchone()
+
+                started = time.perf_counter()
+                cur.execute("""
+                    INSERT INTO flights (airplane_id, departure_airport_id, arrival_airport_id,
+                                         departure_time, arrival_time, status)
+                    SELECT %s, %s, %s,
+                           NOW() + INTERVAL '3650 days' + g * INTERVAL '1 hour',
+                           NOW() + INTERVAL '3650 days' + g * INTERVAL '1 hour' + INTERVAL '2 hours',
+                           'SCHEDULED'
+                    FROM generate_series(1, %s) AS g
+                """, [airplane_id, airports[0], airports[1], count])
+                elapsed = time.perf_counter() - started
+
+                cur.execute("SELECT (SELECT COUNT(*) FROM tickets), (SELECT COUNT(*) FROM audit_log)")
+                tickets_after, audit_after = cur.fetchone()
+                result = {
+                    'elapsed': elapsed,
+                    'tickets': tickets_after - tickets_before,
+                    'audit': audit_after - audit_before,
+                }
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        mode = 'построчная (legacy)' if options['legacy'] else 'INSERT ... SELECT'
+        self.stdout.write(f"Генерация: {mode}, рейсов: {count}")
+        self.stdout.write(f"  Время: {result['elapsed']:.2f} с ({result['elapsed'] / count * 1000:.2f} мс на рейс)")
+        self.stdout.write(f"  Билетов создано: {result['tickets']} ({result['tickets'] // count} на рейс)")
+        self.stdout.write(f"  Записей аудита: {result['audit']} ({result['audit'] / count:.1f} на рейс)")
+        self.stdout.write('  Транзакция откатена, данные не изменены')
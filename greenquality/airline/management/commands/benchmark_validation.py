@@ -0,0 +1,71 @@
+"""
+Замер проверки строк по правилам форм панелей (airline/validation.py).
+
+Проверяет N строк (пассажиры, пользователи, билеты; часть строк с ошибками)
+с планом проверки, построенным один раз, и для сравнения — со сборкой плана
+на каждую строку (как раньше, когда правила выводились из полей модели при
+каждом вызове). К БД не обращается.
+
+    python manage.py benchmark_validation                  # 100000 строк
+    python manage.py benchmark_validation --rows 500000
+"""
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.models import Passenger, Ticket, User
+from airline.validation import compile_validation_plan, validate_crud_data, validation_plan
+
+
+# Образцы строк: правильная и с ошибками (паспорт, телефон, цена, статус)
+SAMPLE_ROWS = (
+    (Passenger, {'first_name': 'Иван', 'last_name': 'Петров', 'passport_number': '4500 123456',
+                 'birthday': date(1990, 1, 1)}),
+    (Passenger, {'first_name': 'Анна', 'last_name': 'Сидорова', 'passport_number': 'AB-123',
+                 'birthday': date(1991, 2, 3)}),
+    (User, {'account_id': 1, 'first_name': 'Пётр', 'last_name': 'Иванов', 'phone': '+79990001122',
+            'passport_number': '4600 654321'}),
+    (User, {'account_id': 2, 'first_name': 'Ольга', 'last_name': 'Смирнова', 'phone': '8 (999) 000-11-22'}),
+    (Ticket, {'flight_id': 1, 'class_id': 1, 'seat_number': '12A', 'price': Decimal('5400.00'),
+              'status': 'PAID', 'passenger_id': 1, 'payment_id': 1}),
+    (Ticket, {'flight_id': 1, 'class_id': 1, 'seat_number': '12B', 'price': '-10', 'status': 'LOST'}),
+)
+
+
+def _uncached_validate(model, data, action):
+    """Проверка со сборкой плана на каждый вызов (для сравнения)."""
+    errors = []
+    for name, required, checks in compile_validation_plan(model):
+        value = data.get(name)
+        if value is None or value == '' or (isinstance(value, str) and not value.strip()):
+            if required and action == 'create':
+                errors.append(required)
+            continue
+        errors.extend(error for check in checks if (error := check(value)))
+    return errors
+
+
+class Command(BaseCommand):
+    help = 'Замеряет проверку строк по правилам форм панелей: план проверки из кеша и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Сколько строк проверить')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        if rows < 1:
+            raise CommandError('--rows должен быть не меньше 1')
+        batch = [SAMPLE_ROWS[i % len(SAMPLE_ROWS)] for i in range(rows)]
+        validation_plan.cache_clear()
+
+        self.stdout.write(f'Строк: {rows}')
+        for title, validate in (('план из кеша', validate_crud_data),
+                                ('план на каждую строку', _uncached_validate)):
+            started = time.perf_counter()
+            invalid = sum(1 for model, data in batch if validate(model, data, 'create'))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  {title:22} {elapsed:7.3f} с  ({rows / elapsed:10.0f} строк/с; с ошибками: {invalid})'
+            )
@@ -0,0 +1,49 @@
+"""
+Создание рейсов по регулярному расписанию (см. airline/schedules.py).
+
+    python manage.py generate_schedule_flights 3 --dry-run
+    python manage.py generate_schedule_flights 3 --skip-conflicts
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.models import FlightSchedule
+from airline.schedules import ScheduleError, generate_schedule_flights
+
+
+class Command(BaseCommand):
+    help = 'Создаёт рейсы по расписанию на весь период его действия'
+
+    def add_arguments(self, parser):
+        parser.add_argument('schedule_id', type=int, help='id расписания (flight_schedules)')
+        parser.add_argument(
+            '--skip-conflicts', action='store_true',
+            help='Пропускать вылеты, пересекающиеся с рейсами того же самолёта')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только проверить расписание и пересечения, рейсы не создавать')
+
+    def handle(self, *args, **options):
+        try:
+            schedule = FlightSchedule.objects.get(pk=options['schedule_id'])
+            report = generate_schedule_flights(
+                schedule,
+                skip_conflicts=options['skip_conflicts'],
+                dry_run=options['dry_run'],
+            )
+        except FlightSchedule.DoesNotExist:
+            raise CommandError(f"Расписание {options['schedule_id']} не найдено")
+        except ScheduleError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Расписание {schedule.id_schedule}: вылетов в периоде {report['slots']}")
+        for departure, _arrival in report['conflicts']:
+            self.stdout.write(self.style.WARNING(f"  Самолёт занят: вылет {departure}"))
+        if report['dry_run']:
+            self.stdout.write('Пробный запуск: рейсы не созданы')
+        elif report['conflicts'] and not options['skip_conflicts']:
+            raise CommandError(
+                f"Пересечений: {len(report['conflicts'])}. Рейсы не созданы "
+                f"(--skip-conflicts — создать остальные)")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Создано рейсов: {len(report['created'])}, мест: {report['seats']}"))
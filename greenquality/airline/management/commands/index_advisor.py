@@ -0,0 +1,42 @@
+"""
+Проверка планов горячих запросов (см. airline/index_advisor.py).
+
+    python manage.py index_advisor                  # порог INDEX_ADVISOR_MIN_ROWS строк
+    python manage.py index_advisor --min-rows 1000
+    python manage.py index_advisor --strict         # код ошибки при находках (для CI)
+
+На PostgreSQL перед проверкой стоит выполнить ANALYZE: оценка числа строк
+берётся из статистики pg_class.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.index_advisor import explain_hot_queries, min_rows_default
+
+
+class Command(BaseCommand):
+    help = 'Выполняет EXPLAIN горячих запросов и находит последовательное чтение больших таблиц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=None,
+                            help='Порог числа строк таблицы (по умолчанию INDEX_ADVISOR_MIN_ROWS)')
+        parser.add_argument('--strict', action='store_true',
+                            help='Завершиться с ошибкой, если есть находки')
+
+    def handle(self, *args, **options):
+        min_rows = options['min_rows'] if options['min_rows'] is not None else min_rows_default()
+        results = explain_hot_queries(min_rows)
+
+        for result in results:
+            scans = ', '.join(f"{table} (~{rows} строк)" for table, rows in result['seq_scans'])
+            line = f"{result['name']:28} {result['description']}"
+            if result['flagged']:
+                self.stdout.write(self.style.WARNING(f"{line}\n    Seq Scan: {scans}"))
+            elif scans:
+                self.stdout.write(f"{line}\n    Seq Scan ниже порога: {scans}")
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+
+        flagged = [r['name'] for r in results if r['flagged']]
+        self.stdout.write(f"Запросов: {len(results)}, последовательное чтение от {min_rows} строк: {len(flagged)}")
+        if flagged and options['strict']:
+            raise CommandError(f"Нужны индексы для: {', '.join(flagged)}")
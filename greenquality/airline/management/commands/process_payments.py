@@ -0,0 +1,45 @@
+"""
+Обработчик платежей PENDING (см. airline/payments.py).
+
+    python manage.py process_payments              # одна пачка
+    python manage.py process_payments --loop       # постоянно, с паузой между пустыми проходами
+    python manage.py process_payments --loop --workers 8 --batch-size 100
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from airline.payments import process_pending_payments
+
+
+class Command(BaseCommand):
+    help = 'Отправляет ожидающие платежи в платёжный шлюз и пакетно обновляет их статусы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Платежей в одной пачке (по умолчанию PAYMENT_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Потоков для вызовов шлюза (по умолчанию PAYMENT_WORKERS)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно, пока не прервут (Ctrl+C)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза в секундах, когда ожидающих платежей нет')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                report = process_pending_payments(
+                    batch_size=options['batch_size'], workers=options['workers'])
+                if report['processed']:
+                    self.stdout.write(
+                        f"Обработано платежей: {report['processed']} "
+                        f"(оплачено: {len(report['completed'])}, отказ: {len(report['failed'])})"
+                    )
+                if not options['loop']:
+                    if not report['processed']:
+                        self.stdout.write('Ожидающих платежей нет')
+                    break
+                if not report['processed']:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Обработчик остановлен')
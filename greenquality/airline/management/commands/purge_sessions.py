@@ -0,0 +1,75 @@
+"""
+Удаление истёкших сессий пачками (см. airline/session_cleanup.py).
+
+    python manage.py purge_sessions                     # один проход
+    python manage.py purge_sessions --vacuum            # и VACUUM (ANALYZE) таблицы (PostgreSQL)
+    python manage.py purge_sessions --loop              # постоянно, раз в SESSION_PURGE_INTERVAL секунд
+    python manage.py purge_sessions --batch-size 500 --max-batches 20
+
+Вместо --loop можно запускать один проход по расписанию (cron / Планировщик заданий).
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.session_cleanup import (
+    batch_size_default, purge_expired_sessions, session_table_stats, vacuum_session_table,
+)
+
+
+def _size(stats):
+    if stats['expired'] is None:
+        # PostgreSQL: оценка из статистики, без COUNT(*) по таблице
+        size = f"строк ~{stats['rows'] if stats['rows'] is not None else '?'}"
+    else:
+        size = f"строк {stats['rows']} (истёкших {stats['expired']})"
+    if stats['bytes'] is not None:
+        size += f", {stats['bytes'] / 1024 / 1024:.1f} МБ"
+    return size
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истёкшие сессии из django_session короткими транзакциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Сессий в одной транзакции (по умолчанию SESSION_PURGE_BATCH_SIZE)')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Не больше стольких пачек за проход')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='После удаления выполнить VACUUM (ANALYZE) django_session (PostgreSQL)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно, пока не прервут (Ctrl+C)')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Пауза между проходами в секундах (по умолчанию SESSION_PURGE_INTERVAL)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or batch_size_default()
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+        if options['max_batches'] is not None and options['max_batches'] < 1:
+            raise CommandError('--max-batches должен быть не меньше 1')
+        interval = options['interval'] if options['interval'] is not None else settings.SESSION_PURGE_INTERVAL
+
+        try:
+            while True:
+                self._purge(batch_size, options['max_batches'], options['vacuum'])
+                if not options['loop']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Очистка сессий остановлена')
+
+    def _purge(self, batch_size, max_batches, vacuum):
+        before = session_table_stats()
+        started = time.perf_counter()
+        summary = purge_expired_sessions(batch_size=batch_size, max_batches=max_batches)
+        elapsed = time.perf_counter() - started
+        if vacuum and summary['purged']:
+            vacuum_session_table()
+        after = session_table_stats()
+        self.stdout.write(
+            f"Удалено сессий: {summary['purged']} (транзакций {summary['batches']}, {elapsed:.2f} с); "
+            f"django_session: было {_size(before)}, стало {_size(after)}"
+        )
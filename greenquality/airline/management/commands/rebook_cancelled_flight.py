@@ -0,0 +1,46 @@
+"""
+Пересадка пассажиров отменённого рейса на рейсы того же маршрута.
+
+    python manage.py rebook_cancelled_flight 9 --dry-run
+    python manage.py rebook_cancelled_flight 9 --window-hours 72
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.rebooking import DEFAULT_WINDOW_HOURS, RebookingError, rebook_cancelled_flight
+
+
+class Command(BaseCommand):
+    help = 'Пересаживает пассажиров (PAID/BOOKED) отменённого рейса на альтернативные рейсы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('flight_id', type=int, help='id отменённого рейса')
+        parser.add_argument(
+            '--window-hours', type=int, default=DEFAULT_WINDOW_HOURS,
+            help='Окно поиска альтернативных рейсов, ± часов от исходного вылета')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать план пересадки, ничего не менять')
+
+    def handle(self, *args, **options):
+        try:
+            report = rebook_cancelled_flight(
+                options['flight_id'],
+                window_hours=options['window_hours'],
+                dry_run=options['dry_run'],
+            )
+        except RebookingError as e:
+            raise CommandError(str(e))
+
+        title = 'План пересадки' if report['dry_run'] else 'Пересадка выполнена'
+        self.stdout.write(f"{title}: рейс GQ{report['flight_id']:03d}")
+        self.stdout.write(f"  Рассмотрено рейсов: {len(report['candidates'])}")
+        for move in report['moves']:
+            self.stdout.write(
+                f"  Билет {move['ticket_id']} ({move['class_name']}): "
+                f"{move['from_seat']} -> GQ{move['to_flight_id']:03d} / {move['to_seat']}"
+            )
+        self.stdout.write(f"  Пересажено: {len(report['moves'])}, без места: {len(report['unplaced'])}")
+        for item in report['unplaced']:
+            self.stdout.write(self.style.WARNING(
+                f"  Нет места: билет {item['ticket_id']} ({item['class_name']}, {item['seat_number']})"
+            ))
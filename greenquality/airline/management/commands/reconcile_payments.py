@@ -0,0 +1,46 @@
+"""
+Сверка платежей с файлом расчётов платёжного шлюза (см. airline/reconciliation.py).
+
+    python manage.py reconcile_payments settlement_2026-10-18.csv
+    python manage.py reconcile_payments settlement.csv --report discrepancies.csv --dry-run
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.reconciliation import reconcile_settlement
+
+
+class Command(BaseCommand):
+    help = 'Сверяет платежи с CSV-файлом расчётов шлюза и пакетно обновляет их статусы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('settlement_file', help='CSV: payment_id,amount,status,reference')
+        parser.add_argument(
+            '--report', default=None,
+            help='Куда записать отчёт о расхождениях (по умолчанию <файл>.discrepancies.csv)')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только сверить и записать отчёт, статусы не менять')
+
+    def handle(self, *args, **options):
+        path = options['settlement_file']
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл не найден: {path}')
+        report_path = options['report'] or f"{os.path.splitext(path)[0]}.discrepancies.csv"
+
+        summary = reconcile_settlement(path, report_path, apply=not options['dry_run'])
+
+        self.stdout.write(f"Строк в файле расчётов: {summary['lines']}")
+        for result, count in sorted(summary['results'].items()):
+            self.stdout.write(f"  {result}: {count}")
+        if summary['applied']:
+            self.stdout.write(
+                f"Обновлено платежей: {summary['payments_updated']}, "
+                f"билетов оплачено: {summary['tickets_paid']}, "
+                f"мест возвращено в продажу: {summary['tickets_released']}"
+            )
+        else:
+            self.stdout.write('Пробный запуск: статусы не изменены')
+        style = self.style.WARNING if summary['discrepancies'] else self.style.SUCCESS
+        self.stdout.write(style(f"Расхождений: {summary['discrepancies']} (отчёт: {report_path})"))
@@ -0,0 +1,49 @@
+"""
+Переключение учёта свободных мест (см. airline/inventory.py).
+
+    python manage.py ticket_inventory lazy              # удалить строки AVAILABLE, триггер не создаёт места
+    python manage.py ticket_inventory eager             # создать недостающие места у будущих рейсов
+    python manage.py ticket_inventory eager --all-flights
+
+Режим приложения задаётся отдельно — TICKET_INVENTORY_MODE в .env.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airline.inventory import (
+    INVENTORY_MODES, PRUNE_BATCH_SIZE, materialize_seats, prune_available_seats, set_database_mode,
+)
+from airline.models import Flight
+
+
+class Command(BaseCommand):
+    help = 'Переводит учёт свободных мест в режим eager или lazy и переносит существующие рейсы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', choices=INVENTORY_MODES)
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE,
+                            help='Строк AVAILABLE, удаляемых за одну транзакцию (режим lazy)')
+        parser.add_argument('--all-flights', action='store_true',
+                            help='Режим eager: создать места и у прошедших рейсов')
+
+    def handle(self, *args, **options):
+        mode = options['mode']
+        if set_database_mode(mode):
+            self.stdout.write(f"Триггер генерации мест переключён в режим {mode}")
+        else:
+            self.stdout.write(self.style.WARNING('Не PostgreSQL: триггер не переключался'))
+
+        if mode == 'lazy':
+            deleted = prune_available_seats(batch_size=options['batch_size'])
+            self.stdout.write(f"Удалено строк свободных мест: {deleted}")
+        else:
+            flights = Flight.objects.exclude(status='CANCELLED')
+            if not options['all_flights']:
+                flights = flights.filter(departure_time__gte=timezone.now())
+            created = materialize_seats(flights.values_list('id_flight', flat=True))
+            self.stdout.write(f"Создано строк свободных мест: {created}")
+
+        if getattr(settings, 'TICKET_INVENTORY_MODE', 'eager') != mode:
+            self.stdout.write(self.style.WARNING(
+                f"Укажите TICKET_INVENTORY_MODE={mode} в .env и перезапустите приложение"))
@@ -0,0 +1,33 @@
+"""
+Создание секций tickets/baggage заранее (см. airline/partitions.py).
+
+    python manage.py ticket_partitions              # на TICKET_PARTITION_MONTHS_AHEAD месяцев вперёд
+    python manage.py ticket_partitions --months 24
+    python manage.py ticket_partitions --list       # показать секции и оценку числа строк
+
+Рекомендуется запускать раз в месяц по расписанию (cron / Планировщик заданий).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from airline.partitions import ensure_partitions, is_partitioned, list_partitions, months_ahead
+
+
+class Command(BaseCommand):
+    help = 'Создаёт секции tickets и baggage по месяцам вылета на несколько месяцев вперёд'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help='На сколько месяцев вперёд (по умолчанию TICKET_PARTITION_MONTHS_AHEAD)')
+        parser.add_argument('--list', action='store_true', help='Вывести список секций')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('Таблица tickets не секционирована (нужен PostgreSQL и миграция 0008)')
+
+        months = options['months'] or months_ahead()
+        created = ensure_partitions(months)
+        self.stdout.write(self.style.SUCCESS(f"Создано секций: {created} (на {months} мес. вперёд)"))
+
+        if options['list']:
+            for parent, name, bounds, rows in list_partitions():
+                self.stdout.write(f"  {parent:8} {name:20} {bounds}  ~{rows} строк")
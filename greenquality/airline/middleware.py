@@ -1,8 +1,11 @@
 """
-Middleware для подмены любой страницы 404 на нашу шаблонную (даже при DEBUG=True).
+Middleware проекта: подмена любой страницы 404 на нашу шаблонную (даже при
+DEBUG=True) и определение принципала запроса.
 """
 from django.shortcuts import render
 
+from .principal import resolve_principal
+
 
 class Custom404Middleware:
     """
@@ -18,3 +21,17 @@ class Custom404Middleware:
         if response.status_code == 404:
             return render(request, '404.html', status=404)
         return response
+
+
+class PrincipalMiddleware:
+    """
+    Кладёт в request.principal аккаунт, роль и пользователя из сессии
+    (Principal или None) — один раз за запрос, см. airline/principal.py.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = resolve_principal(request.session.get('account_id'))
+        return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0004_ticket_available_passenger_nullable'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Ожидает'), ('COMPLETED', 'Завершен'), ('FAILED', 'Ошибка'), ('REFUNDED', 'Возвращен')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# Тарифы, которые раньше были зашиты в buy_ticket_confirm
+DEFAULT_FARES = {
+    'ECONOMY': Decimal('5000.00'),
+    'BUSINESS': Decimal('15000.00'),
+    'FIRST': Decimal('30000.00'),
+}
+
+
+def set_default_fares(apps, schema_editor):
+    Class = apps.get_model('airline', 'Class')
+    for class_name, price in DEFAULT_FARES.items():
+        Class.objects.filter(class_name=class_name, base_price=0).update(base_price=price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0005_payment_refunded_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='base_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.RunPython(set_default_fares, migrations.RunPython.noop),
+    ]
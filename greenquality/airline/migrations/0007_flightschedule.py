@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0006_class_base_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightSchedule',
+            fields=[
+                ('id_schedule', models.AutoField(primary_key=True, serialize=False)),
+                ('days_of_week', models.CharField(max_length=7)),
+                ('departure_at', models.TimeField()),
+                ('flight_minutes', models.PositiveIntegerField()),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField()),
+                ('airplane_id', models.ForeignKey(db_column='airplane_id', on_delete=django.db.models.deletion.CASCADE, to='airline.airplane')),
+                ('arrival_airport_id', models.ForeignKey(db_column='arrival_airport_id', on_delete=django.db.models.deletion.CASCADE, related_name='arrival_schedules', to='airline.airport')),
+                ('departure_airport_id', models.ForeignKey(db_column='departure_airport_id', on_delete=django.db.models.deletion.CASCADE, related_name='departure_schedules', to='airline.airport')),
+            ],
+            options={
+                'verbose_name': 'Расписание',
+                'verbose_name_plural': 'Расписания',
+                'db_table': 'flight_schedules',
+                'constraints': [models.CheckConstraint(condition=models.Q(('valid_from__lte', models.F('valid_to'))), name='check_schedule_period')],
+            },
+        ),
+    ]
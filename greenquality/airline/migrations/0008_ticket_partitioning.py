@@ -0,0 +1,204 @@
+"""
+Секционирование tickets и baggage по месяцу вылета рейса.
+
+На всех СУБД добавляется и заполняется ключ секции flight_departure.
+На PostgreSQL таблицы пересоздаются секционированными (как в
+scripts/create_tables.sql): данные копируются в секции месяцев существующих
+рейсов, секции создаются и на TICKET_PARTITION_MONTHS_AHEAD месяцев вперёд,
+функции и представления из scripts/ переустанавливаются (удалённые вместе со
+старыми таблицами).
+
+На PostgreSQL миграция необратима (см. unpartition_tables); на других СУБД
+откатывается: ключ секции просто удаляется.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.models import OuterRef, Subquery
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[3] / 'scripts'
+
+# Старые таблицы переименовываются (вместе с последовательностями id),
+# новые создаются секционированными. Внешние ключи на tickets есть только у baggage
+CREATE_PARTITIONED_SQL = """
+DO $$
+DECLARE
+    seq TEXT;
+    idx RECORD;
+BEGIN
+    seq := pg_get_serial_sequence('tickets', 'id_ticket');
+    ALTER TABLE baggage RENAME TO baggage_unpartitioned;
+    ALTER TABLE tickets RENAME TO tickets_unpartitioned;
+    EXECUTE format('ALTER SEQUENCE %s RENAME TO tickets_unpartitioned_id_ticket_seq', seq);
+    seq := pg_get_serial_sequence('baggage_unpartitioned', 'id_baggage');
+    EXECUTE format('ALTER SEQUENCE %s RENAME TO baggage_unpartitioned_id_baggage_seq', seq);
+
+    -- Имена индексов (в том числе первичных ключей и unique_flight_seat) нужны новым таблицам
+    FOR idx IN
+        SELECT indexrelid::regclass AS name, indexrelid AS oid FROM pg_index
+        WHERE indrelid IN ('tickets_unpartitioned'::regclass, 'baggage_unpartitioned'::regclass)
+    LOOP
+        EXECUTE format('ALTER INDEX %s RENAME TO %I', idx.name, 'unpartitioned_idx_' || idx.oid);
+    END LOOP;
+END $$;
+
+CREATE SEQUENCE tickets_id_ticket_seq;
+CREATE TABLE tickets (
+    id_ticket INTEGER NOT NULL DEFAULT nextval('tickets_id_ticket_seq'),
+    flight_id INTEGER NOT NULL REFERENCES flights(id_flight) ON DELETE CASCADE,
+    class_id INTEGER NOT NULL REFERENCES class(id_class) ON DELETE CASCADE,
+    seat_number VARCHAR(5) NOT NULL,
+    price NUMERIC(8, 2) NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'AVAILABLE',
+    passenger_id INTEGER REFERENCES passengers(id_passenger) ON DELETE CASCADE,
+    payment_id INTEGER REFERENCES payments(id_payment) ON DELETE SET NULL,
+    flight_departure TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id_ticket, flight_departure),
+    CONSTRAINT unique_flight_seat UNIQUE (flight_id, seat_number, flight_departure)
+) PARTITION BY RANGE (flight_departure);
+ALTER SEQUENCE tickets_id_ticket_seq OWNED BY tickets.id_ticket;
+
+CREATE SEQUENCE baggage_id_baggage_seq;
+CREATE TABLE baggage (
+    id_baggage INTEGER NOT NULL DEFAULT nextval('baggage_id_baggage_seq'),
+    ticket_id INTEGER NOT NULL,
+    baggage_type_id INTEGER NOT NULL REFERENCES baggage_types(id_baggage_type) ON DELETE CASCADE,
+    weight_kg NUMERIC(5, 2) NOT NULL,
+    baggage_tag VARCHAR(12) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'REGISTERED',
+    registered_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    flight_departure TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id_baggage, flight_departure),
+    CONSTRAINT baggage_tag_unique UNIQUE (baggage_tag, flight_departure),
+    CONSTRAINT baggage_ticket_fk FOREIGN KEY (ticket_id, flight_departure)
+        REFERENCES tickets(id_ticket, flight_departure) ON DELETE CASCADE ON UPDATE CASCADE
+) PARTITION BY RANGE (flight_departure);
+ALTER SEQUENCE baggage_id_baggage_seq OWNED BY baggage.id_baggage;
+
+CREATE INDEX idx_tickets_flight ON tickets(flight_id);
+CREATE INDEX idx_tickets_passenger ON tickets(passenger_id);
+CREATE INDEX idx_tickets_payment ON tickets(payment_id);
+CREATE INDEX idx_baggage_ticket ON baggage(ticket_id);
+CREATE INDEX idx_baggage_tag ON baggage(baggage_tag);
+"""
+
+# Секции для месяцев существующих рейсов и на %s месяцев вперёд
+CREATE_PARTITIONS_SQL = """
+SELECT ensure_ticket_partitions(month_start, 1)
+FROM (
+    SELECT DISTINCT date_trunc('month', departure_time AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS month_start
+    FROM flights
+) m;
+SELECT ensure_ticket_partitions(NOW(), %s);
+"""
+
+COPY_DATA_SQL = """
+INSERT INTO tickets (id_ticket, flight_id, class_id, seat_number, price, status,
+                     passenger_id, payment_id, flight_departure)
+SELECT t.id_ticket, t.flight_id, t.class_id, t.seat_number, t.price, t.status,
+       t.passenger_id, t.payment_id, f.departure_time
+FROM tickets_unpartitioned t
+JOIN flights f ON f.id_flight = t.flight_id;
+
+INSERT INTO baggage (id_baggage, ticket_id, baggage_type_id, weight_kg, baggage_tag, status,
+                     registered_at, flight_departure)
+SELECT b.id_baggage, b.ticket_id, b.baggage_type_id, b.weight_kg, b.baggage_tag, b.status,
+       b.registered_at, t.flight_departure
+FROM baggage_unpartitioned b
+JOIN tickets t ON t.id_ticket = b.ticket_id;
+
+SELECT setval('tickets_id_ticket_seq', COALESCE((SELECT MAX(id_ticket) FROM tickets), 0) + 1, false);
+SELECT setval('baggage_id_baggage_seq', COALESCE((SELECT MAX(id_baggage) FROM baggage), 0) + 1, false);
+
+-- Вместе со старыми таблицами удаляются зависящие от них представления и триггеры
+DROP TABLE baggage_unpartitioned CASCADE;
+DROP TABLE tickets_unpartitioned CASCADE;
+"""
+
+
+def fill_flight_departure(apps, schema_editor):
+    Flight = apps.get_model('airline', 'Flight')
+    Ticket = apps.get_model('airline', 'Ticket')
+    Baggage = apps.get_model('airline', 'Baggage')
+    Ticket.objects.update(flight_departure=Subquery(
+        Flight.objects.filter(id_flight=OuterRef('flight_id')).values('departure_time')[:1]))
+    Baggage.objects.update(flight_departure=Subquery(
+        Ticket.objects.filter(id_ticket=OuterRef('ticket_id')).values('flight_departure')[:1]))
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tickets')")
+        if cur.fetchone():
+            return  # БД создана scripts/create_tables.sql — уже секционирована
+        # Переустанавливаем скрипты, только если они были установлены
+        cur.execute("SELECT to_regproc('materialize_flight_seats') IS NOT NULL, "
+                    "to_regproc('calc_flight_revenue') IS NOT NULL")
+        has_triggers, has_procedures = cur.fetchone()
+
+        cur.execute(CREATE_PARTITIONED_SQL)
+        cur.execute((SCRIPTS_DIR / 'partitions.sql').read_text(encoding='utf-8'))
+        months_ahead = getattr(settings, 'TICKET_PARTITION_MONTHS_AHEAD', 12)
+        cur.execute(CREATE_PARTITIONS_SQL, [months_ahead])
+        cur.execute(COPY_DATA_SQL)
+
+        if has_triggers:
+            cur.execute((SCRIPTS_DIR / 'triggers.sql').read_text(encoding='utf-8'))
+        if has_procedures:
+            cur.execute((SCRIPTS_DIR / 'procedures_views.sql').read_text(encoding='utf-8'))
+
+
+def unpartition_tables(apps, schema_editor):
+    # Обратного перевода нет: старые таблицы удалены, первичные ключи, уникальные
+    # ограничения и внешний ключ багажа стали составными (с flight_departure), а
+    # функции, триггеры и представления scripts/ переустановлены под секции.
+    # Собрать секции обратно в обычные таблицы без потери этих связей миграцией
+    # нельзя — БД восстанавливается из резервной копии, снятой до 0008
+    if schema_editor.connection.vendor == 'postgresql':
+        raise IrreversibleError(
+            'Секционирование tickets и baggage (0008) не откатывается: '
+            'восстановите БД из резервной копии, снятой до миграции')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0007_flightschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='flight_departure',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='baggage',
+            name='flight_departure',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_flight_departure, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ticket',
+            name='flight_departure',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='baggage',
+            name='flight_departure',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='baggage',
+            name='ticket_id',
+            field=models.ForeignKey(
+                db_column='ticket_id', db_constraint=False,
+                on_delete=models.deletion.CASCADE, related_name='baggage_items', to='airline.ticket'),
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:00
+"""
+Архив выполненных рейсов (airline/archive.py).
+
+На PostgreSQL переустанавливаются триггеры и представления из scripts/, если
+они были установлены: аудит не пишется при архивации, отчёт по аэропортам
+учитывает выручку из flight_revenue_summary.
+"""
+from pathlib import Path
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[3] / 'scripts'
+
+
+def reinstall_scripts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("SELECT to_regproc('audit_trigger_update_delete') IS NOT NULL, "
+                    "to_regproc('calc_flight_revenue') IS NOT NULL")
+        has_triggers, has_procedures = cur.fetchone()
+        if has_triggers:
+            cur.execute((SCRIPTS_DIR / 'triggers.sql').read_text(encoding='utf-8'))
+        if has_procedures:
+            cur.execute((SCRIPTS_DIR / 'procedures_views.sql').read_text(encoding='utf-8'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0008_ticket_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedFlight',
+            fields=[
+                ('id_flight', models.IntegerField(primary_key=True, serialize=False)),
+                ('airplane_id', models.IntegerField()),
+                ('departure_airport_id', models.CharField(max_length=3)),
+                ('arrival_airport_id', models.CharField(max_length=3)),
+                ('departure_time', models.DateTimeField()),
+                ('arrival_time', models.DateTimeField()),
+                ('status', models.CharField(max_length=30)),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Архивный рейс',
+                'verbose_name_plural': 'Архивные рейсы',
+                'db_table': 'archive_flights',
+            },
+        ),
+        migrations.CreateModel(
+            name='FlightRevenueSummary',
+            fields=[
+                ('id_flight', models.IntegerField(primary_key=True, serialize=False)),
+                ('departure_airport_id', models.CharField(max_length=3)),
+                ('arrival_airport_id', models.CharField(max_length=3)),
+                ('departure_time', models.DateTimeField()),
+                ('tickets_sold', models.IntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=12)),
+            ],
+            options={
+                'verbose_name': 'Итоги архивного рейса',
+                'verbose_name_plural': 'Итоги архивных рейсов',
+                'db_table': 'flight_revenue_summary',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTicket',
+            fields=[
+                ('id_ticket', models.IntegerField(primary_key=True, serialize=False)),
+                ('class_id', models.IntegerField()),
+                ('seat_number', models.CharField(max_length=5)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('status', models.CharField(max_length=20)),
+                ('passenger_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('payment_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('flight_id', models.ForeignKey(db_column='flight_id', on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='airline.archivedflight')),
+            ],
+            options={
+                'verbose_name': 'Архивный билет',
+                'verbose_name_plural': 'Архивные билеты',
+                'db_table': 'archive_tickets',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBaggage',
+            fields=[
+                ('id_baggage', models.IntegerField(primary_key=True, serialize=False)),
+                ('baggage_type_id', models.IntegerField()),
+                ('weight_kg', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('baggage_tag', models.CharField(db_index=True, max_length=12)),
+                ('status', models.CharField(max_length=20)),
+                ('registered_at', models.DateTimeField()),
+                ('ticket_id', models.ForeignKey(db_column='ticket_id', on_delete=django.db.models.deletion.CASCADE, related_name='baggage_items', to='airline.archivedticket')),
+            ],
+            options={
+                'verbose_name': 'Архивный багаж',
+                'verbose_name_plural': 'Архивный багаж',
+                'db_table': 'archive_baggage',
+            },
+        ),
+        migrations.RunPython(reinstall_scripts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0009_flight_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['table_name', 'changed_at'], name='idx_audit_log_table_changed'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user_id', 'payment_date'], name='idx_payments_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'payment_date'], name='idx_payments_status_date'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['flight_id', 'status'], name='idx_tickets_flight_status'),
+        ),
+    ]
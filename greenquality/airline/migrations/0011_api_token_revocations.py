@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApiTokenRevocation',
+            fields=[
+                ('jti', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('account_id', models.IntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('revoked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Отозванный токен API',
+                'verbose_name_plural': 'Отозванные токены API',
+                'db_table': 'api_token_revocations',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+"""
+Индексы для поиска в списках выбора форм панелей (airline/panel_registry.py).
+
+Поиск идёт по началу строки без учёта регистра: UPPER(поле) LIKE UPPER('запрос%').
+Такой запрос использует индекс по выражению UPPER(поле) с классом операторов
+text_pattern_ops (PostgreSQL); на SQLite индексы не создаются.
+"""
+from django.db import migrations
+
+
+OPTION_SEARCH_INDEXES = [
+    ('idx_passengers_last_name_prefix', 'passengers', 'last_name'),
+    ('idx_passengers_first_name_prefix', 'passengers', 'first_name'),
+    ('idx_passengers_passport_prefix', 'passengers', 'passport_number'),
+    ('idx_users_last_name_prefix', 'users', 'last_name'),
+    ('idx_users_first_name_prefix', 'users', 'first_name'),
+    ('idx_accounts_email_prefix', 'accounts', 'email'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        for name, table, column in OPTION_SEARCH_INDEXES:
+            cur.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} (UPPER({column}::text) text_pattern_ops)')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        for name, _table, _column in OPTION_SEARCH_INDEXES:
+            cur.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0011_api_token_revocations'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,51 @@
+"""
+Индексы для поиска и фильтров таблиц панелей (airline/panel_registry.py).
+
+Поиск по началу строки без учёта регистра (как в списках выбора, 0012) —
+индексы по выражению UPPER(поле) text_pattern_ops (PostgreSQL; на SQLite не
+создаются). Фильтр рейсов по статусу с диапазоном или сортировкой по времени
+вылета — составной индекс (status, departure_time).
+"""
+from django.db import migrations, models
+
+
+PANEL_SEARCH_INDEXES = [
+    ('idx_airports_name_prefix', 'airports', 'name'),
+    ('idx_airports_city_prefix', 'airports', 'city'),
+    ('idx_airplanes_model_prefix', 'airplanes', 'model'),
+    ('idx_airplanes_registration_prefix', 'airplanes', 'registration_number'),
+    ('idx_tickets_seat_prefix', 'tickets', 'seat_number'),
+    ('idx_baggage_tag_prefix', 'baggage', 'baggage_tag'),
+    ('idx_audit_log_table_prefix', 'audit_log', 'table_name'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        for name, table, column in PANEL_SEARCH_INDEXES:
+            cur.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} (UPPER({column}::text) text_pattern_ops)')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        for name, _table, _column in PANEL_SEARCH_INDEXES:
+            cur.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0012_option_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['status', 'departure_time'], name='idx_flights_status_departure'),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
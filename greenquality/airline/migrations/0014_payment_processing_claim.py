@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0013_panel_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Ожидает'), ('PROCESSING', 'Обрабатывается'), ('COMPLETED', 'Завершен'), ('FAILED', 'Ошибка'), ('REFUNDED', 'Возвращен')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0014_payment_processing_claim'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Ожидает'), ('PROCESSING', 'Обрабатывается'), ('COMPLETED', 'Завершен'), ('FAILED', 'Ошибка'), ('REFUNDED', 'Возвращен'), ('CANCELLED', 'Отменен')], default='PENDING', max_length=20),
+        ),
+    ]
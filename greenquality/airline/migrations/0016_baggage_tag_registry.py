@@ -0,0 +1,60 @@
+"""
+Реестр бирок багажа и ключ секции в триггерах (PostgreSQL, секционированная БД).
+
+Уникальный индекс секционированной таблицы обязан включать ключ секции, поэтому
+baggage_tag_unique (baggage_tag, flight_departure) проверяет бирку только
+внутри месяца вылета. Глобальную уникальность (models.Baggage.baggage_tag,
+unique=True) обеспечивает несекционированная таблица baggage_tags с первичным
+ключом по бирке, которую ведут триггеры baggage. Там же триггеры, которые
+заполняют flight_departure билета и багажа из рейса и билета.
+
+Всё устанавливается переустановкой scripts/partitions.sql; на SQLite таблица
+baggage не секционирована и уникальный индекс по бирке уже глобальный.
+"""
+from pathlib import Path
+
+from django.db import migrations
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[3] / 'scripts'
+
+DROP_REGISTRY_SQL = """
+DROP TRIGGER IF EXISTS tr_tickets_flight_departure ON tickets;
+DROP TRIGGER IF EXISTS tr_baggage_flight_departure ON baggage;
+DROP TRIGGER IF EXISTS tr_baggage_tags ON baggage;
+DROP FUNCTION IF EXISTS tickets_flight_departure();
+DROP FUNCTION IF EXISTS baggage_flight_departure();
+DROP FUNCTION IF EXISTS baggage_tags_sync();
+DROP TABLE IF EXISTS baggage_tags;
+"""
+
+
+def _is_partitioned(cur):
+    cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tickets')")
+    return cur.fetchone() is not None
+
+
+def install_registry(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        if _is_partitioned(cur):
+            cur.execute((SCRIPTS_DIR / 'partitions.sql').read_text(encoding='utf-8'))
+
+
+def drop_registry(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(DROP_REGISTRY_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0015_payment_cancelled_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_registry, drop_registry),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0016_baggage_tag_registry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='record_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
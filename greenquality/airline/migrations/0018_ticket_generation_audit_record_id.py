@@ -0,0 +1,38 @@
+"""
+Сводная запись аудита генерации мест рейса пишется с record_id = NULL
+(раньше — id рейса в строке таблицы tickets, что указывало на чужой билет).
+
+На PostgreSQL переустанавливаются триггеры из scripts/triggers.sql, если они
+были установлены, и исправляются уже записанные сводные записи.
+"""
+from pathlib import Path
+
+from django.db import migrations
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[3] / 'scripts'
+
+
+def reinstall_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("SELECT to_regproc('generate_tickets_for_flight') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return
+        cur.execute((SCRIPTS_DIR / 'triggers.sql').read_text(encoding='utf-8'))
+        cur.execute("""
+            UPDATE audit_log SET record_id = NULL
+            WHERE table_name = 'tickets' AND operation = 'INSERT' AND new_data ? 'generated_seats'
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airline', '0017_auditlog_summary_record_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_triggers, migrations.RunPython.noop),
+    ]
@@ -35,7 +35,8 @@ class Account(models.Model):
 class AuditLog(models.Model):
     id_audit = models.AutoField(primary_key=True)
     table_name = models.CharField(max_length=50)
-    record_id = models.IntegerField()
+    # NULL — сводная запись без одной записи-источника (загрузка CSV в панели)
+    record_id = models.IntegerField(null=True, blank=True)
     operation = models.CharField(max_length=10, choices=[(
         'INSERT', 'Insert'), ('UPDATE', 'Update'), ('DELETE', 'Delete')])
     old_data = models.JSONField(blank=True, null=True)
@@ -48,6 +49,9 @@ class AuditLog(models.Model):
         db_table = 'audit_log'
         verbose_name = 'Журнал аудита'
         verbose_name_plural = 'Журналы аудита'
+        indexes = [
+            models.Index(fields=['table_name', 'changed_at'], name='idx_audit_log_table_changed'),
+        ]
 
 
 class Airport(models.Model):
@@ -114,11 +118,46 @@ class Flight(models.Model):
                 name='check_departure_before_arrival'
             )
         ]
+        indexes = [
+            # Фильтр панели по статусу с сортировкой/диапазоном по времени вылета
+            models.Index(fields=['status', 'departure_time'], name='idx_flights_status_departure'),
+        ]
 
     def __str__(self):
         return f"Flight {self.id_flight}: {self.departure_airport_id} -> {self.arrival_airport_id}"
 
 
+class FlightSchedule(models.Model):
+    """Регулярное расписание: по нему создаются рейсы на период действия."""
+    id_schedule = models.AutoField(primary_key=True)
+    airplane_id = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, db_column='airplane_id')
+    departure_airport_id = models.ForeignKey(
+        Airport, on_delete=models.CASCADE, db_column='departure_airport_id', related_name='departure_schedules')
+    arrival_airport_id = models.ForeignKey(
+        Airport, on_delete=models.CASCADE, db_column='arrival_airport_id', related_name='arrival_schedules')
+    # Дни недели по ISO (1 — понедельник … 7 — воскресенье), например '135'
+    days_of_week = models.CharField(max_length=7)
+    departure_at = models.TimeField()
+    flight_minutes = models.PositiveIntegerField()
+    valid_from = models.DateField()
+    valid_to = models.DateField()
+
+    class Meta:
+        db_table = 'flight_schedules'
+        verbose_name = 'Расписание'
+        verbose_name_plural = 'Расписания'
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(valid_from__lte=models.F('valid_to')),
+                name='check_schedule_period'
+            )
+        ]
+
+    def __str__(self):
+        return f"Schedule {self.id_schedule}: {self.departure_airport_id} -> {self.arrival_airport_id}"
+
+
 class Passenger(models.Model):
     id_passenger = models.AutoField(primary_key=True)
     first_name = models.CharField(max_length=50)
@@ -143,6 +182,8 @@ class Class(models.Model):
         ('BUSINESS', 'Бизнес'),
         ('FIRST', 'Первый')
     ])
+    # Базовый тариф класса: начальная цена мест рейса и основа цены билета
+    base_price = models.DecimalField(max_digits=8, decimal_places=2, default=0)
 
     class Meta:
         db_table = 'class'
@@ -186,14 +227,24 @@ class Payment(models.Model):
     ])
     status = models.CharField(max_length=20, choices=[
         ('PENDING', 'Ожидает'),
+        ('PROCESSING', 'Обрабатывается'),
         ('COMPLETED', 'Завершен'),
-        ('FAILED', 'Ошибка')
+        ('FAILED', 'Ошибка'),
+        ('REFUNDED', 'Возвращен'),
+        ('CANCELLED', 'Отменен')
     ], default='PENDING')
+    # Когда обработчик платежей забрал платёж в работу (статус PROCESSING)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'payments'
         verbose_name = 'Платеж'
         verbose_name_plural = 'Платежи'
+        indexes = [
+            # История покупок пользователя и платежи в статусе за период
+            models.Index(fields=['user_id', 'payment_date'], name='idx_payments_user_date'),
+            models.Index(fields=['status', 'payment_date'], name='idx_payments_status_date'),
+        ]
 
     def __str__(self):
         return f"Payment {self.id_payment}"
@@ -218,6 +269,10 @@ class Ticket(models.Model):
         Passenger, on_delete=models.CASCADE, db_column='passenger_id', blank=True, null=True)
     payment_id = models.ForeignKey(
         Payment, on_delete=models.SET_NULL, blank=True, null=True, db_column='payment_id')
+    # Время вылета рейса — ключ секционирования tickets по месяцам (PostgreSQL,
+    # scripts/partitions.sql). Заполняется в save() и триггером
+    # tr_tickets_flight_departure; при переносе вылета обновляется триггером рейсов
+    flight_departure = models.DateTimeField(editable=False)
 
     class Meta:
         db_table = 'tickets'
@@ -227,6 +282,19 @@ class Ticket(models.Model):
             models.UniqueConstraint(
                 fields=['flight_id', 'seat_number'], name='unique_flight_seat')
         ]
+        indexes = [
+            # Занятые/свободные места рейса
+            models.Index(fields=['flight_id', 'status'], name='idx_tickets_flight_status'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.flight_id_id is not None:
+            if Ticket.flight_id.is_cached(self):
+                self.flight_departure = self.flight_id.departure_time
+            else:
+                self.flight_departure = Flight.objects.values_list(
+                    'departure_time', flat=True).get(pk=self.flight_id_id)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Ticket {self.id_ticket} - Seat {self.seat_number}"
@@ -258,12 +326,16 @@ class BaggageType(models.Model):
 
 class Baggage(models.Model):
     id_baggage = models.AutoField(primary_key=True)
+    # На PostgreSQL внешний ключ составной — (ticket_id, flight_departure), см. create_tables.sql
     ticket_id = models.ForeignKey(
-        Ticket, on_delete=models.CASCADE, db_column='ticket_id', related_name='baggage_items')
+        Ticket, on_delete=models.CASCADE, db_column='ticket_id', related_name='baggage_items',
+        db_constraint=False)
     baggage_type_id = models.ForeignKey(
         BaggageType, on_delete=models.CASCADE, db_column='baggage_type_id')
     weight_kg = models.DecimalField(max_digits=5, decimal_places=2)
-    # Уникальный номер багажной бирки
+    # Уникальный номер багажной бирки. На секционированной PostgreSQL уникальный
+    # индекс включает ключ секции (baggage_tag_unique), а глобально бирку
+    # проверяет реестр baggage_tags (scripts/partitions.sql, миграция 0016)
     baggage_tag = models.CharField(max_length=12, unique=True)
     status = models.CharField(max_length=20, choices=[
         ('REGISTERED', 'Зарегистрирован'),
@@ -272,11 +344,109 @@ class Baggage(models.Model):
         ('LOST', 'Утерян')
     ], default='REGISTERED')
     registered_at = models.DateTimeField(auto_now_add=True)
+    # Ключ секции — как у билета; на PostgreSQL его держит в согласии с билетом
+    # триггер tr_baggage_flight_departure и внешний ключ ON UPDATE CASCADE
+    flight_departure = models.DateTimeField(editable=False)
 
     class Meta:
         db_table = 'baggage'
         verbose_name = 'Багаж'
         verbose_name_plural = 'Багаж'
 
+    def save(self, *args, **kwargs):
+        if self.ticket_id_id is not None:
+            if Baggage.ticket_id.is_cached(self):
+                self.flight_departure = self.ticket_id.flight_departure
+            else:
+                self.flight_departure = Ticket.objects.values_list(
+                    'flight_departure', flat=True).get(pk=self.ticket_id_id)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Baggage {self.baggage_tag} ({self.weight_kg} кг)"
+
+
+# Архив выполненных рейсов (airline/archive.py). Связи с живыми таблицами
+# (самолёт, аэропорты, пассажир, платёж) хранятся номерами без внешних ключей
+
+class ArchivedFlight(models.Model):
+    id_flight = models.IntegerField(primary_key=True)
+    airplane_id = models.IntegerField()
+    departure_airport_id = models.CharField(max_length=3)
+    arrival_airport_id = models.CharField(max_length=3)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    status = models.CharField(max_length=30)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'archive_flights'
+        verbose_name = 'Архивный рейс'
+        verbose_name_plural = 'Архивные рейсы'
+
+    def __str__(self):
+        return f"GQ{self.id_flight:03d} (архив)"
+
+
+class ArchivedTicket(models.Model):
+    id_ticket = models.IntegerField(primary_key=True)
+    flight_id = models.ForeignKey(
+        ArchivedFlight, on_delete=models.CASCADE, db_column='flight_id', related_name='tickets')
+    class_id = models.IntegerField()
+    seat_number = models.CharField(max_length=5)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    status = models.CharField(max_length=20)
+    passenger_id = models.IntegerField(blank=True, null=True, db_index=True)
+    payment_id = models.IntegerField(blank=True, null=True, db_index=True)
+
+    class Meta:
+        db_table = 'archive_tickets'
+        verbose_name = 'Архивный билет'
+        verbose_name_plural = 'Архивные билеты'
+
+    def __str__(self):
+        return f"Ticket {self.id_ticket} - Seat {self.seat_number} (архив)"
+
+
+class ArchivedBaggage(models.Model):
+    id_baggage = models.IntegerField(primary_key=True)
+    ticket_id = models.ForeignKey(
+        ArchivedTicket, on_delete=models.CASCADE, db_column='ticket_id', related_name='baggage_items')
+    baggage_type_id = models.IntegerField()
+    weight_kg = models.DecimalField(max_digits=5, decimal_places=2)
+    baggage_tag = models.CharField(max_length=12, db_index=True)
+    status = models.CharField(max_length=20)
+    registered_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'archive_baggage'
+        verbose_name = 'Архивный багаж'
+        verbose_name_plural = 'Архивный багаж'
+
+
+class FlightRevenueSummary(models.Model):
+    """Итоги архивного рейса: по ним отчёты о выручке учитывают перенесённые в архив рейсы."""
+    id_flight = models.IntegerField(primary_key=True)
+    departure_airport_id = models.CharField(max_length=3)
+    arrival_airport_id = models.CharField(max_length=3)
+    departure_time = models.DateTimeField()
+    tickets_sold = models.IntegerField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        db_table = 'flight_revenue_summary'
+        verbose_name = 'Итоги архивного рейса'
+        verbose_name_plural = 'Итоги архивных рейсов'
+
+
+class ApiTokenRevocation(models.Model):
+    """Отозванный токен API (airline/api_tokens.py). Строки с истёкшим сроком удаляются."""
+    jti = models.CharField(max_length=32, primary_key=True)
+    account_id = models.IntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'api_token_revocations'
+        verbose_name = 'Отозванный токен API'
+        verbose_name_plural = 'Отозванные токены API'
@@ -0,0 +1,81 @@
+"""
+Пагинация панелей с оценкой числа строк вместо COUNT(*).
+
+Точный COUNT(*) большой таблицы (tickets, audit_log) — полное чтение на
+каждый просмотр страницы. Для выборки без условий EstimatedCountPaginator
+берёт оценку из статистики планировщика: pg_class.reltuples (для
+секционированной таблицы — сумма по секциям) на PostgreSQL, sqlite_stat1 на
+SQLite. Оценка используется, только если она не меньше min_rows
+(PANEL_ESTIMATED_COUNT_MIN_ROWS); для небольших таблиц, выборок с
+фильтрами, без статистики (ANALYZE не выполнялся) и по запросу exact=True
+считается точное число.
+
+Оценка может отставать от таблицы до следующего ANALYZE (autovacuum), поэтому
+страница за последней по оценке не считается ошибкой, а показывается пустой
+или с оставшимися записями.
+"""
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+
+DEFAULT_MIN_ROWS = 10000
+
+
+def estimated_rows(model):
+    """Оценка числа строк таблицы модели по статистике СУБД; None, если статистики нет."""
+    table = model._meta.db_table
+    with connection.cursor() as cur:
+        if connection.vendor == 'postgresql':
+            cur.execute(
+                "SELECT SUM(GREATEST(c.reltuples, 0))::BIGINT FROM pg_class c "
+                "WHERE c.oid = to_regclass(%s) "
+                "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))",
+                [table, table],
+            )
+            row = cur.fetchone()
+            return row[0] if row and row[0] else None
+        if connection.vendor == 'sqlite':
+            cur.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if not cur.fetchone():
+                return None
+            # Первое число stat — строк в таблице (одинаково для всех её индексов)
+            cur.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cur.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который для больших выборок без условий берёт оценку числа строк."""
+
+    def __init__(self, object_list, per_page, exact=False, min_rows=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.exact = exact
+        self.min_rows = min_rows if min_rows is not None else getattr(
+            settings, 'PANEL_ESTIMATED_COUNT_MIN_ROWS', DEFAULT_MIN_ROWS)
+        self.estimated = False
+
+    def _unfiltered(self):
+        query = getattr(self.object_list, 'query', None)
+        return (query is not None and not query.where and not query.is_sliced
+                and not query.distinct and not query.combinator)
+
+    @cached_property
+    def count(self):
+        if not self.exact and self._unfiltered():
+            estimate = estimated_rows(self.object_list.model)
+            if estimate is not None and estimate >= self.min_rows:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Оценка могла отстать от таблицы: страницы после последней по оценке допустимы
+            if self.estimated and int(number) > 1:
+                return int(number)
+            raise
@@ -0,0 +1,70 @@
+"""
+Выгрузка таблицы панели в CSV или JSONL потоком.
+
+Выгружаются столбцы таблицы из реестра панелей (PanelTable.fields; внешние
+ключи — id связанной записи) в порядке и с фильтрами текущей выборки панели.
+Строки читаются через values_list(...).iterator(chunk_size): на PostgreSQL
+это серверный курсор, который отдаёт по PANEL_EXPORT_CHUNK_SIZE строк, так
+что ни запрос, ни ответ (StreamingHttpResponse) не держат таблицу в памяти —
+выгрузка tickets или audit_log на миллионы строк идёт с постоянным
+потреблением памяти.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Line:
+    """Файл для csv.writer, который возвращает записанную строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _columns(table):
+    """(заголовок, столбец для values_list) для полей таблицы панели."""
+    model = table.model
+    return [(name, model._meta.get_field(name).attname) for name in table.fields]
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, cls=DjangoJSONEncoder)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_lines(table, queryset, fmt, chunk_size=None):
+    """
+    Строки выгрузки (str) для выборки queryset таблицы панели: CSV — с BOM
+    (для Excel) и строкой заголовков, JSONL — по объекту на строку.
+    """
+    chunk_size = chunk_size or getattr(settings, 'PANEL_EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    columns = _columns(table)
+    headers = [name for name, _attname in columns]
+    rows = queryset.values_list(*(attname for _name, attname in columns)).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Line())
+        yield '\ufeff' + writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+    elif fmt == 'jsonl':
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode(dict(zip(headers, row))) + '\n'
+    else:
+        raise ValueError(f'Неизвестный формат выгрузки: {fmt}')
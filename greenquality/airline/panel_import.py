@@ -0,0 +1,323 @@
+"""
+Загрузка CSV-файла в таблицу панели (список аэропортов, пассажиров, парк самолётов).
+
+Файл — CSV в UTF-8 с заголовком из столбцов таблицы панели (как у выгрузки
+panel_export; столбцы, которые заполняет сама модель, например payment_date,
+пропускаются). Если в файле есть первичный ключ, существующие записи
+обновляются, остальные добавляются; без него все строки добавляются.
+
+Порядок загрузки:
+  1. все строки проверяются за один проход по правилам формы панели
+     (validation.py) и приводятся к типам полей;
+  2. внешние ключи и уникальные поля проверяются пакетно — один запрос на
+     целевую модель или уникальное поле на весь файл;
+  3. прошедшие проверку строки загружаются во временную таблицу пачками по
+     LOAD_CHUNK_SIZE строк (на PostgreSQL — COPY на пачку) и переносятся в
+     таблицу одним INSERT ... SELECT ... ON CONFLICT (первичный ключ) DO UPDATE.
+
+Проверки 1–2 сверяют строки между собой, поэтому разобранный файл целиком
+держится в памяти — его размер ограничивает PANEL_IMPORT_MAX_ROWS. Строки
+для временной таблицы готовятся по пачке за раз и второй копии файла не
+создают.
+
+Ошибка в строке не прерывает загрузку остальных: строка попадает в отчёт
+(номер строки файла и причина). Если перенос пачки нарушил ограничение
+таблицы (например, прилёт раньше вылета), строки переносятся по одной, и в
+отчёт попадают только нарушившие его.
+
+Загружаются только таблицы, которые можно заполнить без save() модели: без
+своего save() (ключ секции билета и багажа) и без обязательных полей вне
+списка панели (пароль аккаунта) — см. PanelTable.importable.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+from django.db import models
+from django.utils import timezone
+
+from .audit_utils import log_audit
+from .exceptions_utils import get_user_friendly_message
+from .principal import clear_principal_cache_for
+from .validation import validate_crud_data
+
+
+DEFAULT_MAX_ROWS = 100000
+LOOKUP_CHUNK_SIZE = 5000
+LOAD_CHUNK_SIZE = 5000
+STAGING_TABLE = 'panel_import_staging'
+LINE_COLUMN = 'import_line'
+
+
+class ImportFileError(Exception):
+    """Файл нельзя загрузить целиком (заголовок, кодировка, размер); текст показывается пользователю"""
+
+
+def _read_header(reader, table):
+    """Поля модели по заголовку файла; неизвестный или повторный столбец — ImportFileError."""
+    header = next(reader, None)
+    if not header:
+        raise ImportFileError('Файл пуст')
+    fields = []
+    seen = set()
+    for name in (column.strip() for column in header):
+        if name not in table.fields:
+            raise ImportFileError(f'Неизвестный столбец «{name}». Допустимые: {", ".join(table.fields)}')
+        if name in seen:
+            raise ImportFileError(f'Столбец «{name}» повторяется')
+        seen.add(name)
+        field = table.model._meta.get_field(name)
+        # Столбцы, которые заполняет модель (auto_now_add и т.п.), пропускаются
+        fields.append(field if field.editable else None)
+    pk = table.model._meta.pk
+    if pk not in fields and not isinstance(pk, models.AutoField):
+        raise ImportFileError(f'Нужен столбец первичного ключа «{pk.name}»')
+    return fields
+
+
+def _existing(model, field_name, values):
+    """Значения field_name из values, которые уже есть в таблице: {значение: pk}."""
+    found = {}
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(model.objects.filter(**{f'{field_name}__in': chunk}).values_list(field_name, 'pk'))
+    return found
+
+
+def _defaults(model, columns):
+    """Значения полей вне файла, которые при создании заполнил бы Django (default, auto_now_add)."""
+    now = timezone.now()
+    defaults = {}
+    for field in model._meta.concrete_fields:
+        if field in columns or field.primary_key:
+            continue
+        if getattr(field, 'auto_now_add', False) or getattr(field, 'auto_now', False):
+            defaults[field] = now
+        elif field.has_default():
+            defaults[field] = field.get_default()
+    return defaults
+
+
+def _parse_rows(reader, table, fields, max_rows, errors):
+    """
+    Первый проход: приведение типов и правила формы. Возвращает список
+    (номер строки, {поле: значение}); ошибки строк добавляются в errors.
+    """
+    model = table.model
+    pk = model._meta.pk
+    rows = []
+    for values in reader:
+        line = reader.line_num
+        if not any(value.strip() for value in values):
+            continue
+        if len(rows) + len(errors) >= max_rows:
+            raise ImportFileError(f'В файле больше {max_rows} строк')
+        if len(values) != len(fields):
+            errors.append((line, f'Ожидалось столбцов: {len(fields)}, в строке: {len(values)}'))
+            continue
+        data = {field.name: value.strip() for field, value in zip(fields, values) if field and value.strip()}
+        table.convert(data)
+        row_errors = validate_crud_data(model, data, 'create')
+        if pk in fields and not isinstance(pk, models.AutoField) and not data.get(pk.name):
+            row_errors.append(f'Поле «{pk.verbose_name}» обязательно для заполнения.')
+        if not row_errors:
+            try:
+                data = {name: model._meta.get_field(name).to_python(value) for name, value in data.items()}
+            except ValidationError as e:
+                row_errors.append(get_user_friendly_message(e, 'create'))
+        if row_errors:
+            errors.append((line, ' '.join(row_errors)))
+        else:
+            rows.append((line, data))
+    return rows
+
+
+def _check_relations(table, rows, errors):
+    """Второй проход: внешние ключи и уникальные поля — по запросу на модель/поле на весь файл."""
+    model = table.model
+    pk_name = model._meta.pk.name
+    bad = {}
+    # Внешние ключи на одну модель (аэропорты вылета и прилёта) проверяются одним запросом
+    by_model = {}
+    for field_name, related_model in table.fk_fields.items():
+        by_model.setdefault(related_model, []).append(field_name)
+    for related_model, field_names in by_model.items():
+        values = {data[name] for _line, data in rows for name in field_names if data.get(name) is not None}
+        if not values:
+            continue
+        found = _existing(related_model, 'pk', values)
+        for line, data in rows:
+            for name in field_names:
+                if data.get(name) is not None and data[name] not in found:
+                    bad.setdefault(line, f'Связанная запись «{name}» = {data[name]} не найдена.')
+
+    for field in model._meta.concrete_fields:
+        if not field.unique or field.primary_key:
+            continue
+        values = {data[field.name] for _line, data in rows if data.get(field.name) is not None}
+        if not values:
+            continue
+        found = _existing(model, field.name, values)
+        seen = {}
+        for line, data in rows:
+            value = data.get(field.name)
+            if value is None:
+                continue
+            if value in seen:
+                bad.setdefault(line, f'Значение «{value}» поля «{field.verbose_name}» повторяется (строка {seen[value]}).')
+            elif value in found and found[value] != data.get(pk_name):
+                bad.setdefault(line, f'Значение «{value}» поля «{field.verbose_name}» уже есть в таблице.')
+            seen.setdefault(value, line)
+
+    seen = {}
+    for line, data in rows:
+        key = data.get(pk_name)
+        if key is None:
+            continue
+        if key in seen:
+            bad.setdefault(line, f'Запись {key} повторяется (строка {seen[key]}).')
+        seen.setdefault(key, line)
+
+    errors.extend(bad.items())
+    return [(line, data) for line, data in rows if line not in bad]
+
+
+def _copy_text(value):
+    """Значение для COPY в текстовом формате."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _load_staging(cur, columns, rows):
+    """
+    Загружает строки (итератор) во временную таблицу пачками по LOAD_CHUNK_SIZE:
+    COPY на PostgreSQL, executemany на других СУБД. В памяти — одна пачка.
+    """
+    names = ', '.join(connection.ops.quote_name(field.column) for field in columns)
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, LOAD_CHUNK_SIZE))
+        if not chunk:
+            break
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO()
+            for row in chunk:
+                buffer.write('\t'.join(_copy_text(value) for value in row))
+                buffer.write('\n')
+            buffer.seek(0)
+            cur.copy_expert(f"COPY {STAGING_TABLE} ({names}, {LINE_COLUMN}) FROM STDIN", buffer)
+        else:
+            cur.executemany(f"INSERT INTO {STAGING_TABLE} ({names}, {LINE_COLUMN}) VALUES ({placeholders})", chunk)
+
+
+def _merge_sql(model, columns):
+    """INSERT ... SELECT из временной таблицы; при совпадении первичного ключа — UPDATE столбцов файла."""
+    quote = connection.ops.quote_name
+    names = ', '.join(quote(field.column) for field in columns)
+    # WHERE перед ON CONFLICT обязателен для SQLite (иначе ON разбирается как JOIN)
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({names}) SELECT {names} FROM {STAGING_TABLE} WHERE {{where}}"
+    pk = model._meta.pk
+    if pk in columns:
+        updates = ', '.join(f"{quote(field.column)} = EXCLUDED.{quote(field.column)}"
+                            for field in columns if field is not pk)
+        sql += f" ON CONFLICT ({quote(pk.column)}) " + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+    return sql
+
+
+def _merge(cur, model, columns, lines, errors):
+    """Переносит строки из временной таблицы; возвращает номера перенесённых строк."""
+    sql = _merge_sql(model, columns)
+    try:
+        with transaction.atomic():
+            cur.execute(sql.format(where='1 = 1'))
+        return lines
+    except DatabaseError:
+        pass
+    # Пачка нарушила ограничение таблицы — по одной строке, каждая в своей точке сохранения
+    merged = []
+    for line in lines:
+        try:
+            with transaction.atomic():
+                cur.execute(sql.format(where=f'{LINE_COLUMN} = %s'), [line])
+            merged.append(line)
+        except DatabaseError as e:
+            errors.append((line, get_user_friendly_message(e, 'create')))
+    return merged
+
+
+def import_csv(table, fileobj, changed_by_account_id=None, filename='', max_rows=None):
+    """
+    Загружает CSV (файл в байтах) в таблицу панели. Возвращает сводку:
+    rows (строк с данными), inserted, updated, errors — список (строка файла, причина).
+    """
+    if not table.importable:
+        raise ImportFileError('Эту таблицу нельзя загружать из файла')
+    max_rows = max_rows or getattr(settings, 'PANEL_IMPORT_MAX_ROWS', DEFAULT_MAX_ROWS)
+    model = table.model
+    pk = model._meta.pk
+    errors = []
+    try:
+        reader = csv.reader(io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+        fields = _read_header(reader, table)
+        rows = _parse_rows(reader, table, fields, max_rows, errors)
+    except UnicodeDecodeError:
+        raise ImportFileError('Файл должен быть в кодировке UTF-8')
+    except csv.Error as e:
+        raise ImportFileError(f'Файл не похож на CSV: {e}')
+    rows = _check_relations(table, rows, errors)
+    summary = {'rows': len(rows) + len(errors), 'inserted': 0, 'updated': 0, 'errors': errors}
+
+    if rows:
+        file_columns = [field for field in fields if field]
+        defaults = _defaults(model, file_columns)
+        columns = file_columns + list(defaults)
+        # Генератор: строки для временной таблицы готовятся по пачке в _load_staging
+        prepared = (
+            [field.get_db_prep_save(data.get(field.name), connection) for field in file_columns]
+            + [field.get_db_prep_save(value, connection) for field, value in defaults.items()]
+            + [line]
+            for line, data in rows
+        )
+        existing = set()
+        if pk in file_columns:
+            existing = set(_existing(model, 'pk', {data[pk.name] for _line, data in rows}))
+
+        with transaction.atomic(), connection.cursor() as cur:
+            names = ', '.join(connection.ops.quote_name(field.column) for field in columns)
+            cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            # Пустая копия столбцов таблицы (с их типами) и номер строки файла
+            cur.execute(f"CREATE TEMP TABLE {STAGING_TABLE} AS SELECT {names}, 0 AS {LINE_COLUMN} "
+                        f"FROM {connection.ops.quote_name(model._meta.db_table)} WHERE 1 = 0")
+            _load_staging(cur, columns, prepared)
+            merged = set(_merge(cur, model, columns, [line for line, _data in rows], errors))
+            cur.execute(f"DROP TABLE {STAGING_TABLE}")
+
+            # Явно заданные id не сдвигают последовательность первичного ключа (PostgreSQL)
+            if pk in file_columns and isinstance(pk, models.AutoField):
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                    cur.execute(sql)
+
+            summary['updated'] = sum(1 for line, data in rows if line in merged and data.get(pk.name) in existing)
+            summary['inserted'] = len(merged) - summary['updated']
+            # Одна сводная запись аудита на файл: id добавленных строк неизвестны, record_id — NULL
+            log_audit(table.key, None, 'INSERT', changed_by_account_id, None, {
+                'import': filename,
+                'rows': summary['rows'],
+                'inserted': summary['inserted'],
+                'updated': summary['updated'],
+                'errors': len(errors),
+            })
+
+        # Строки пишутся SQL-запросом, без сигналов моделей: роли и пользователи — сброс кеша принципалов
+        clear_principal_cache_for(model)
+
+    errors.sort()
+    return summary
@@ -0,0 +1,342 @@
+"""
+Описание таблиц панелей администратора и менеджера.
+
+Реестр строится один раз при импорте: для каждой таблицы — модель, видимые
+поля, внешние ключи и их целевые модели, пути select_related, преобразование
+значений формы по типам полей, фильтры столбцов и поля поиска. Панель (PANELS) — набор таблиц и роль, которой
+она доступна. Страница панели, CRUD, загрузка записи и списки выбора
+(admin_views.py) берут всё отсюда, поэтому таблица, добавленная в обе панели,
+ведёт себя в них одинаково.
+"""
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+from .models import (
+    User, Account, Role, Payment, Ticket, Flight, Passenger,
+    Airport, Class, BaggageType, Baggage, Airplane, AuditLog, FlightSchedule,
+    ArchivedTicket
+)
+
+
+def search_queryset(queryset, query, search_fields, numeric_pk, number_prefix=''):
+    """
+    Условие поиска: каждое слово query — начало одного из search_fields (без
+    учёта регистра; индексы UPPER(поле) text_pattern_ops) или номер записи.
+    Возвращает None, если слово не может совпасть ни с чем.
+    """
+    for word in query.split():
+        condition = models.Q()
+        for field_name in search_fields:
+            condition |= models.Q(**{f'{field_name}__istartswith': word})
+        number = word.upper().removeprefix(number_prefix)
+        if numeric_pk and number.isdigit():
+            condition |= models.Q(pk=int(number))
+        if not condition:
+            return None
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+class OptionSource:
+    """
+    Список выбора (select) формы для внешнего ключа на model: поиск по началу
+    search_fields (без учёта регистра) и по номеру записи, подпись — из
+    display_fields или функции format(pk, *значения display_fields).
+    Записи читаются одним запросом values_list, без создания объектов модели.
+    """
+
+    __slots__ = ('model', 'search_fields', 'display_fields', 'format', 'number_prefix', 'numeric_pk')
+
+    def __init__(self, model, search_fields=(), display_fields=(), format=None, number_prefix=''):
+        self.model = model
+        self.search_fields = search_fields
+        self.display_fields = display_fields
+        self.format = format
+        self.number_prefix = number_prefix
+        self.numeric_pk = isinstance(model._meta.pk, models.IntegerField)
+
+    def _text(self, row):
+        if self.format:
+            return self.format(*row)
+        return ' '.join(str(value) for value in row[1:] if value not in (None, ''))
+
+    def _rows(self, queryset, limit, ordering=('pk',)):
+        rows = queryset.order_by(*ordering).values_list('pk', *self.display_fields)[:limit]
+        return [{'value': row[0], 'text': self._text(row)} for row in rows]
+
+    def search(self, query, limit):
+        """Записи, у которых каждое слово query — начало одного из полей поиска (или номер записи)."""
+        if not query.split():
+            # Без запроса — последние записи (по первичному ключу, без сортировки таблицы)
+            return self._rows(self.model.objects.all(), limit, ('-pk',))
+        queryset = search_queryset(self.model.objects.all(), query, self.search_fields,
+                                   self.numeric_pk, self.number_prefix)
+        if queryset is None:
+            return []
+        return self._rows(queryset, limit, self.display_fields or ('pk',))
+
+    def get(self, pk):
+        """Подпись одной записи (текущее значение поля в форме); None, если записи нет."""
+        try:
+            rows = self._rows(self.model.objects.filter(pk=pk), 1)
+        except (ValueError, TypeError):
+            return None
+        return rows[0] if rows else None
+
+
+OPTION_SOURCES = {source.model: source for source in (
+    OptionSource(Role, ('role_name',), ('role_name',)),
+    OptionSource(Account, ('email',), ('email',)),
+    OptionSource(User, ('last_name', 'first_name'), ('first_name', 'last_name')),
+    OptionSource(Airport, ('id_airport', 'name', 'city'), ('name',)),
+    OptionSource(Airplane, ('model', 'registration_number'), ('model',)),
+    OptionSource(Flight, format=lambda pk: f"GQ{pk:03d}", number_prefix='GQ'),
+    OptionSource(Passenger, ('last_name', 'first_name', 'passport_number'), ('first_name', 'last_name')),
+    OptionSource(Class, ('class_name',), ('class_name',)),
+    OptionSource(Payment, format=str),
+    OptionSource(Ticket, format=str),
+    OptionSource(BaggageType, ('type_name',), ('type_name',)),
+    OptionSource(Baggage, ('baggage_tag',), ('baggage_tag',)),
+)}
+
+
+def _filter_kind(field):
+    """Вид фильтра столбца: choices — список, range — от/до, exact — равенство; None — без фильтра."""
+    if field.choices:
+        return 'choices'
+    if isinstance(field, models.ForeignKey):
+        return 'exact'
+    if isinstance(field, (models.DateField, models.TimeField, models.DecimalField, models.IntegerField)) \
+            and not field.primary_key:
+        return 'range'
+    if isinstance(field, (models.CharField, models.AutoField)):
+        return 'exact'
+    return None
+
+
+def _input_type(field):
+    if isinstance(field, models.DateTimeField):
+        return 'datetime-local'
+    if isinstance(field, models.DateField):
+        return 'date'
+    if isinstance(field, models.TimeField):
+        return 'time'
+    if isinstance(field, (models.DecimalField, models.IntegerField, models.ForeignKey)):
+        return 'number'
+    return 'text'
+
+
+def _converter(field):
+    """Преобразование строки из формы в значение поля; None — оставить строку."""
+    # DateTimeField — подкласс DateField, проверяется первым
+    if isinstance(field, models.DateTimeField):
+        return parse_datetime
+    if isinstance(field, models.DateField):
+        return parse_date
+    if isinstance(field, models.TimeField):
+        return parse_time
+    if isinstance(field, models.DecimalField):
+        return lambda value: Decimal(str(value))
+    return None
+
+
+class PanelTable:
+    """Таблица панели."""
+
+    __slots__ = ('key', 'model', 'name', 'fields', 'readonly',
+                 'fk_fields', 'select_related', 'converters', 'record_fields', 'bulk_fields', 'importable',
+                 'filters', 'search_fields', 'numeric_pk')
+
+    def __init__(self, model, name, fields, readonly=False, search_fields=None):
+        self.key = model.__name__
+        self.model = model
+        self.name = name
+        self.fields = fields
+        self.readonly = readonly
+        concrete = model._meta.fields
+        # Поле формы -> модель, на которую ссылается внешний ключ
+        self.fk_fields = {f.name: f.related_model for f in concrete if isinstance(f, models.ForeignKey)}
+        self.select_related = tuple(name for name in fields if name in self.fk_fields)
+        self.converters = {f.name: conv for f in concrete if (conv := _converter(f))}
+        # Поля, которые отдаются форме редактирования (пароль — никогда)
+        self.record_fields = tuple(f.name for f in model._meta.get_fields() if f.name != 'password')
+        # Поля для массового изменения (QuerySet.update, без save()): видимые и редактируемые.
+        # Если save() модели вычисляет значения по связям (ключ секции билета и багажа),
+        # внешние ключи так менять нельзя
+        custom_save = model.save is not models.Model.save
+        self.bulk_fields = {}
+        for name in fields:
+            field = model._meta.get_field(name)
+            if field.primary_key or not field.editable or (custom_save and name in self.fk_fields):
+                continue
+            self.bulk_fields[name] = [[str(value), str(label)] for value, label in field.choices or ()]
+        # Загрузка из CSV (panel_import.py) пишет в таблицу без save(), поэтому возможна,
+        # только если у модели нет своего save() и все обязательные поля есть в списке панели
+        self.importable = not readonly and not custom_save and all(
+            f.name in fields for f in concrete
+            if not (f.primary_key or f.null or f.has_default() or not f.editable)
+        )
+        # Фильтры столбцов (?f_<поле>=, ?f_<поле>_from=&f_<поле>_to=) и поиск (?q=).
+        # Поиск — по началу полей, как в списках выбора, если не задан свой набор полей
+        self.filters = []
+        for name in fields:
+            field = model._meta.get_field(name)
+            kind = _filter_kind(field)
+            if kind:
+                self.filters.append({
+                    'name': name, 'kind': kind, 'input': _input_type(field),
+                    'params': [f'f_{name}_from', f'f_{name}_to'] if kind == 'range' else [f'f_{name}'],
+                    'choices': [[str(value), str(label)] for value, label in field.choices or ()],
+                })
+        if search_fields is None:
+            source = OPTION_SOURCES.get(model)
+            search_fields = source.search_fields if source else ()
+        self.search_fields = search_fields
+        self.numeric_pk = isinstance(model._meta.pk, models.IntegerField)
+
+    def queryset(self):
+        return self.model.objects.select_related(*self.select_related)
+
+    def filter(self, queryset, params):
+        """
+        Применяет фильтры столбцов и поиск из params (request.GET). Возвращает
+        (queryset, применённые параметры); некорректные значения пропускаются.
+        """
+        active = {}
+        for spec in self.filters:
+            name = spec['name']
+            field = self.model._meta.get_field(name)
+            lookups = ('gte', 'lte') if spec['kind'] == 'range' else ('exact',)
+            for param, lookup in zip(spec['params'], lookups):
+                raw = params.get(param, '').strip()
+                if not raw:
+                    continue
+                if spec['kind'] == 'choices' and raw not in (value for value, _label in spec['choices']):
+                    continue
+                try:
+                    value = self.converters[name](raw) if name in self.converters else raw
+                    if value is None:
+                        continue
+                    value = field.to_python(value)
+                except (ValueError, TypeError, InvalidOperation, ValidationError):
+                    continue
+                if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                queryset = queryset.filter(**{f'{name}__{lookup}': value})
+                active[param] = raw
+
+        query = ' '.join(params.get('q', '').split())[:100]
+        if query:
+            filtered = search_queryset(queryset, query, self.search_fields, self.numeric_pk)
+            queryset = filtered if filtered is not None else queryset.none()
+            active['q'] = query
+        return queryset, active
+
+    def convert(self, data):
+        """Приводит значения формы к типам полей; нераспознанное значение остаётся строкой для валидации."""
+        for field_name, convert in self.converters.items():
+            if data.get(field_name):
+                try:
+                    value = convert(data[field_name])
+                except (ValueError, TypeError, InvalidOperation):
+                    continue
+                if value is not None:
+                    data[field_name] = value
+        return data
+
+    def resolve_related(self, data):
+        """
+        Заменяет id внешних ключей в data связанными записями: один запрос
+        in_bulk на каждую целевую модель (аэропорты вылета и прилёта рейса —
+        одним запросом). Связанные записи остаются в объекте после присваивания,
+        поэтому save() (ключ секции билета) и аудит не читают их повторно.
+        Возвращает False, если какой-то записи нет.
+        """
+        wanted = {}
+        for field_name, related_model in self.fk_fields.items():
+            if data.get(field_name):
+                try:
+                    pk = related_model._meta.pk.to_python(data[field_name])
+                except ValidationError:
+                    return False
+                wanted.setdefault(related_model, {})[field_name] = pk
+        for related_model, fields in wanted.items():
+            found = related_model.objects.in_bulk(set(fields.values()))
+            for field_name, pk in fields.items():
+                if pk not in found:
+                    return False
+                data[field_name] = found[pk]
+        return True
+
+
+class Panel:
+    """Панель: роль, которой она доступна, и её таблицы (первая открывается по умолчанию)."""
+
+    __slots__ = ('key', 'role', 'title', 'url_name', 'tables', 'default_table', 'options')
+
+    def __init__(self, key, role, title, tables):
+        self.key = key
+        self.role = role
+        self.title = title
+        self.url_name = f'{key}_panel'
+        self.tables = {table.key: table for table in tables}
+        self.default_table = tables[0].key
+        # Списки выбора — для моделей, на которые ссылаются редактируемые таблицы панели
+        self.options = {}
+        for table in tables:
+            if table.readonly:
+                continue
+            for related_model in table.fk_fields.values():
+                self.options[related_model.__name__] = OPTION_SOURCES[related_model]
+
+    def writable_table(self, table_name):
+        table = self.tables.get(table_name)
+        return None if table is None or table.readonly else table
+
+
+TABLES = {table.key: table for table in (
+    PanelTable(Role, 'Роли', ['id_role', 'role_name']),
+    PanelTable(Account, 'Аккаунты', ['id_account', 'email', 'role_id', 'created_at']),
+    PanelTable(User, 'Пользователи',
+               ['id_user', 'account_id', 'first_name', 'last_name', 'patronymic', 'phone', 'passport_number', 'birthday']),
+    PanelTable(Airport, 'Аэропорты', ['id_airport', 'name', 'city', 'country']),
+    PanelTable(Airplane, 'Самолеты',
+               ['id_airplane', 'model', 'registration_number', 'capacity', 'economy_capacity', 'business_capacity',
+                'first_capacity', 'rows', 'seats_row']),
+    PanelTable(Flight, 'Рейсы',
+               ['id_flight', 'airplane_id', 'departure_airport_id', 'arrival_airport_id', 'departure_time',
+                'arrival_time', 'status']),
+    PanelTable(FlightSchedule, 'Расписания',
+               ['id_schedule', 'airplane_id', 'departure_airport_id', 'arrival_airport_id', 'days_of_week',
+                'departure_at', 'flight_minutes', 'valid_from', 'valid_to']),
+    PanelTable(Passenger, 'Пассажиры',
+               ['id_passenger', 'first_name', 'last_name', 'patronymic', 'passport_number', 'birthday']),
+    PanelTable(Class, 'Классы обслуживания', ['id_class', 'class_name', 'base_price']),
+    PanelTable(Payment, 'Платежи',
+               ['id_payment', 'user_id', 'payment_date', 'total_cost', 'payment_method', 'status']),
+    PanelTable(Ticket, 'Билеты',
+               ['id_ticket', 'flight_id', 'class_id', 'seat_number', 'price', 'status', 'passenger_id', 'payment_id'],
+               search_fields=('seat_number', 'passenger_id__last_name', 'passenger_id__passport_number')),
+    PanelTable(BaggageType, 'Типы багажа', ['id_baggage_type', 'type_name', 'max_weight_kg', 'description', 'base_price']),
+    PanelTable(Baggage, 'Багаж',
+               ['id_baggage', 'ticket_id', 'baggage_type_id', 'weight_kg', 'baggage_tag', 'status', 'registered_at']),
+    PanelTable(AuditLog, 'Журнал аудита',
+               ['id_audit', 'table_name', 'record_id', 'operation', 'changed_by', 'changed_at', 'old_data', 'new_data'],
+               readonly=True, search_fields=('table_name',)),
+    PanelTable(ArchivedTicket, 'Архивные билеты',
+               ['id_ticket', 'flight_id', 'class_id', 'seat_number', 'price', 'status', 'passenger_id', 'payment_id'],
+               readonly=True),
+)}
+
+
+PANELS = {
+    'admin': Panel('admin', 'ADMIN', 'панели администратора', list(TABLES.values())),
+    'manager': Panel('manager', 'MANAGER', 'панели менеджера', [
+        TABLES[name] for name in ('Flight', 'Passenger', 'Payment', 'Ticket', 'Baggage', 'ArchivedTicket')
+    ]),
+}
@@ -0,0 +1,75 @@
+"""
+Секционирование tickets и baggage по месяцу вылета (PostgreSQL).
+
+Ключ секции — flight_departure, копия времени вылета рейса (models.Ticket.save,
+триггеры scripts/partitions.sql). Секции создаются заранее командой
+ticket_partitions; если рейс добавлен за пределами созданных секций, секцию
+его месяца создаёт триггер рейсов.
+
+Запросы билетов одного рейса с условием на flight_departure (for_flight)
+читают одну секцию вместо всех. На других СУБД таблицы не секционированы,
+и условие не добавляется.
+"""
+from django.conf import settings
+from django.db import connection
+
+
+DEFAULT_MONTHS_AHEAD = 12
+
+
+def is_partitioned():
+    """tickets — секционированная таблица (PostgreSQL после миграции 0008)."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tickets')")
+        return cur.fetchone() is not None
+
+
+def months_ahead():
+    return getattr(settings, 'TICKET_PARTITION_MONTHS_AHEAD', DEFAULT_MONTHS_AHEAD)
+
+
+def ensure_partitions(months=None):
+    """Создаёт секции с текущего месяца на months месяцев вперёд. Возвращает число созданных таблиц."""
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cur:
+        cur.execute("SELECT ensure_ticket_partitions(NOW(), %s)", [months or months_ahead()])
+        return cur.fetchone()[0]
+
+
+def list_partitions():
+    """Секции tickets и baggage: [(таблица, секция, границы, оценка числа строк)]."""
+    if connection.vendor != 'postgresql':
+        return []
+    with connection.cursor() as cur:
+        cur.execute("""
+            SELECT parent.relname, child.relname,
+                   pg_get_expr(child.relpartbound, child.oid),
+                   GREATEST(child.reltuples, 0)::BIGINT
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname IN ('tickets', 'baggage')
+            ORDER BY parent.relname DESC, child.relname
+        """)
+        return cur.fetchall()
+
+
+def for_flight(queryset, flight):
+    """Билеты одного рейса: на PostgreSQL — только секция месяца его вылета."""
+    queryset = queryset.filter(flight_id=flight)
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(flight_departure=flight.departure_time)
+    return queryset
+
+
+def for_flights(queryset, flights):
+    """Билеты набора рейсов: на PostgreSQL — только секции от первого до последнего вылета."""
+    flights = list(flights)
+    queryset = queryset.filter(flight_id__in=[f.id_flight for f in flights])
+    if connection.vendor == 'postgresql' and flights:
+        departures = [f.departure_time for f in flights]
+        queryset = queryset.filter(flight_departure__range=(min(departures), max(departures)))
+    return queryset
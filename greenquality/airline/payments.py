@@ -0,0 +1,211 @@
+"""
+Асинхронная обработка платежей.
+
+Покупка билета создаёт платёж в статусе PENDING и сразу занимает место
+(билет BOOKED). Обработчик (команда process_payments) проводит пачку в три
+шага, не держа транзакцию открытой во время вызовов шлюза:
+
+1. Короткая транзакция забирает пачку ожидающих платежей: статус PROCESSING
+   и время захвата claimed_at.
+2. Вне транзакции платежи параллельно отправляются в шлюз через пул потоков;
+   ключ идемпотентности — id_payment, так что повторная отправка того же
+   платежа не спишет деньги второй раз.
+3. Вторая короткая транзакция применяет результаты к платежам, которые всё
+   ещё захвачены этим проходом: COMPLETED — билеты становятся PAID, FAILED —
+   места возвращаются в продажу.
+
+Если обработчик упал между шагами, платёж остаётся в PROCESSING; через
+PAYMENT_CLAIM_TIMEOUT секунд его забирает следующий проход.
+
+Шлюз подключается настройкой PAYMENT_GATEWAY (путь к классу и параметры)
+и создаётся один раз на процесс (get_gateway), чтобы повторный захват
+зависшего платежа попадал в тот же шлюз с тем же ключом идемпотентности.
+По умолчанию используется FakeGateway — локальный имитатор с настраиваемой
+задержкой и долей отказов.
+"""
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .audit_utils import log_audit_bulk
+from .cancellation import cancel_tickets
+from .models import Payment, Ticket
+
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_WORKERS = 4
+DEFAULT_CLAIM_TIMEOUT = 300
+
+
+class PaymentGateway(ABC):
+    """
+    Интерфейс платёжного шлюза. charge() вызывается из потоков пула вне
+    транзакции и не должна обращаться к БД: на вход — снимок платежа
+    {id_payment, total_cost, payment_method, user_id} и ключ идемпотентности,
+    на выходе — True (оплачено) или False (отказ). Повторный вызов с тем же
+    ключом должен вернуть прежний результат, не проводя оплату заново.
+    """
+
+    @abstractmethod
+    def charge(self, payment, idempotency_key):
+        """Проводит оплату платежа payment, True — оплачено."""
+
+
+class FakeGateway(PaymentGateway):
+    """Имитатор шлюза: задержка latency_ms (± jitter_ms) и доля отказов failure_rate."""
+
+    def __init__(self, latency_ms=200, jitter_ms=0, failure_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def charge(self, payment, idempotency_key):
+        with self._lock:
+            if idempotency_key in self._results:
+                return self._results[idempotency_key]
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        with self._lock:
+            return self._results.setdefault(idempotency_key, self._random.random() >= self.failure_rate)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """
+    Шлюз из настройки PAYMENT_GATEWAY = {'BACKEND': ..., 'OPTIONS': {...}}.
+    Экземпляр один на процесс: результаты по ключам идемпотентности (у
+    FakeGateway — в памяти экземпляра) сохраняются между проходами обработчика.
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            config = getattr(settings, 'PAYMENT_GATEWAY', {})
+            backend = import_string(config.get('BACKEND', 'airline.payments.FakeGateway'))
+            _gateway = backend(**config.get('OPTIONS', {}))
+        return _gateway
+
+
+@receiver(setting_changed)
+def _reset_gateway(setting, **kwargs):
+    # Смена настройки (override_settings в тестах) — шлюз создаётся заново
+    global _gateway
+    if setting == 'PAYMENT_GATEWAY':
+        with _gateway_lock:
+            _gateway = None
+
+
+def _charge_all(gateway, snapshots, workers):
+    """Параллельные вызовы шлюза; ошибка вызова считается отказом."""
+    def charge(snapshot):
+        try:
+            return bool(gateway.charge(snapshot, idempotency_key=snapshot['id_payment']))
+        except Exception:
+            return False
+
+    if workers <= 1 or len(snapshots) <= 1:
+        return [charge(s) for s in snapshots]
+    with ThreadPoolExecutor(max_workers=min(workers, len(snapshots))) as pool:
+        return list(pool.map(charge, snapshots))
+
+
+def _claim_batch(batch_size, claim_timeout):
+    """
+    Шаг 1: забирает пачку платежей PENDING и зависших в PROCESSING дольше
+    claim_timeout секунд. Возвращает (время захвата, снимки платежей).
+
+    Пачка выбирается через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    несколько обработчиков могут работать одновременно, не забирая одни и те же
+    платежи (на SQLite блокировка не поддерживается и пропускается).
+    """
+    claimed_at = timezone.now()
+    stale = Q(status='PROCESSING', claimed_at__lt=claimed_at - timedelta(seconds=claim_timeout))
+    with transaction.atomic():
+        snapshots = list(
+            Payment.objects.select_for_update(skip_locked=True).filter(Q(status='PENDING') | stale)
+            .order_by('id_payment')
+            .values('id_payment', 'total_cost', 'payment_method', 'user_id')[:batch_size]
+        )
+        if snapshots:
+            Payment.objects.filter(id_payment__in=[s['id_payment'] for s in snapshots]).update(
+                status='PROCESSING', claimed_at=claimed_at)
+    return claimed_at, snapshots
+
+
+def _apply_results(claimed_at, completed, failed):
+    """
+    Шаг 3: переводит платежи, которые всё ещё захвачены этим проходом
+    (PROCESSING с тем же claimed_at). Платёж, который за это время забрал
+    другой обработчик или перевела сверка, не трогается.
+    Возвращает (completed, failed) — фактически применённые id.
+    """
+    with transaction.atomic():
+        owned = set(
+            Payment.objects.select_for_update()
+            .filter(id_payment__in=completed + failed, status='PROCESSING', claimed_at=claimed_at)
+            .values_list('id_payment', flat=True)
+        )
+        completed = [pid for pid in completed if pid in owned]
+        failed = [pid for pid in failed if pid in owned]
+
+        if completed:
+            Payment.objects.filter(id_payment__in=completed).update(status='COMPLETED', claimed_at=None)
+            Ticket.objects.filter(payment_id__in=completed, status='BOOKED').update(status='PAID')
+        if failed:
+            Payment.objects.filter(id_payment__in=failed).update(status='FAILED', claimed_at=None)
+            # Места неоплаченных билетов возвращаются в продажу
+            failed_tickets = list(Ticket.objects.filter(
+                payment_id__in=failed, status='BOOKED').values_list('id_ticket', flat=True))
+            if failed_tickets:
+                cancel_tickets(failed_tickets)
+
+        log_audit_bulk(
+            [('Payment', pid, 'UPDATE', {'status': 'PROCESSING'}, {'status': 'COMPLETED'})
+             for pid in completed]
+            + [('Payment', pid, 'UPDATE', {'status': 'PROCESSING'}, {'status': 'FAILED'})
+               for pid in failed]
+        )
+    return completed, failed
+
+
+def process_pending_payments(batch_size=None, workers=None, gateway=None, claim_timeout=None):
+    """
+    Обрабатывает одну пачку платежей PENDING. Возвращает
+    {'processed': n, 'completed': [id...], 'failed': [id...]}.
+
+    Транзакции открыты только на захват пачки и на запись результатов, вызовы
+    шлюза идут между ними — блокировки строк payments не держатся всё время
+    ожидания ответа шлюза.
+    """
+    batch_size = batch_size or getattr(settings, 'PAYMENT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    workers = workers or getattr(settings, 'PAYMENT_WORKERS', DEFAULT_WORKERS)
+    claim_timeout = claim_timeout or getattr(settings, 'PAYMENT_CLAIM_TIMEOUT', DEFAULT_CLAIM_TIMEOUT)
+    gateway = gateway or get_gateway()
+
+    claimed_at, snapshots = _claim_batch(batch_size, claim_timeout)
+    if not snapshots:
+        return {'processed': 0, 'completed': [], 'failed': []}
+
+    results = _charge_all(gateway, snapshots, workers)
+    completed = [s['id_payment'] for s, ok in zip(snapshots, results) if ok]
+    failed = [s['id_payment'] for s, ok in zip(snapshots, results) if not ok]
+
+    completed, failed = _apply_results(claimed_at, completed, failed)
+    return {'processed': len(completed) + len(failed), 'completed': completed, 'failed': failed}
@@ -0,0 +1,124 @@
+"""
+Принципал запроса: аккаунт из сессии, его роль и связанный пользователь.
+
+PrincipalMiddleware (airline/middleware.py) определяет принципал один раз
+за запрос и кладёт его в request.principal — контекстный процессор, права
+API и панели берут роль оттуда, а не запросами Account + Role в каждом месте.
+
+Принципалы кешируются в кеше Django (CACHES) на PRINCIPAL_CACHE_TTL секунд,
+размер кеша ограничивает его бэкенд (MAX_ENTRIES памяти процесса, maxmemory
+Redis). Ключи записей содержат номер версии: при сохранении и удалении
+аккаунтов, ролей и пользователей (сигналы ниже) и при массовых изменениях
+панели (clear_principal_cache) версия меняется, и все процессы с общим кешем
+перестают видеть старые записи. Изменения в обход ORM (SQL, .update() без
+clear_principal_cache) видны после истечения TTL.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Account, Role, User
+
+
+DEFAULT_CACHE_TTL = 30
+
+KEY_PREFIX = 'principal'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+
+# Модели, от которых зависит принципал: их изменение сбрасывает кеш
+PRINCIPAL_MODELS = (Account, Role, User)
+
+
+class Principal:
+    """Кто выполняет запрос."""
+
+    __slots__ = ('account_id', 'role_name', 'user_id')
+
+    def __init__(self, account_id, role_name, user_id):
+        self.account_id = account_id
+        self.role_name = role_name
+        self.user_id = user_id
+
+    # Для DRF: Principal из токена API служит request.user
+    is_authenticated = True
+
+    @property
+    def is_admin(self):
+        return self.role_name == 'ADMIN'
+
+    @property
+    def is_manager(self):
+        return self.role_name == 'MANAGER'
+
+    def __repr__(self):
+        return f"Principal(account_id={self.account_id}, role_name={self.role_name!r}, user_id={self.user_id})"
+
+
+def cache_ttl():
+    return getattr(settings, 'PRINCIPAL_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+
+def _cache_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Версия вытеснена или ещё не задана: новое значение не совпадает с прежними
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def resolve_principal(account_id):
+    """Принципал аккаунта (одним запросом или из кеша); None, если аккаунта нет."""
+    if not account_id:
+        return None
+    key = f'{KEY_PREFIX}:{_cache_version()}:{account_id}'
+    row = cache.get(key)
+    if row is None:
+        row = (Account.objects.filter(id_account=account_id)
+               .values_list('role_id__role_name', 'user__id_user').first())
+        # Отсутствующий аккаунт кешируется пустым кортежем, чтобы не путать с промахом
+        row = tuple(row) if row else ()
+        cache.set(key, row, timeout=cache_ttl())
+    return Principal(account_id, *row) if row else None
+
+
+def get_principal(request):
+    """
+    Принципал запроса для страниц, где вход обязателен. Если аккаунт из сессии
+    не найден — Account.DoesNotExist, как у Account.objects.get.
+    """
+    principal = getattr(request, 'principal', None)
+    if principal is None:
+        principal = resolve_principal(request.session.get('account_id'))
+    if principal is None:
+        raise Account.DoesNotExist('Аккаунт не найден')
+    return principal
+
+
+def clear_principal_cache():
+    """Сбрасывает кеш принципалов: новая версия ключей, старые записи истекут по TTL."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def clear_principal_cache_for(model):
+    """
+    Сброс кеша после изменений модели в обход сигналов (QuerySet.update,
+    массовые операции панели): только для моделей из PRINCIPAL_MODELS.
+    """
+    if model in PRINCIPAL_MODELS:
+        clear_principal_cache()
+
+
+@receiver([post_save, post_delete], sender=Account)
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=User)
+def _invalidate_principals(sender, **kwargs):
+    # Смена роли затрагивает всех её владельцев — проще сбросить кеш целиком
+    clear_principal_cache()
+
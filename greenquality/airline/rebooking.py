@@ -0,0 +1,193 @@
+"""
+Массовая пересадка пассажиров с отменённого рейса.
+
+Для отменённого рейса подбираются рейсы по тому же маршруту в заданном
+окне времени (ближайшие по времени вылета — первыми), и каждому билету
+PAID/BOOKED назначается свободное место того же класса обслуживания.
+План строится в памяти по трём запросам; применение — одна транзакция
+на целевой рейс: bulk_update билетов и один bulk_create записей аудита.
+"""
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .audit_utils import log_audit_bulk
+from .models import Flight, Ticket
+from .partitions import for_flight, for_flights
+from .seat_layout import OCCUPIED_STATUSES, SeatLayout
+
+
+REBOOK_STATUSES = ('PAID', 'BOOKED')
+TARGET_FLIGHT_STATUSES = ('SCHEDULED', 'DELAYED')
+DEFAULT_WINDOW_HOURS = 48
+
+
+class RebookingError(Exception):
+    """Пересадка невозможна (рейс не найден или не отменён)."""
+
+
+def _candidate_flights(flight, window):
+    """
+    Ещё не вылетевшие рейсы того же маршрута в окне ±window, ближайшие по
+    времени — первыми.
+    """
+    candidates = list(
+        Flight.objects.select_related('airplane_id').filter(
+            departure_airport_id=flight.departure_airport_id_id,
+            arrival_airport_id=flight.arrival_airport_id_id,
+            status__in=TARGET_FLIGHT_STATUSES,
+            departure_time__gte=flight.departure_time - window,
+            departure_time__lte=flight.departure_time + window,
+            departure_time__gt=timezone.now(),
+        ).exclude(id_flight=flight.id_flight)
+    )
+    candidates.sort(key=lambda f: abs(f.departure_time - flight.departure_time))
+    return candidates
+
+
+def plan_rebooking(flight_id, window_hours=DEFAULT_WINDOW_HOURS):
+    """
+    Строит план пересадки без изменений в БД.
+
+    Возвращает словарь:
+      flight_id — исходный рейс;
+      moves — список {ticket_id, class_name, from_seat, to_flight_id, to_seat, placeholder_id};
+      unplaced — список {ticket_id, class_name, seat_number} для билетов без места;
+      candidates — id рассмотренных рейсов.
+    """
+    try:
+        flight = Flight.objects.get(id_flight=flight_id)
+    except Flight.DoesNotExist:
+        raise RebookingError('Рейс не найден')
+    if flight.status != 'CANCELLED':
+        raise RebookingError('Пересадка возможна только с отменённого рейса')
+
+    # Билеты к пересадке, сгруппированные по классу; внутри платежа — подряд
+    pending = defaultdict(deque)
+    for row in for_flight(Ticket.objects, flight).filter(
+        status__in=REBOOK_STATUSES
+    ).order_by('payment_id', 'seat_number').values(
+        'id_ticket', 'seat_number', 'class_id__class_name'
+    ):
+        pending[row['class_id__class_name']].append(row)
+
+    candidates = _candidate_flights(flight, timedelta(hours=window_hours))
+    candidate_ids = [f.id_flight for f in candidates]
+
+    # Занятые места и свободные «заготовки» билетов (AVAILABLE) — два запроса на все рейсы
+    blocked = defaultdict(set)
+    placeholders = {}
+    for target_id, seat, status, ticket_id in for_flights(Ticket.objects, candidates).values_list('flight_id', 'seat_number', 'status', 'id_ticket'):
+        if status == 'AVAILABLE':
+            placeholders[(target_id, seat)] = ticket_id
+        else:
+            blocked[target_id].add(seat)
+
+    moves = []
+    for target in candidates:
+        if not any(pending.values()):
+            break
+        layout = SeatLayout.for_airplane(target.airplane_id)
+        taken = blocked[target.id_flight]
+        for class_name, queue in pending.items():
+            if not queue:
+                continue
+            for seat in layout.seats(class_name):
+                if not queue:
+                    break
+                if seat in taken:
+                    continue
+                ticket = queue.popleft()
+                taken.add(seat)
+                moves.append({
+                    'ticket_id': ticket['id_ticket'],
+                    'class_name': class_name,
+                    'from_seat': ticket['seat_number'],
+                    'to_flight_id': target.id_flight,
+                    'to_seat': seat,
+                    'placeholder_id': placeholders.get((target.id_flight, seat)),
+                })
+
+    unplaced = [
+        {'ticket_id': t['id_ticket'], 'class_name': class_name, 'seat_number': t['seat_number']}
+        for class_name, queue in pending.items() for t in queue
+    ]
+    return {
+        'flight_id': flight.id_flight,
+        'moves': moves,
+        'unplaced': unplaced,
+        'candidates': candidate_ids,
+    }
+
+
+def _apply_to_target(source_flight_id, target_id, moves, changed_by_account_id):
+    """Переносит билеты на один рейс в одной транзакции. Возвращает (перенесённые, отклонённые)."""
+    with transaction.atomic():
+        # Блокируем целевой рейс, чтобы параллельная покупка не заняла те же места
+        target = Flight.objects.select_for_update().get(id_flight=target_id)
+        taken = set(
+            for_flight(Ticket.objects, target).filter(
+                status__in=OCCUPIED_STATUSES + ('CANCELLED',)
+            ).values_list('seat_number', flat=True)
+        )
+        accepted = [m for m in moves if m['to_seat'] not in taken]
+        rejected = [m for m in moves if m['to_seat'] in taken]
+        if not accepted:
+            return [], rejected
+
+        # Заготовки AVAILABLE на назначенных местах освобождают пару (рейс, место)
+        for_flight(Ticket.objects, target).filter(
+            seat_number__in=[m['to_seat'] for m in accepted],
+            status='AVAILABLE',
+        ).delete()
+
+        tickets = []
+        for m in accepted:
+            ticket = Ticket(id_ticket=m['ticket_id'], seat_number=m['to_seat'],
+                            flight_departure=target.departure_time)
+            ticket.flight_id_id = target_id
+            tickets.append(ticket)
+        # Смена flight_departure переносит билет (и по FK его багаж) в секцию нового рейса
+        Ticket.objects.bulk_update(tickets, ['flight_id', 'seat_number', 'flight_departure'], batch_size=500)
+
+        log_audit_bulk(
+            (
+                (
+                    'Ticket', m['ticket_id'], 'UPDATE',
+                    {'flight_id': source_flight_id, 'seat_number': m['from_seat']},
+                    {'flight_id': target_id, 'seat_number': m['to_seat']},
+                )
+                for m in accepted
+            ),
+            changed_by_account_id,
+        )
+    return accepted, rejected
+
+
+def rebook_cancelled_flight(flight_id, window_hours=DEFAULT_WINDOW_HOURS, dry_run=False,
+                            changed_by_account_id=None):
+    """
+    Пересаживает пассажиров отменённого рейса на альтернативные рейсы.
+    При dry_run=True только возвращает план (см. plan_rebooking).
+    """
+    plan = plan_rebooking(flight_id, window_hours)
+    plan['dry_run'] = dry_run
+    if dry_run:
+        return plan
+
+    by_target = defaultdict(list)
+    for move in plan['moves']:
+        by_target[move['to_flight_id']].append(move)
+
+    applied = []
+    for target_id, moves in by_target.items():
+        accepted, rejected = _apply_to_target(plan['flight_id'], target_id, moves, changed_by_account_id)
+        applied.extend(accepted)
+        plan['unplaced'].extend(
+            {'ticket_id': m['ticket_id'], 'class_name': m['class_name'], 'seat_number': m['from_seat']}
+            for m in rejected
+        )
+    plan['moves'] = applied
+    return plan
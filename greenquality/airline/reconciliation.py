@@ -0,0 +1,237 @@
+"""
+Сверка платежей с файлом расчётов платёжного шлюза.
+
+Файл расчётов — CSV с заголовком payment_id,amount,status,reference, где
+status — SETTLED (оплачен), DECLINED (отклонён) или REFUNDED (возвращён).
+Файл загружается во временную таблицу (на PostgreSQL — через COPY, потоком),
+сверяется с таблицей payments одним JOIN, отчёт о расхождениях выгружается
+из БД построчно, статусы меняются пакетными UPDATE, аудит изменённых
+платежей пишется пачками по LOAD_CHUNK_SIZE (запись на платёж). Память
+процесса не зависит от размера файла.
+
+Результат сверки для каждого payment_id:
+  MATCHED          — сумма и статус совпадают;
+  STATUS_UPDATE    — допустимый переход статуса, применяется;
+  STATUS_CONFLICT  — статус в файле противоречит статусу платежа;
+  AMOUNT_MISMATCH  — сумма не совпадает;
+  UNKNOWN_PAYMENT  — платежа нет в БД;
+  UNKNOWN_STATUS   — неизвестный статус в файле;
+  DUPLICATE        — payment_id встречается в файле несколько раз.
+"""
+import csv
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .audit_utils import log_audit_bulk
+from .inventory import is_lazy
+from .seat_layout import OCCUPIED_STATUSES
+
+
+SETTLEMENT_COLUMNS = ('payment_id', 'amount', 'status', 'reference')
+
+# Статус в файле расчётов -> статус платежа
+SETTLEMENT_STATUS_MAP = {
+    'SETTLED': 'COMPLETED',
+    'DECLINED': 'FAILED',
+    'REFUNDED': 'REFUNDED',
+}
+
+# Переходы, которые сверка применяет автоматически: (текущий, из файла)
+ALLOWED_TRANSITIONS = (
+    ('PENDING', 'COMPLETED'),
+    ('PENDING', 'FAILED'),
+    ('PROCESSING', 'COMPLETED'),
+    ('PROCESSING', 'FAILED'),
+    ('COMPLETED', 'REFUNDED'),
+)
+
+# Результаты, попадающие в отчёт о расхождениях
+DISCREPANCY_RESULTS = (
+    'STATUS_CONFLICT', 'AMOUNT_MISMATCH', 'UNKNOWN_PAYMENT', 'UNKNOWN_STATUS', 'DUPLICATE',
+)
+
+REPORT_COLUMNS = (
+    'payment_id', 'amount', 'settlement_status', 'reference',
+    'total_cost', 'payment_status', 'result',
+)
+
+LOAD_CHUNK_SIZE = 5000
+
+
+def _expected_status_sql():
+    cases = ' '.join(f"WHEN '{src}' THEN '{dst}'" for src, dst in SETTLEMENT_STATUS_MAP.items())
+    return f"CASE s.status {cases} END"
+
+
+def _result_sql():
+    expected = _expected_status_sql()
+    transitions = ' OR '.join(
+        f"(p.status = '{cur}' AND {expected} = '{new}')" for cur, new in ALLOWED_TRANSITIONS)
+    return f"""
+        CASE
+            WHEN s.lines > 1 THEN 'DUPLICATE'
+            WHEN p.id_payment IS NULL THEN 'UNKNOWN_PAYMENT'
+            WHEN {expected} IS NULL THEN 'UNKNOWN_STATUS'
+            WHEN p.total_cost <> s.amount THEN 'AMOUNT_MISMATCH'
+            WHEN p.status = {expected} THEN 'MATCHED'
+            WHEN {transitions} THEN 'STATUS_UPDATE'
+            ELSE 'STATUS_CONFLICT'
+        END
+    """
+
+
+def _load_staging(cur, path):
+    """Загружает файл расчётов в settlement_staging; возвращает число строк."""
+    columns = ', '.join(SETTLEMENT_COLUMNS)
+    if connection.vendor == 'postgresql':
+        with open(path, encoding='utf-8') as f:
+            cur.copy_expert(
+                f"COPY settlement_staging ({columns}) FROM STDIN WITH (FORMAT csv, HEADER true)", f)
+    else:
+        placeholders = ', '.join(['%s'] * len(SETTLEMENT_COLUMNS))
+        sql = f"INSERT INTO settlement_staging ({columns}) VALUES ({placeholders})"
+        with open(path, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            while True:
+                chunk = [row + [None] * (len(SETTLEMENT_COLUMNS) - len(row))
+                         for row in islice(reader, LOAD_CHUNK_SIZE)]
+                if not chunk:
+                    break
+                cur.executemany(sql, chunk)
+    cur.execute("SELECT COUNT(*) FROM settlement_staging")
+    return cur.fetchone()[0]
+
+
+def _write_report(cur, report_path):
+    """Выгружает расхождения в CSV; возвращает число строк отчёта."""
+    columns = ', '.join(REPORT_COLUMNS)
+    results = ', '.join(f"'{r}'" for r in DISCREPANCY_RESULTS)
+    query = (f"SELECT {columns} FROM settlement_result "
+             f"WHERE result IN ({results}) ORDER BY payment_id")
+    with open(report_path, 'w', encoding='utf-8', newline='') as f:
+        if connection.vendor == 'postgresql':
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", f)
+        else:
+            writer = csv.writer(f)
+            writer.writerow(REPORT_COLUMNS)
+            cur.execute(query)
+            while True:
+                rows = cur.fetchmany(LOAD_CHUNK_SIZE)
+                if not rows:
+                    break
+                writer.writerows(rows)
+    cur.execute(f"SELECT COUNT(*) FROM settlement_result WHERE result IN ({results})")
+    return cur.fetchone()[0]
+
+
+def _apply_updates(cur):
+    """Пакетно меняет статусы платежей и билетов по результатам сверки."""
+    cur.execute("""
+        UPDATE payments SET status = r.expected_status, claimed_at = NULL
+        FROM settlement_result r
+        WHERE payments.id_payment = r.payment_id AND r.result = 'STATUS_UPDATE'
+    """)
+    payments_updated = cur.rowcount
+
+    cur.execute("""
+        UPDATE tickets SET status = 'PAID'
+        WHERE status = 'BOOKED' AND payment_id IN (
+            SELECT payment_id FROM settlement_result
+            WHERE result = 'STATUS_UPDATE' AND expected_status = 'COMPLETED')
+    """)
+    tickets_paid = cur.rowcount
+
+    # Отклонённые и возвращённые платежи освобождают места (как cancellation._release)
+    released = """
+        SELECT payment_id FROM settlement_result
+        WHERE result = 'STATUS_UPDATE' AND expected_status IN ('FAILED', 'REFUNDED')
+    """
+    occupied = ', '.join(f"'{s}'" for s in OCCUPIED_STATUSES)
+    cur.execute(f"""
+        DELETE FROM baggage WHERE ticket_id IN (
+            SELECT id_ticket FROM tickets
+            WHERE status IN ({occupied}) AND payment_id IN ({released}))
+    """)
+    if is_lazy():
+        cur.execute(f"DELETE FROM tickets WHERE status IN ({occupied}) AND payment_id IN ({released})")
+    else:
+        cur.execute(f"""
+            UPDATE tickets SET status = 'AVAILABLE', price = 0, passenger_id = NULL, payment_id = NULL
+            WHERE status IN ({occupied}) AND payment_id IN ({released})
+        """)
+    tickets_released = cur.rowcount
+    return payments_updated, tickets_paid, tickets_released
+
+
+def _audit_updates(cur, path, changed_by_account_id):
+    """Аудит применённых переходов: запись на каждый платёж, пачками по LOAD_CHUNK_SIZE."""
+    last_id = 0
+    while True:
+        cur.execute("""
+            SELECT payment_id, payment_status, expected_status, reference FROM settlement_result
+            WHERE result = 'STATUS_UPDATE' AND payment_id > %s
+            ORDER BY payment_id LIMIT %s
+        """, [last_id, LOAD_CHUNK_SIZE])
+        rows = cur.fetchall()
+        if not rows:
+            break
+        log_audit_bulk((
+            ('Payment', payment_id, 'UPDATE', {'status': old},
+             {'status': new, 'reconciliation': str(path), 'reference': reference})
+            for payment_id, old, new, reference in rows
+        ), changed_by_account_id)
+        last_id = rows[-1][0]
+
+
+def reconcile_settlement(path, report_path, apply=True, changed_by_account_id=None):
+    """
+    Сверяет файл расчётов с платежами. Возвращает сводку:
+    lines, results ({результат: число payment_id}), discrepancies,
+    payments_updated, tickets_paid, tickets_released, applied.
+    """
+    summary = {
+        'lines': 0, 'results': {}, 'discrepancies': 0, 'payments_updated': 0,
+        'tickets_paid': 0, 'tickets_released': 0, 'applied': apply,
+    }
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS settlement_staging")
+        cur.execute("DROP TABLE IF EXISTS settlement_result")
+        cur.execute("""
+            CREATE TEMP TABLE settlement_staging (
+                payment_id BIGINT,
+                amount NUMERIC(10, 2),
+                status VARCHAR(20),
+                reference VARCHAR(100)
+            )
+        """)
+        summary['lines'] = _load_staging(cur, path)
+
+        # Один JOIN: файл (сгруппированный по payment_id) против payments
+        cur.execute(f"""
+            CREATE TEMP TABLE settlement_result AS
+            SELECT s.payment_id, s.amount, s.status AS settlement_status, s.reference,
+                   p.total_cost, p.status AS payment_status,
+                   {_expected_status_sql()} AS expected_status,
+                   {_result_sql()} AS result
+            FROM (
+                SELECT payment_id, MIN(amount) AS amount, MIN(status) AS status,
+                       MIN(reference) AS reference, COUNT(*) AS lines
+                FROM settlement_staging GROUP BY payment_id
+            ) s
+            LEFT JOIN payments p ON p.id_payment = s.payment_id
+        """)
+        cur.execute("SELECT result, COUNT(*) FROM settlement_result GROUP BY result")
+        summary['results'] = dict(cur.fetchall())
+        summary['discrepancies'] = _write_report(cur, report_path)
+
+        if apply:
+            (summary['payments_updated'], summary['tickets_paid'],
+             summary['tickets_released']) = _apply_updates(cur)
+            _audit_updates(cur, path, changed_by_account_id)
+
+        # Временные таблицы удаляются сразу; при ошибке их создание откатится вместе с транзакцией
+        cur.execute("DROP TABLE settlement_result")
+        cur.execute("DROP TABLE settlement_staging")
+    return summary
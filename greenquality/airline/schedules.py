@@ -0,0 +1,149 @@
+"""
+Создание рейсов по регулярному расписанию (FlightSchedule).
+
+Расписание разворачивается в список вылетов на период действия, вылеты
+проверяются на пересечение с рейсами того же самолёта (один запрос на весь
+период), рейсы создаются одним bulk_create в транзакции. Места всех новых
+рейсов создаются одним INSERT ... SELECT (airline/inventory.py) — построчная
+генерация триггером на время вставки отключается.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .audit_utils import log_audit
+from .inventory import is_lazy, materialize_seats
+from .models import Flight
+
+
+# Рейсы в этих статусах не занимают самолёт
+INACTIVE_FLIGHT_STATUSES = ('CANCELLED',)
+
+
+class ScheduleError(Exception):
+    """Некорректное расписание."""
+
+
+def parse_days_of_week(value):
+    """'135' / '1,3,5' -> {1, 3, 5} (ISO: 1 — понедельник)."""
+    days = {int(ch) for ch in str(value or '') if ch.isdigit()}
+    if not days or not days <= set(range(1, 8)):
+        raise ScheduleError('Дни недели задаются цифрами от 1 (пн) до 7 (вс)')
+    return days
+
+
+def expand_schedule(schedule):
+    """Список (вылет, прилёт) по расписанию; время — в часовом поясе проекта."""
+    days = parse_days_of_week(schedule.days_of_week)
+    if schedule.valid_from > schedule.valid_to:
+        raise ScheduleError('Начало периода позже окончания')
+    if not schedule.flight_minutes:
+        raise ScheduleError('Длительность рейса должна быть больше нуля')
+
+    tz = timezone.get_current_timezone()
+    duration = timedelta(minutes=schedule.flight_minutes)
+    slots = []
+    day = schedule.valid_from
+    while day <= schedule.valid_to:
+        if day.isoweekday() in days:
+            departure = timezone.make_aware(datetime.combine(day, schedule.departure_at), tz)
+            slots.append((departure, departure + duration))
+        day += timedelta(days=1)
+    return slots
+
+
+def find_conflicts(airplane_id, slots):
+    """
+    Вылеты, пересекающиеся с рейсами самолёта или друг с другом.
+    Один запрос за весь период; проверка — бинарный поиск по отсортированным рейсам.
+    """
+    if not slots:
+        return []
+    busy = sorted(
+        Flight.objects.filter(
+            airplane_id=airplane_id,
+            departure_time__lt=slots[-1][1],
+            arrival_time__gt=slots[0][0],
+        ).exclude(status__in=INACTIVE_FLIGHT_STATUSES).values_list('departure_time', 'arrival_time')
+    )
+    starts = [start for start, _end in busy]
+    # max_end[k] — самый поздний прилёт среди первых k рейсов (по времени вылета)
+    max_end = [None]
+    for _start, end in busy:
+        max_end.append(end if max_end[-1] is None else max(max_end[-1], end))
+
+    conflicts = []
+    previous_end = None
+    for departure, arrival in slots:
+        # Рейсы, вылетевшие до нашего прилёта, пересекаются, если хоть один прилетает после вылета
+        latest = max_end[bisect_left(starts, arrival)]
+        if (latest and latest > departure) or (previous_end and previous_end > departure):
+            conflicts.append((departure, arrival))
+        previous_end = arrival
+    return conflicts
+
+
+def generate_schedule_flights(schedule, skip_conflicts=False, dry_run=False, changed_by_account_id=None):
+    """
+    Создаёт рейсы по расписанию. При пересечениях с рейсами самолёта без
+    skip_conflicts ничего не создаётся. Возвращает сводку
+    {slots, created, conflicts, seats, dry_run}.
+    """
+    slots = expand_schedule(schedule)
+    conflicts = find_conflicts(schedule.airplane_id_id, slots)
+    report = {
+        'slots': len(slots),
+        'created': [],
+        'conflicts': [(d.isoformat(), a.isoformat()) for d, a in conflicts],
+        'seats': 0,
+        'dry_run': dry_run,
+    }
+    if dry_run or (conflicts and not skip_conflicts) or not slots:
+        return report
+
+    conflict_set = set(conflicts)
+    flights = [
+        Flight(
+            airplane_id_id=schedule.airplane_id_id,
+            departure_airport_id_id=schedule.departure_airport_id_id,
+            arrival_airport_id_id=schedule.arrival_airport_id_id,
+            departure_time=departure,
+            arrival_time=arrival,
+            status='SCHEDULED',
+        )
+        for departure, arrival in slots if (departure, arrival) not in conflict_set
+    ]
+
+    with transaction.atomic():
+        previous_mode = None
+        if connection.vendor == 'postgresql':
+            # Триггер не создаёт места по одному рейсу — ниже одна вставка на все рейсы
+            with connection.cursor() as cur:
+                cur.execute("SELECT current_setting('greenquality.ticket_inventory', true)")
+                previous_mode = cur.fetchone()[0] or ''
+                cur.execute("SELECT set_config('greenquality.ticket_inventory', 'lazy', true)")
+        created = Flight.objects.bulk_create(flights, batch_size=500)
+        if previous_mode is not None:
+            with connection.cursor() as cur:
+                cur.execute("SELECT set_config('greenquality.ticket_inventory', %s, true)", [previous_mode])
+
+        ids = [f.id_flight for f in created if f.id_flight is not None]
+        if len(ids) != len(created):
+            # СУБД без RETURNING для bulk_create — находим созданные рейсы по времени вылета
+            ids = list(Flight.objects.filter(
+                airplane_id=schedule.airplane_id_id,
+                departure_time__in=[f.departure_time for f in flights],
+            ).values_list('id_flight', flat=True))
+        if not is_lazy():
+            report['seats'] = materialize_seats(ids)
+
+        log_audit('FlightSchedule', schedule.id_schedule, 'UPDATE', changed_by_account_id, None, {
+            'generated_flights': len(ids),
+            'skipped_conflicts': len(conflicts),
+            'first_flight_id': min(ids) if ids else None,
+            'last_flight_id': max(ids) if ids else None,
+        })
+    report['created'] = sorted(ids)
+    return report
@@ -0,0 +1,185 @@
+"""
+Схема салона самолёта: буквы мест, деление ряда на левую/правую сторону
+и распределение рядов по классам обслуживания (FIRST → BUSINESS → ECONOMY).
+Используется картой мест, пересадкой пассажиров и генерацией билетов.
+
+Для подбора мест группе занятость салона хранится компактно: по одному
+целому числу на ряд, бит i — место с i-й буквой. Проверка свободного блока
+из k мест — одна битовая операция, поэтому подбор по всему самолёту
+укладывается в десятки микросекунд.
+"""
+from math import ceil
+
+
+SEAT_LETTERS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
+DEFAULT_ROWS = 30
+DEFAULT_SEATS_ROW = 6
+
+# Статусы билетов, при которых место считается занятым
+OCCUPIED_STATUSES = ('BOOKED', 'PAID', 'CHECKED_IN')
+
+# Сколько вариантов рассадки группы возвращать по умолчанию
+DEFAULT_BLOCK_LIMIT = 5
+
+
+class SeatLayout:
+    """Раскладка мест одного самолёта."""
+
+    def __init__(self, rows=None, seats_row=None, first_capacity=None, business_capacity=None):
+        self.rows = rows or DEFAULT_ROWS
+        self.seats_row = seats_row or DEFAULT_SEATS_ROW
+        self.letters = SEAT_LETTERS[:min(self.seats_row, len(SEAT_LETTERS))]
+
+        # Деление на стороны — как на карте мест (A-B-C | D-E-F)
+        if len(self.letters) > 3:
+            half = len(self.letters) // 2
+            self.left_letters = self.letters[:half]
+            self.right_letters = self.letters[half:]
+        else:
+            self.left_letters = self.letters[:3]
+            self.right_letters = self.letters[3:]
+        self._letter_index = {letter: i for i, letter in enumerate(self.letters)}
+        # Стороны ряда как полуинтервалы индексов букв: [(0, 3), (3, 6)]
+        split = len(self.left_letters)
+        self.sides = [(lo, hi) for lo, hi in ((0, split), (split, len(self.letters))) if hi > lo]
+
+        # Зоны классов: первые ряды — FIRST, затем BUSINESS, остальные — ECONOMY
+        per_row = len(self.letters) or 1
+        self.first_rows = min(self.rows, ceil((first_capacity or 0) / per_row))
+        self.business_rows = min(
+            self.rows - self.first_rows, ceil((business_capacity or 0) / per_row))
+
+    @classmethod
+    def for_airplane(cls, airplane):
+        return cls(
+            rows=airplane.rows,
+            seats_row=airplane.seats_row,
+            first_capacity=airplane.first_capacity,
+            business_capacity=airplane.business_capacity,
+        )
+
+    @property
+    def total_seats(self):
+        return self.rows * len(self.letters)
+
+    def class_for_row(self, row):
+        """Класс обслуживания для номера ряда (с 1)."""
+        if row <= self.first_rows:
+            return 'FIRST'
+        if row <= self.first_rows + self.business_rows:
+            return 'BUSINESS'
+        return 'ECONOMY'
+
+    def rows_for_class(self, class_name):
+        """Диапазон рядов класса; если зона класса пуста — пустой range."""
+        if class_name == 'FIRST':
+            return range(1, self.first_rows + 1)
+        if class_name == 'BUSINESS':
+            start = self.first_rows + 1
+            return range(start, start + self.business_rows)
+        if class_name == 'ECONOMY':
+            return range(self.first_rows + self.business_rows + 1, self.rows + 1)
+        return range(1, self.rows + 1)
+
+    def seats(self, class_name=None):
+        """Номера мест по порядку (спереди назад); class_name — фильтр по зоне."""
+        rows = self.rows_for_class(class_name) if class_name else range(1, self.rows + 1)
+        for row in rows:
+            for letter in self.letters:
+                yield f"{row}{letter}"
+
+    def class_for_seat(self, seat_number):
+        row, _letter = parse_seat(seat_number)
+        return self.class_for_row(row) if row else None
+
+    def occupancy(self, occupied_seats):
+        """
+        Битовые маски занятости по рядам: masks[row] (ряды с 1, masks[0] не
+        используется), бит i установлен, если занято место с буквой letters[i].
+        Номера мест вне схемы салона игнорируются.
+        """
+        masks = [0] * (self.rows + 1)
+        index = self._letter_index
+        for seat_number in occupied_seats:
+            row, letter = parse_seat(seat_number)
+            if row and row <= self.rows and letter in index:
+                masks[row] |= 1 << index[letter]
+        return masks
+
+    def recommend_seat_blocks(self, masks, party_size, class_name=None, limit=DEFAULT_BLOCK_LIMIT):
+        """
+        Варианты рассадки группы из party_size человек рядом.
+
+        masks — результат occupancy(). Порядок предпочтения:
+          row — подряд в одном ряду по одну сторону прохода;
+          row_aisle — в одном ряду через проход;
+          rows — два соседних ряда (спереди/сзади), места друг под другом.
+        Внутри каждого вида — от передних рядов к задним. Возвращает список
+        словарей {'kind': ..., 'seats': [...]}, не длиннее limit.
+        """
+        width = len(self.letters)
+        if party_size < 1 or not width:
+            return []
+        rows = self.rows_for_class(class_name) if class_name else range(1, self.rows + 1)
+        blocks = []
+        seen = set()
+
+        def add(kind, seats):
+            key = frozenset(seats)
+            if key not in seen:
+                seen.add(key)
+                blocks.append({'kind': kind, 'seats': seats})
+            return len(blocks) >= limit
+
+        def free_starts(mask, lo, hi, size):
+            window = (1 << size) - 1
+            for start in range(lo, hi - size + 1):
+                if not mask & (window << start):
+                    yield start
+
+        # 1. Один ряд, одна сторона
+        for row in rows:
+            for lo, hi in self.sides:
+                for start in free_starts(masks[row], lo, hi, party_size):
+                    if add('row', self._block(row, start, party_size)):
+                        return blocks
+
+        # 2. Один ряд через проход (блоки, целиком лежащие по одну сторону, уже учтены)
+        if len(self.sides) > 1:
+            split = self.sides[1][0]
+            for row in rows:
+                for start in free_starts(masks[row], 0, width, party_size):
+                    if start < split < start + party_size:
+                        if add('row_aisle', self._block(row, start, party_size)):
+                            return blocks
+
+        # 3. Два соседних ряда: передняя часть группы — в ряду row, остальные — за ними
+        if party_size > 1:
+            front = (party_size + 1) // 2
+            back = party_size - front
+            back_window = (1 << back) - 1
+            spans = self.sides + ([(0, width)] if len(self.sides) > 1 else [])
+            for row in rows:
+                if row + 1 not in rows:
+                    continue
+                for lo, hi in spans:
+                    for start in free_starts(masks[row], lo, hi, front):
+                        if masks[row + 1] & (back_window << start):
+                            continue
+                        seats = self._block(row, start, front) + self._block(row + 1, start, back)
+                        if add('rows', seats):
+                            return blocks
+        return blocks
+
+    def _block(self, row, start, size):
+        return [f"{row}{letter}" for letter in self.letters[start:start + size]]
+
+
+def parse_seat(seat_number):
+    """'12C' -> (12, 'C'); для некорректного номера — (None, None)."""
+    seat_number = (seat_number or '').strip().upper()
+    digits = seat_number.rstrip(''.join(SEAT_LETTERS))
+    letter = seat_number[len(digits):]
+    if not digits.isdigit() or len(letter) != 1:
+        return None, None
+    return int(digits), letter
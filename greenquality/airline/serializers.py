@@ -5,8 +5,22 @@
 from rest_framework import serializers
 from .models import (
     Airport, Flight, Ticket, User, Account, Payment, 
-    Passenger, Class, Airplane, Role, Baggage, BaggageType
+    Passenger, Class, Airplane, Role, Baggage, BaggageType,
+    ArchivedFlight, ArchivedTicket, ArchivedBaggage
 )
+from .validation import validate_crud_data
+
+
+class PanelRulesMixin:
+    """Те же правила, что у форм панелей (airline/validation.py), для записи через API"""
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        # Обязательность полей проверяет сам DRF — правила только для переданных значений
+        errors = validate_crud_data(self.Meta.model, attrs, 'update')
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -16,14 +30,14 @@ class RoleSerializer(serializers.ModelSerializer):
         fields = ['id_role', 'role_name']
 
 
-class AirportSerializer(serializers.ModelSerializer):
+class AirportSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Airport (Аэропорты)"""
     class Meta:
         model = Airport
         fields = ['id_airport', 'name', 'city', 'country']
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class AirplaneSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Airplane (Самолеты)"""
     class Meta:
         model = Airplane
@@ -34,7 +48,7 @@ class AirplaneSerializer(serializers.ModelSerializer):
         ]
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Flight (Рейсы)"""
     # Включаем связанные объекты для удобства
     departure_airport = AirportSerializer(source='departure_airport_id', read_only=True)
@@ -58,7 +72,7 @@ class FlightSerializer(serializers.ModelSerializer):
         read_only_fields = ['id_flight']
 
 
-class PassengerSerializer(serializers.ModelSerializer):
+class PassengerSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Passenger (Пассажиры)"""
     class Meta:
         model = Passenger
@@ -72,10 +86,10 @@ class ClassSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Class (Классы обслуживания)"""
     class Meta:
         model = Class
-        fields = ['id_class', 'class_name']
+        fields = ['id_class', 'class_name', 'base_price']
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class AccountSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Account (Аккаунты)"""
     role = RoleSerializer(source='role_id', read_only=True)
     role_id = serializers.IntegerField(write_only=True)
@@ -89,7 +103,7 @@ class AccountSerializer(serializers.ModelSerializer):
         }
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели User (Пользователи)"""
     account = AccountSerializer(source='account_id', read_only=True)
     account_id = serializers.IntegerField(write_only=True)
@@ -102,7 +116,7 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Payment (Платежи)"""
     user = UserSerializer(source='user_id', read_only=True)
     user_id = serializers.IntegerField(write_only=True)
@@ -116,7 +130,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id_payment', 'payment_date']
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Ticket (Билеты)"""
     # Включаем связанные объекты
     flight = FlightSerializer(source='flight_id', read_only=True)
@@ -150,7 +164,7 @@ class BaggageTypeSerializer(serializers.ModelSerializer):
         ]
 
 
-class BaggageSerializer(serializers.ModelSerializer):
+class BaggageSerializer(PanelRulesMixin, serializers.ModelSerializer):
     """Сериализатор для модели Baggage (Багаж)"""
     ticket = TicketSerializer(source='ticket_id', read_only=True)
     baggage_type = BaggageTypeSerializer(source='baggage_type_id', read_only=True)
@@ -165,3 +179,36 @@ class BaggageSerializer(serializers.ModelSerializer):
             'weight_kg', 'baggage_tag', 'status', 'registered_at'
         ]
         read_only_fields = ['id_baggage', 'registered_at']
+
+
+class ArchivedFlightSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели ArchivedFlight (Архивные рейсы)"""
+    class Meta:
+        model = ArchivedFlight
+        fields = [
+            'id_flight', 'airplane_id', 'departure_airport_id', 'arrival_airport_id',
+            'departure_time', 'arrival_time', 'status', 'archived_at'
+        ]
+
+
+class ArchivedBaggageSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели ArchivedBaggage (Архивный багаж)"""
+    class Meta:
+        model = ArchivedBaggage
+        fields = [
+            'id_baggage', 'baggage_type_id', 'weight_kg', 'baggage_tag',
+            'status', 'registered_at'
+        ]
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели ArchivedTicket (Архивные билеты) — с рейсом и багажом"""
+    flight = ArchivedFlightSerializer(source='flight_id', read_only=True)
+    baggage = ArchivedBaggageSerializer(source='baggage_items', many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedTicket
+        fields = [
+            'id_ticket', 'flight', 'class_id', 'seat_number', 'price', 'status',
+            'passenger_id', 'payment_id', 'baggage'
+        ]
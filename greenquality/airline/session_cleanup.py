@@ -0,0 +1,79 @@
+"""
+Удаление истёкших сессий из django_session (python manage.py purge_sessions).
+
+Сессии в БД (SESSION_PROFILE=db или cached_db) удаляются только по выходу
+пользователя, поэтому таблица растёт с каждым входом. В отличие от
+clearsessions, который удаляет всё одним запросом, здесь удаление идёт
+пачками по batch_size строк в отдельных коротких транзакциях; строки
+выбираются через SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL), так что
+сессии, которые сейчас обновляют запросы пользователей, пропускаются и
+удаляются следующим проходом.
+
+После удаления на PostgreSQL можно выполнить VACUUM (ANALYZE): освобождённое
+место переиспользуется, таблица и индекс остаются небольшими и помещаются в кеш.
+"""
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def batch_size_default():
+    return getattr(settings, 'SESSION_PURGE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def session_table_stats():
+    """
+    Размер django_session: {rows, expired, bytes}. На PostgreSQL таблица не
+    читается: rows — оценка планировщика (pg_class.reltuples, None до первого
+    ANALYZE), bytes — pg_total_relation_size, expired — None. На других СУБД —
+    COUNT(*) строк и истёкших, bytes — None.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cur:
+            cur.execute(
+                'SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE oid = %s::regclass',
+                [Session._meta.db_table],
+            )
+            rows, size = cur.fetchone()
+        return {'rows': rows if rows >= 0 else None, 'expired': None, 'bytes': size}
+    return {
+        'rows': Session.objects.count(),
+        'expired': Session.objects.filter(expire_date__lt=timezone.now()).count(),
+        'bytes': None,
+    }
+
+
+def purge_expired_sessions(batch_size=None, max_batches=None):
+    """
+    Удаляет истёкшие сессии пачками. max_batches ограничивает число пачек за
+    вызов (None — пока не кончатся). Возвращает {purged, batches}.
+    """
+    batch_size = batch_size or batch_size_default()
+    summary = {'purged': 0, 'batches': 0}
+    while max_batches is None or summary['batches'] < max_batches:
+        now = timezone.now()
+        with transaction.atomic():
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .select_for_update(skip_locked=True)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted, _ = Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()
+        summary['purged'] += deleted
+        summary['batches'] += 1
+    return summary
+
+
+def vacuum_session_table():
+    """VACUUM (ANALYZE) django_session на PostgreSQL. Возвращает False на других СУБД."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cur:
+        cur.execute(f'VACUUM (ANALYZE) {connection.ops.quote_name(Session._meta.db_table)}')
+    return True
@@ -13,15 +13,20 @@ urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
     path('buy-ticket/<int:flight_id>/', views.buy_ticket, name='buy_ticket'),
     path('buy-ticket/<int:flight_id>/seat/', views.buy_ticket_seat, name='buy_ticket_seat'),
+    path('buy-ticket/<int:flight_id>/seat/recommend/', views.buy_ticket_seat_recommend, name='buy_ticket_seat_recommend'),
     path('buy-ticket/<int:flight_id>/confirm/', views.buy_ticket_confirm, name='buy_ticket_confirm'),
+    path('payments/<int:payment_id>/', views.payment_status, name='payment_status'),
+    path('tickets/<int:ticket_id>/cancel/', views.cancel_ticket_view, name='cancel_ticket'),
     path('admin-panel/', views.admin_panel, name='admin_panel'),
     path('admin-panel/crud/', views.admin_crud, name='admin_crud'),
     path('admin-panel/get-record/', views.admin_get_record, name='admin_get_record'),
     path('admin-panel/get-options/', views.admin_get_options, name='admin_get_options'),
+    path('admin-panel/export/', views.admin_export, name='admin_export'),
     path('manager-panel/', views.manager_panel, name='manager_panel'),
     path('manager-panel/crud/', views.manager_crud, name='manager_crud'),
     path('manager-panel/get-record/', views.manager_get_record, name='manager_get_record'),
     path('manager-panel/get-options/', views.manager_get_options, name='manager_get_options'),
+    path('manager-panel/export/', views.manager_export, name='manager_export'),
     path('reports/', views.reports_view, name='reports'),
     path('profile/export/<str:format_type>/', views.export_statistics, name='export_statistics'),
     path('profile/backup/', views.backup_database, name='backup_database'),
@@ -1,10 +1,12 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import make_password
 from django.utils.dateparse import parse_date
 from django.http import HttpResponse
 from django.utils import timezone
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from datetime import timedelta
 import csv
 import json
@@ -16,12 +18,17 @@ import os
 logger = logging.getLogger(__name__)
 from .models import User, Account, Role, Payment, Ticket, Flight, Passenger, Airport, Class, BaggageType, Baggage, Airplane, AuditLog
 from .admin_views import (
-    admin_panel, admin_crud, admin_get_record, admin_get_options,
-    manager_panel, manager_crud, manager_get_record, manager_get_options
+    admin_panel, admin_crud, admin_get_record, admin_get_options, admin_export,
+    manager_panel, manager_crud, manager_get_record, manager_get_options, manager_export
 )
 from .exceptions_utils import get_user_friendly_message
-from . import db_reports
+from .cancellation import CancellationError, cancel_user_ticket, user_cancel_error
+from .seat_layout import OCCUPIED_STATUSES, SeatLayout
+from . import db_reports, inventory, partitions
 from .forms import ProfileForm
+from .hashers import verify_password
+from .login_throttle import check_login_attempt, reset_login_throttle
+from .principal import get_principal
 from decimal import Decimal
 
 
@@ -174,20 +181,24 @@ def login_view(request):
             messages.error(request, 'Пожалуйста, заполните все поля')
             return render(request, 'login.html')
 
+        # Ограничение частоты попыток — до запроса к БД и дорогой проверки пароля
+        wait = check_login_attempt(request, email)
+        if wait:
+            messages.error(request, f'Слишком много попыток входа. Повторите через {wait} с')
+            response = render(request, 'login.html', status=429)
+            response['Retry-After'] = str(wait)
+            return response
+
         try:
             # Получаем аккаунт по email
             account = Account.objects.get(email=email)
 
-            # Проверяем пароль с использованием хэширования
-            if check_password(password, account.password):
+            # Проверяем пароль; хеш прежнего алгоритма или стоимости пересчитывается
+            if verify_password(account, password):
+                reset_login_throttle(email)
                 # Сохраняем ID аккаунта в сессии для отслеживания входа пользователя
                 request.session['account_id'] = account.id_account
                 request.session['user_email'] = account.email
-                # Проверяем, является ли пользователь администратором
-                if account.role_id and account.role_id.role_name == 'ADMIN':
-                    request.session['is_admin'] = True
-                else:
-                    request.session['is_admin'] = False
                 messages.success(request, 'Вы успешно вошли в систему!')
                 return redirect('index')
             else:
@@ -293,8 +304,9 @@ def logout_view(request):
     if 'account_id' in request.session:
         del request.session['account_id']
         del request.session['user_email']
-        if 'is_admin' in request.session:
-            del request.session['is_admin']
+        # Флаги ролей из сессий, созданных до того, как роль стала вычисляться
+        for key in ('is_admin', 'is_manager'):
+            request.session.pop(key, None)
         messages.success(request, 'Вы успешно вышли из системы')
     return redirect('index')
 
@@ -423,13 +435,10 @@ def profile_view(request):
             messages.success(request, 'Профиль успешно обновлен')
             return redirect('profile')
 
-        # Проверяем роль пользователя (безопасно при отсутствии или удалённой роли)
-        try:
-            role_name = account.role_id.role_name if getattr(account, 'role_id', None) else None
-        except Exception:
-            role_name = None
-        is_admin = role_name == 'ADMIN'
-        is_manager = role_name == 'MANAGER'
+        # Роль пользователя (PrincipalMiddleware; None при отсутствии роли)
+        principal = get_principal(request)
+        is_admin = principal.is_admin
+        is_manager = principal.is_manager
 
         if is_admin:
             # Статистика для администратора
@@ -458,7 +467,7 @@ def profile_view(request):
                 status='CANCELLED').count()
 
             # Статистика по билетам
-            total_tickets = Ticket.objects.count()
+            total_tickets = inventory.total_ticket_count()
             paid_tickets = Ticket.objects.filter(status='PAID').count()
             booked_tickets = Ticket.objects.filter(status='BOOKED').count()
 
@@ -487,7 +496,7 @@ def profile_view(request):
                 'departure_airport_id__city',
                 'arrival_airport_id__city'
             ).annotate(
-                ticket_count=Count('ticket')
+                ticket_count=Count('ticket', filter=Q(ticket__status__in=OCCUPIED_STATUSES))
             ).order_by('-ticket_count')[:5]
 
             # Данные для вкладки «Отчётность»
@@ -539,9 +548,7 @@ def profile_view(request):
             from django.db.models.functions import TruncMonth
 
             # Статистика по статусам билетов для круговой диаграммы
-            ticket_statuses = Ticket.objects.values('status').annotate(
-                count=Count('id_ticket')
-            ).order_by('status')
+            ticket_statuses = inventory.ticket_status_counts()
 
             # Подготовка данных для круговой диаграммы
             ticket_status_data = {
@@ -615,7 +622,7 @@ def profile_view(request):
                 revenue_data['data'].append(months_dict.get(month_key, 0))
 
             # Подсчитываем общее количество билетов для боковой панели
-            total_tickets_count = Ticket.objects.count()
+            total_tickets_count = inventory.total_ticket_count()
 
             # Данные для вкладки «Отчётность»
             flights_report = db_reports.get_flights_report(limit=100)
@@ -661,6 +668,7 @@ def profile_view(request):
                         'flight': ticket.flight_id,
                         'class_name': ticket.class_id.class_name,
                         'passenger': ticket.passenger_id,
+                        'can_cancel': user_cancel_error(ticket, ticket.flight_id, payment) is None,
                     })
 
             tickets.sort(key=lambda x: x['payment'].payment_date, reverse=True)
@@ -719,12 +727,10 @@ def export_statistics(request, format_type):
         messages.error(request, 'Для доступа необходимо войти в систему')
         return redirect('login')
 
-    account_id = request.session['account_id']
-
     try:
-        account = Account.objects.get(id_account=account_id)
+        principal = get_principal(request)
         # Проверка роли менеджера
-        if not account.role_id or account.role_id.role_name != 'MANAGER':
+        if principal.role_name != 'MANAGER':
             messages.error(request, 'У вас нет доступа к этой функции')
             return redirect('profile')
 
@@ -735,9 +741,7 @@ def export_statistics(request, format_type):
         from datetime import timedelta
 
         # Получаем данные для экспорта
-        ticket_statuses = Ticket.objects.values('status').annotate(
-            count=Count('id_ticket')
-        ).order_by('status')
+        ticket_statuses = inventory.ticket_status_counts()
 
         twelve_months_ago = timezone.now() - timedelta(days=365)
         monthly_revenue = Payment.objects.filter(
@@ -835,8 +839,8 @@ def backup_database(request):
         return redirect('login')
 
     try:
-        account = Account.objects.get(id_account=request.session['account_id'])
-        if not account.role_id or account.role_id.role_name != 'ADMIN':
+        principal = get_principal(request)
+        if principal.role_name != 'ADMIN':
             messages.error(request, 'Доступ только для администратора')
             return redirect('profile')
 
@@ -901,8 +905,8 @@ def restore_database(request):
         return redirect('profile')
 
     try:
-        account = Account.objects.get(id_account=request.session['account_id'])
-        if not account.role_id or account.role_id.role_name != 'ADMIN':
+        principal = get_principal(request)
+        if principal.role_name != 'ADMIN':
             messages.error(request, 'Доступ только для администратора')
             return redirect('profile')
 
@@ -985,8 +989,6 @@ def buy_ticket(request, flight_id):
             request, 'Для покупки билета необходимо войти в систему')
         return redirect('login')
 
-    account_id = request.session['account_id']
-
     try:
         # Получаем рейс
         flight = Flight.objects.select_related(
@@ -994,9 +996,8 @@ def buy_ticket(request, flight_id):
         ).get(id_flight=flight_id)
 
         # Получаем пользователя
-        account = Account.objects.get(id_account=account_id)
         try:
-            user = User.objects.get(account_id=account)
+            user = User.objects.get(pk=get_principal(request).user_id)
         except User.DoesNotExist:
             messages.error(request, 'Профиль пользователя не найден')
             return redirect('profile')
@@ -1007,8 +1008,8 @@ def buy_ticket(request, flight_id):
                 request, 'Для покупки билета необходимо заполнить паспортные данные в профиле')
             return redirect('profile')
 
-        # Получаем доступные классы и типы багажа
-        classes = Class.objects.all()
+        # Получаем доступные классы (только с заданным тарифом) и типы багажа
+        classes = Class.objects.filter(base_price__gt=0)
         baggage_types = BaggageType.objects.all()
 
         if request.method == 'POST':
@@ -1048,6 +1049,15 @@ def buy_ticket(request, flight_id):
         return redirect('flights')
 
 
+def _booked_seats(flight):
+    """Занятые места рейса (номера мест)"""
+    return set(
+        partitions.for_flight(Ticket.objects, flight).filter(
+            status__in=OCCUPIED_STATUSES
+        ).values_list('seat_number', flat=True)
+    )
+
+
 def buy_ticket_seat(request, flight_id):
     """Процесс покупки билета - шаг 2: выбор места"""
     # Проверка авторизации
@@ -1067,59 +1077,27 @@ def buy_ticket_seat(request, flight_id):
             'airplane_id').get(id_flight=flight_id)
         airplane = flight.airplane_id
 
-        # Получаем занятые места для этого рейса
-        booked_seats = set(
-            Ticket.objects.filter(
-                flight_id=flight,
-                status__in=['BOOKED', 'PAID', 'CHECKED_IN']
-            ).values_list('seat_number', flat=True)
-        )
+        booked_seats = _booked_seats(flight)
 
-        # Генерируем карту мест
-        rows = airplane.rows or 30  # По умолчанию 30 рядов
-        seats_per_row = airplane.seats_row or 6  # По умолчанию 6 мест в ряду
-
-        # Определяем расположение мест (например, A-B-C D-E-F для 6 мест)
-        seat_letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
-        if seats_per_row <= 6:
-            seat_letters = ['A', 'B', 'C', 'D', 'E', 'F'][:seats_per_row]
-        elif seats_per_row <= 8:
-            seat_letters = ['A', 'B', 'C', 'D',
-                            'E', 'F', 'G', 'H'][:seats_per_row]
-
-        # Разделяем места на левую и правую стороны
-        left_seats = seat_letters[:len(
-            seat_letters)//2] if len(seat_letters) > 3 else seat_letters[:3]
-        right_seats = seat_letters[len(
-            seat_letters)//2:] if len(seat_letters) > 3 else seat_letters[3:]
+        # Генерируем карту мест по схеме салона (например, A-B-C D-E-F для 6 мест)
+        layout = SeatLayout.for_airplane(airplane)
+        rows = layout.rows
+        seats_per_row = layout.seats_row
+        left_seats = layout.left_letters
+        right_seats = layout.right_letters
 
         seats_map = []
         for row in range(1, rows + 1):
-            left_row_seats = []
-            right_row_seats = []
-
-            # Левая сторона
-            for seat_letter in left_seats:
-                seat_number = f"{row}{seat_letter}"
-                is_booked = seat_number in booked_seats
-                left_row_seats.append({
-                    'number': seat_number,
-                    'booked': is_booked,
-                })
-
-            # Правая сторона
-            for seat_letter in right_seats:
-                seat_number = f"{row}{seat_letter}"
-                is_booked = seat_number in booked_seats
-                right_row_seats.append({
-                    'number': seat_number,
-                    'booked': is_booked,
-                })
-
             seats_map.append({
                 'row': row,
-                'left_seats': left_row_seats,
-                'right_seats': right_row_seats,
+                'left_seats': [
+                    {'number': f"{row}{letter}", 'booked': f"{row}{letter}" in booked_seats}
+                    for letter in left_seats
+                ],
+                'right_seats': [
+                    {'number': f"{row}{letter}", 'booked': f"{row}{letter}" in booked_seats}
+                    for letter in right_seats
+                ],
             })
 
         if request.method == 'POST':
@@ -1157,6 +1135,36 @@ def buy_ticket_seat(request, flight_id):
         return redirect('flights')
 
 
+def buy_ticket_seat_recommend(request, flight_id):
+    """Подбор мест рядом для группы (JSON для карты мест на шаге 2)"""
+    from django.http import JsonResponse
+
+    if 'account_id' not in request.session:
+        return JsonResponse({'error': 'Необходимо войти в систему'}, status=401)
+    if request.session.get('booking_flight_id') != flight_id:
+        return JsonResponse({'error': 'Начните процесс покупки с начала'}, status=400)
+
+    try:
+        party_size = int(request.GET.get('party', 2))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Некорректный размер группы'}, status=400)
+
+    flight = Flight.objects.select_related('airplane_id').filter(id_flight=flight_id).first()
+    if flight is None:
+        return JsonResponse({'error': 'Рейс не найден'}, status=404)
+
+    layout = SeatLayout.for_airplane(flight.airplane_id)
+    if not 1 <= party_size <= 2 * len(layout.letters):
+        return JsonResponse({'error': 'Некорректный размер группы'}, status=400)
+
+    class_name = Class.objects.filter(
+        id_class=request.session.get('booking_class_id')
+    ).values_list('class_name', flat=True).first()
+    blocks = layout.recommend_seat_blocks(
+        layout.occupancy(_booked_seats(flight)), party_size, class_name)
+    return JsonResponse({'party': party_size, 'class_name': class_name, 'blocks': blocks})
+
+
 def buy_ticket_confirm(request, flight_id):
     """Процесс покупки билета - шаг 3: подтверждение и покупка"""
     # Проверка авторизации
@@ -1173,16 +1181,13 @@ def buy_ticket_confirm(request, flight_id):
             request, 'Пожалуйста, завершите процесс выбора параметров')
         return redirect('buy_ticket', flight_id=flight_id)
 
-    account_id = request.session['account_id']
-
     try:
         # Получаем данные
         flight = Flight.objects.select_related(
             'airplane_id', 'departure_airport_id', 'arrival_airport_id'
         ).get(id_flight=flight_id)
 
-        account = Account.objects.get(id_account=account_id)
-        user = User.objects.get(account_id=account)
+        user = User.objects.get(pk=get_principal(request).user_id)
 
         class_obj = Class.objects.get(
             id_class=request.session['booking_class_id'])
@@ -1190,24 +1195,18 @@ def buy_ticket_confirm(request, flight_id):
         baggage_type_id = request.session.get('booking_baggage_type_id')
 
         # Проверяем, что место все еще свободно
-        if Ticket.objects.filter(flight_id=flight, seat_number=seat_number,
-                                 status__in=['BOOKED', 'PAID', 'CHECKED_IN']).exists():
+        if partitions.for_flight(Ticket.objects, flight).filter(
+                seat_number=seat_number, status__in=['BOOKED', 'PAID', 'CHECKED_IN']).exists():
             messages.error(
                 request, 'Это место уже занято. Пожалуйста, выберите другое место.')
             return redirect('buy_ticket_seat', flight_id=flight_id)
 
-        # Ищем существующий свободный билет (созданный триггером при добавлении рейса)
-        existing_ticket = Ticket.objects.filter(
-            flight_id=flight, seat_number=seat_number, status='AVAILABLE'
-        ).first()
-
-        # Рассчитываем цену (базовая цена зависит от класса)
-        base_prices = {
-            'ECONOMY': Decimal('5000.00'),
-            'BUSINESS': Decimal('15000.00'),
-            'FIRST': Decimal('30000.00'),
-        }
-        base_price = base_prices.get(class_obj.class_name, Decimal('5000.00'))
+        # Рассчитываем цену (базовый тариф класса из таблицы class)
+        base_price = class_obj.base_price
+        if base_price <= 0:
+            messages.error(
+                request, f'Тариф класса «{class_obj.get_class_name_display()}» не задан — выберите другой класс')
+            return redirect('buy_ticket', flight_id=flight_id)
 
         # Добавляем стоимость багажа, если выбран
         baggage_price = Decimal('0.00')
@@ -1241,56 +1240,72 @@ def buy_ticket_confirm(request, flight_id):
                     passenger.birthday = user.birthday
                 passenger.save()
 
-            # Создаем платеж
-            payment = Payment.objects.create(
-                user_id=user,
-                total_cost=total_price,
-                payment_method='ONLINE',
-                status='COMPLETED',  # Пока автоматически завершаем платеж
-            )
-
-            # Обновляем существующий билет или создаём новый (для старых рейсов без триггера)
-            if existing_ticket:
-                existing_ticket.class_id = class_obj
-                existing_ticket.price = total_price
-                existing_ticket.status = 'PAID'
-                existing_ticket.passenger_id = passenger
-                existing_ticket.payment_id = payment
-                existing_ticket.save()
-                ticket = existing_ticket
-            else:
-                ticket = Ticket.objects.create(
-                    flight_id=flight,
-                    class_id=class_obj,
-                    seat_number=seat_number,
-                    price=total_price,
-                    status='PAID',
-                    passenger_id=passenger,
-                    payment_id=payment,
-                )
-
-            # Создаем багаж, если выбран
-            if baggage_type_id:
-                import random
-                import string
-
-                baggage_type = BaggageType.objects.get(
-                    id_baggage_type=baggage_type_id)
-                # Генерируем уникальный номер багажной бирки
-                baggage_tag = ''.join(random.choices(
-                    string.ascii_uppercase + string.digits, k=12))
-
-                # Проверяем уникальность
-                while Baggage.objects.filter(baggage_tag=baggage_tag).exists():
-                    baggage_tag = ''.join(random.choices(
-                        string.ascii_uppercase + string.digits, k=12))
-
-                Baggage.objects.create(
-                    ticket_id=ticket,
-                    baggage_type_id=baggage_type,
-                    weight_kg=Decimal('20.00'),  # По умолчанию 20 кг
-                    baggage_tag=baggage_tag,
-                )
+            # Платёж, билет и багаж — одна транзакция. Строку (рейс, место) защищает
+            # unique_flight_seat: при одновременной покупке второй покупатель получит ошибку
+            try:
+                with transaction.atomic():
+                    # Создаем платеж
+                    payment = Payment.objects.create(
+                        user_id=user,
+                        total_cost=total_price,
+                        payment_method='ONLINE',
+                        status='PENDING',  # Оплату проводит обработчик платежей (process_payments)
+                    )
+
+                    # Ищем существующий свободный билет (созданный триггером при добавлении рейса)
+                    # или отменённый: строка (рейс, место) уникальна, поэтому место перепродаётся
+                    # через неё. Строки нет (режим lazy или старый рейс) — создаём новую
+                    existing_ticket = partitions.for_flight(Ticket.objects.select_for_update(), flight).filter(
+                        seat_number=seat_number, status__in=['AVAILABLE', 'CANCELLED']
+                    ).first()
+                    if existing_ticket:
+                        if existing_ticket.status == 'CANCELLED':
+                            # Багаж прежнего владельца к перепроданному месту не относится
+                            Baggage.objects.filter(ticket_id=existing_ticket).delete()
+                        existing_ticket.class_id = class_obj
+                        existing_ticket.price = total_price
+                        existing_ticket.status = 'BOOKED'
+                        existing_ticket.passenger_id = passenger
+                        existing_ticket.payment_id = payment
+                        existing_ticket.save()
+                        ticket = existing_ticket
+                    else:
+                        ticket = Ticket.objects.create(
+                            flight_id=flight,
+                            class_id=class_obj,
+                            seat_number=seat_number,
+                            price=total_price,
+                            status='BOOKED',
+                            passenger_id=passenger,
+                            payment_id=payment,
+                        )
+
+                    # Создаем багаж, если выбран
+                    if baggage_type_id:
+                        import random
+                        import string
+
+                        baggage_type = BaggageType.objects.get(
+                            id_baggage_type=baggage_type_id)
+                        # Генерируем уникальный номер багажной бирки
+                        baggage_tag = ''.join(random.choices(
+                            string.ascii_uppercase + string.digits, k=12))
+
+                        # Проверяем уникальность
+                        while Baggage.objects.filter(baggage_tag=baggage_tag).exists():
+                            baggage_tag = ''.join(random.choices(
+                                string.ascii_uppercase + string.digits, k=12))
+
+                        Baggage.objects.create(
+                            ticket_id=ticket,
+                            baggage_type_id=baggage_type,
+                            weight_kg=Decimal('20.00'),  # По умолчанию 20 кг
+                            baggage_tag=baggage_tag,
+                        )
+            except IntegrityError:
+                messages.error(
+                    request, 'Это место уже занято. Пожалуйста, выберите другое место.')
+                return redirect('buy_ticket_seat', flight_id=flight_id)
 
             # Очищаем данные сессии
             del request.session['booking_class_id']
@@ -1300,8 +1315,8 @@ def buy_ticket_confirm(request, flight_id):
                 del request.session['booking_baggage_type_id']
 
             messages.success(
-                request, f'Билет успешно куплен! Номер билета: {ticket.id_ticket}')
-            return redirect('profile')
+                request, f'Место забронировано, платёж обрабатывается. Номер билета: {ticket.id_ticket}')
+            return redirect('payment_status', payment_id=payment.id_payment)
 
         context = {
             'flight': flight,
@@ -1324,6 +1339,54 @@ def buy_ticket_confirm(request, flight_id):
         return redirect('flights')
 
 
+def payment_status(request, payment_id):
+    """Статус платежа покупателя; страница опрашивает ?format=json, пока платёж в обработке"""
+    from django.http import JsonResponse
+
+    if 'account_id' not in request.session:
+        return redirect('login')
+
+    payment = Payment.objects.filter(
+        id_payment=payment_id, user_id__account_id=request.session['account_id']
+    ).first()
+    if payment is None:
+        messages.error(request, 'Платёж не найден')
+        return redirect('profile')
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id_payment': payment.id_payment,
+            'status': payment.status,
+            'status_display': payment.get_status_display(),
+        })
+
+    tickets = Ticket.objects.filter(payment_id=payment).select_related(
+        'flight_id__departure_airport_id', 'flight_id__arrival_airport_id', 'class_id')
+    return render(request, 'payment_status.html', {'payment': payment, 'tickets': tickets})
+
+
+def cancel_ticket_view(request, ticket_id):
+    """Отмена купленного билета пользователем (место возвращается в продажу)"""
+    if 'account_id' not in request.session:
+        messages.error(request, 'Для доступа необходимо войти в систему')
+        return redirect('login')
+
+    if request.method != 'POST':
+        return redirect('profile')
+
+    account_id = request.session['account_id']
+
+    try:
+        report = cancel_user_ticket(ticket_id, account_id)
+        messages.success(
+            request, f'Билет отменён. Сумма к возврату: {report["refund_amount"]} ₽')
+    except CancellationError as e:
+        messages.error(request, str(e))
+    except Exception as e:
+        messages.error(request, get_user_friendly_message(e, 'update'))
+    return redirect('profile')
+
+
 def custom_page_not_found(request, exception):
     """Обработчик 404 — страница не найдена (понятное сообщение на русском)."""
     return render(request, '404.html', status=404)
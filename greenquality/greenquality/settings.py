@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Путь к .env: корень репозитория (родитель папки с manage.py)
@@ -52,6 +53,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'airline.middleware.PrincipalMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'airline.middleware.Custom404Middleware',
 ]
@@ -110,6 +112,35 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хеширование паролей (airline/hashers.py): pbkdf2, scrypt или argon2 (нужен argon2-cffi).
+# Новые хеши создаёт хешер профиля; хеши других алгоритмов и прежней стоимости
+# проверяются и пересчитываются при входе. Замер: python manage.py benchmark_password_hashers
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'airline.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'airline.hashers.ScryptPasswordHasher',
+    'argon2': 'airline.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+if PASSWORD_HASHER_PROFILE not in PASSWORD_HASHER_PROFILES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER_PROFILE должен быть одним из: {', '.join(PASSWORD_HASHER_PROFILES)}")
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHER_PROFILE
+]
+# Стоимость хеширования; 0 — значение Django по умолчанию
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', '0'))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', '0'))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', '0'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', '0'))
+
+# Ограничение попыток входа (airline/login_throttle.py): корзина токенов на
+# IP-адрес и на email — сколько попыток подряд и сколько восстанавливается в минуту.
+# Счётчики хранятся в кеше Django (CACHES): при нескольких процессах нужен общий кеш
+LOGIN_THROTTLE_IP_BURST = int(os.environ.get('LOGIN_THROTTLE_IP_BURST', '20'))
+LOGIN_THROTTLE_IP_PER_MINUTE = int(os.environ.get('LOGIN_THROTTLE_IP_PER_MINUTE', '10'))
+LOGIN_THROTTLE_EMAIL_BURST = int(os.environ.get('LOGIN_THROTTLE_EMAIL_BURST', '5'))
+LOGIN_THROTTLE_EMAIL_PER_MINUTE = int(os.environ.get('LOGIN_THROTTLE_EMAIL_PER_MINUTE', '5'))
+
 
 
 LANGUAGE_CODE = 'ru-RU'
@@ -148,6 +179,12 @@ REST_FRAMEWORK = {
     # Пагинация (разбиение на страницы)
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Аутентификация: сессия или токен API (Authorization: Bearer, см. airline/api_tokens.py).
+    # Сессия первой — без входа API по-прежнему отвечает 403
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'airline.api_tokens.BearerTokenAuthentication',
+    ],
     # Разрешения: только авторизованные администраторы
     'DEFAULT_PERMISSION_CLASSES': [
         # 'rest_framework.permissions.AllowAny', Позволяет всем доступ (для разработки)
@@ -155,5 +192,90 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Платёжный шлюз и обработчик платежей (python manage.py process_payments --loop).
+# По умолчанию — локальный имитатор с задержкой и долей отказов
+PAYMENT_GATEWAY = {
+    'BACKEND': os.environ.get('PAYMENT_GATEWAY_BACKEND', 'airline.payments.FakeGateway'),
+    'OPTIONS': {
+        'latency_ms': int(os.environ.get('FAKE_GATEWAY_LATENCY_MS', '200')),
+        'jitter_ms': int(os.environ.get('FAKE_GATEWAY_JITTER_MS', '100')),
+        'failure_rate': float(os.environ.get('FAKE_GATEWAY_FAILURE_RATE', '0.05')),
+    },
+}
+PAYMENT_WORKERS = int(os.environ.get('PAYMENT_WORKERS', '4'))
+PAYMENT_BATCH_SIZE = int(os.environ.get('PAYMENT_BATCH_SIZE', '50'))
+# Через сколько секунд платёж, зависший в PROCESSING (обработчик упал), забирается снова
+PAYMENT_CLAIM_TIMEOUT = int(os.environ.get('PAYMENT_CLAIM_TIMEOUT', '300'))
+
+# Учёт свободных мест рейса: 'eager' — строка tickets на каждое место (триггер),
+# 'lazy' — строка создаётся только при продаже. Переключение: python manage.py ticket_inventory
+TICKET_INVENTORY_MODE = os.environ.get('TICKET_INVENTORY_MODE', 'eager')
+
+# На сколько месяцев вперёд создавать секции tickets/baggage (PostgreSQL).
+# Секции создаёт python manage.py ticket_partitions (раз в месяц по расписанию)
+TICKET_PARTITION_MONTHS_AHEAD = int(os.environ.get('TICKET_PARTITION_MONTHS_AHEAD', '12'))
+
+# Выполненные рейсы старше стольких месяцев переносятся в архив (archive_*).
+# Перенос выполняет python manage.py archive_flights (по расписанию)
+ARCHIVE_AFTER_MONTHS = int(os.environ.get('ARCHIVE_AFTER_MONTHS', '12'))
+
+# python manage.py index_advisor: последовательное чтение таблицы от стольких строк — находка
+INDEX_ADVISOR_MIN_ROWS = int(os.environ.get('INDEX_ADVISOR_MIN_ROWS', '10000'))
+
+# Панели: таблица без фильтров от стольких строк (по статистике СУБД) показывает
+# оценку числа записей вместо COUNT(*) (airline/pagination.py)
+PANEL_ESTIMATED_COUNT_MIN_ROWS = int(os.environ.get('PANEL_ESTIMATED_COUNT_MIN_ROWS', '10000'))
+# Списки выбора связанных записей в формах панелей: сколько записей отдавать
+# на запрос поиска и сколько секунд кешировать результат
+PANEL_OPTIONS_LIMIT = int(os.environ.get('PANEL_OPTIONS_LIMIT', '20'))
+PANEL_OPTIONS_CACHE_TTL = int(os.environ.get('PANEL_OPTIONS_CACHE_TTL', '30'))
+# Выгрузка таблиц панелей (CSV/JSONL): строк, читаемых серверным курсором за раз
+PANEL_EXPORT_CHUNK_SIZE = int(os.environ.get('PANEL_EXPORT_CHUNK_SIZE', '2000'))
+# Загрузка CSV в таблицы панелей: не больше стольких строк в одном файле
+PANEL_IMPORT_MAX_ROWS = int(os.environ.get('PANEL_IMPORT_MAX_ROWS', '100000'))
+# Полей в одном POST. Массовые операции панели передают id всех отмеченных записей:
+# запас над BULK_MAX_RECORDS (airline/admin_views.py), чтобы лишний выбор отклонялся
+# понятным сообщением, а не ошибкой 400 Django
+DATA_UPLOAD_MAX_NUMBER_FIELDS = int(os.environ.get('DATA_UPLOAD_MAX_NUMBER_FIELDS', '5000'))
+
+# Сколько секунд кешировать аккаунт и роль из сессии в кеше Django (airline/principal.py)
+PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', '30'))
+
+# Хранилище сессий: db — таблица django_session (чтение на каждый запрос),
+# cached_db — кеш + django_session (чтение из кеша), signed_cookies — подписанная
+# cookie без обращений к БД. Замер: python manage.py benchmark_sessions
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_PROFILE = os.environ.get('SESSION_PROFILE', 'db')
+if SESSION_PROFILE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"SESSION_PROFILE должен быть одним из: {', '.join(SESSION_ENGINES)}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
+# Удаление истёкших сессий (python manage.py purge_sessions): строк в одной
+# транзакции и пауза между проходами в режиме --loop, в секундах
+SESSION_PURGE_BATCH_SIZE = int(os.environ.get('SESSION_PURGE_BATCH_SIZE', '1000'))
+SESSION_PURGE_INTERVAL = int(os.environ.get('SESSION_PURGE_INTERVAL', '3600'))
+
+# Кеш Django (в том числе для сессий cached_db). По умолчанию — память процесса;
+# при нескольких процессах сервера нужен общий кеш (например, Redis), иначе
+# процесс может прочитать устаревшую копию сессии
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+# Кеш в памяти процесса ограничен числом записей (принципалы, счётчики входа,
+# списки выбора панелей); размер Redis/Memcached задаёт сам сервер
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))}
+
+# Токены REST API (POST /api/token/): срок действия и как часто процесс
+# перечитывает список отозванных токенов, в секундах
+API_TOKEN_TTL = int(os.environ.get('API_TOKEN_TTL', '3600'))
+API_TOKEN_REVOCATION_REFRESH = int(os.environ.get('API_TOKEN_REVOCATION_REFRESH', '30'))
+
 # Подробный вывод тестов на русском языке
 TEST_RUNNER = 'tests.test_runner.RussianDiscoverRunner'
@@ -0,0 +1,18 @@
+"""
+Общие вспомогательные функции тестов.
+"""
+from airline.models import Account, Role
+
+
+def login_as_admin(client):
+    """Создаёт роль ADMIN, аккаунт и авторизует сессию для доступа к API."""
+    role = Role.objects.create(role_name='ADMIN')
+    account = Account.objects.create(
+        email='admin@test.local',
+        password='hash',
+        role_id=role
+    )
+    session = client.session
+    session['account_id'] = account.id_account
+    session.save()
+    return account
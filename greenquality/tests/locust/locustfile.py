@@ -3,7 +3,7 @@ Locust: нагрузочное тестирование GreenQuality.
 
 Два типа пользователей:
 - WebsiteUser: просмотр публичных страниц (главная, о компании, контакты, рейсы).
-- ApiUser: работа с API после авторизации (аэропорты, рейсы, поиск).
+- ApiUser: работа с API по токену (аэропорты, рейсы, поиск).
 
 Запуск с веб-интерфейсом:
   cd greenquality && locust -f tests/locust/locustfile.py --config tests/locust/locust.conf
@@ -13,7 +13,6 @@ Locust: нагрузочное тестирование GreenQuality.
 
 Затем открыть http://localhost:8089
 """
-import re
 from locust import HttpUser, task, between
 
 
@@ -45,35 +44,24 @@ class WebsiteUser(HttpUser):
 
 class ApiUser(HttpUser):
     """
-    Пользователь API: авторизуется и выполняет запросы к REST API.
+    Пользователь API: получает токен и выполняет запросы к REST API без сессии.
     Требуется аккаунт администратора (admin@gmail.com / adminadmin).
     """
 
     wait_time = between(0.5, 2)
 
     def on_start(self):
-        """Авторизация при старте виртуального пользователя."""
+        """Получение токена API при старте виртуального пользователя."""
         self._login()
 
     def _login(self):
-        """Вход в систему для получения сессии."""
-        response = self.client.get("/login/")
-        if response.status_code != 200:
-            return
-        csrf = self.client.cookies.get("csrftoken")
-        if not csrf:
-            # Пытаемся извлечь из HTML
-            match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.text)
-            csrf = match.group(1) if match else ""
-        self.client.post(
-            "/login/",
-            {
-                "email": "admin@gmail.com",
-                "password": "adminadmin",
-                "csrfmiddlewaretoken": csrf,
-            },
-            headers={"Referer": f"{self.host}/login/"},
+        """POST /api/token/ — токен передаётся в заголовке Authorization всех запросов."""
+        response = self.client.post(
+            "/api/token/",
+            json={"email": "admin@gmail.com", "password": "adminadmin"},
         )
+        if response.status_code == 200:
+            self.client.headers["Authorization"] = f"Bearer {response.json()['token']}"
 
     @task(4)
     def api_airports_list(self):
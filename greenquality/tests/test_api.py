@@ -1,28 +1,18 @@
 """
-Интеграционные тесты: REST API (аэропорты, рейсы).
+Интеграционные тесты: REST API (аэропорты, рейсы, права доступа).
 Запуск: из папки greenquality выполнить
   python manage.py test tests.test_api
 """
+from datetime import timedelta
+
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from airline.models import Airport, Airplane, Flight, Role, Account
-
-
-def _login_as_admin(client):
-    """Создаёт роль ADMIN, аккаунт и авторизует сессию для доступа к API."""
-    role = Role.objects.create(role_name='ADMIN')
-    account = Account.objects.create(
-        email='admin@test.local',
-        password='hash',
-        role_id=role
-    )
-    session = client.session
-    session['account_id'] = account.id_account
-    session.save()
-    return account
+from airline.models import Airport, Airplane, Flight
+from tests.helpers import login_as_admin
 
 
 class AirportAPITest(TestCase):
@@ -30,7 +20,7 @@ class AirportAPITest(TestCase):
 
     def setUp(self):
         self.client = APIClient()
-        _login_as_admin(self.client)
+        login_as_admin(self.client)
         Airport.objects.create(
             id_airport='SVO',
             name='Шереметьево',
@@ -73,7 +63,7 @@ class FlightAPITest(TestCase):
 
     def setUp(self):
         self.client = APIClient()
-        _login_as_admin(self.client)
+        login_as_admin(self.client)
         self.airport_svo = Airport.objects.create(
             id_airport='SVO',
             name='Шереметьево',
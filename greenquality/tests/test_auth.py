@@ -0,0 +1,114 @@
+"""
+Интеграционные тесты: вход и права (кеш принципала, токены API, ограничение попыток входа).
+Запуск: из папки greenquality выполнить
+  python manage.py test tests.test_auth
+"""
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, identify_hasher, make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airline.models import Role, Account
+from airline.principal import clear_principal_cache
+from tests.helpers import login_as_admin
+
+
+class PrincipalCacheTest(TestCase):
+    """Интеграционный тест: роль из сессии определяется один раз и кешируется."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.account = login_as_admin(self.client)
+
+    def test_principal_cache(self):
+        """Повторные запросы API без запросов к accounts; смена роли сбрасывает кеш."""
+        url = reverse('role-list')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in queries.captured_queries if '"accounts"' in q['sql']])
+
+        self.account.role_id = Role.objects.create(role_name='MANAGER')
+        self.account.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        # Изменение в обход сигналов видно после сброса версии кеша
+        admin_role = Role.objects.get(role_name='ADMIN')
+        Account.objects.filter(pk=self.account.pk).update(role_id=admin_role)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        clear_principal_cache()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+
+class ApiTokenTest(TestCase):
+    """Интеграционный тест: токены API без сессии."""
+
+    def setUp(self):
+        role = Role.objects.create(role_name='ADMIN')
+        self.account = Account.objects.create(
+            email='token@test.local', password=make_password('secret-pass'), role_id=role)
+
+    def test_api_token_auth(self):
+        """Токен по паролю; запросы с ним без обращений к accounts и django_session; отзыв."""
+        url_token = reverse('api-token')
+        client = APIClient()
+        response = client.post(url_token, {'email': 'token@test.local', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = client.post(url_token, {'email': 'token@test.local', 'password': 'secret-pass'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = response.json()['token']
+
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(api.get(reverse('role-list')).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(api.get(reverse('role-list')).status_code, status.HTTP_200_OK)
+        touched = [q['sql'] for q in queries.captured_queries
+                   if '"accounts"' in q['sql'] or 'django_session' in q['sql']]
+        self.assertEqual(touched, [])
+
+        self.assertEqual(api.post(reverse('api-token-revoke')).status_code, status.HTTP_200_OK)
+        self.assertEqual(api.get(reverse('role-list')).status_code, status.HTTP_403_FORBIDDEN)
+
+        api.credentials(HTTP_AUTHORIZATION=f'Bearer {token[:-2]}xx')
+        self.assertEqual(api.get(reverse('role-list')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(LOGIN_THROTTLE_EMAIL_BURST=2, LOGIN_THROTTLE_EMAIL_PER_MINUTE=1)
+class LoginThrottleTest(TestCase):
+    """Интеграционный тест: ограничение попыток входа и пересчёт устаревшего хеша."""
+
+    def setUp(self):
+        cache.clear()
+        # Хеш с заниженной стоимостью — как созданный при прежних настройках
+        self.old_hash = PBKDF2PasswordHasher().encode('secret-pass', 'oldsalt', iterations=1000)
+        self.account = Account.objects.create(
+            email='throttle@test.local', password=self.old_hash,
+            role_id=Role.objects.create(role_name='USER'))
+
+    def test_login_throttle_and_rehash(self):
+        """Лишняя попытка — 429 без запроса к accounts; при входе хеш пересчитывается."""
+        client = Client()
+        url = reverse('login')
+        for _ in range(2):
+            response = client.post(url, {'email': 'throttle@test.local', 'password': 'wrong'})
+            self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, {'email': 'throttle@test.local', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertFalse([q for q in queries.captured_queries if '"accounts"' in q['sql']])
+        self.assertNotIn('account_id', client.session)
+
+        cache.clear()
+        response = client.post(url, {'email': 'throttle@test.local', 'password': 'secret-pass'})
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.account.refresh_from_db()
+        self.assertNotEqual(self.account.password, self.old_hash)
+        self.assertFalse(identify_hasher(self.account.password).must_update(self.account.password))
@@ -0,0 +1,618 @@
+"""
+Функциональные тесты: бизнес-операции с билетами (пересадка, отмена, подбор мест).
+Запуск: из папки greenquality выполнить
+  python manage.py test tests.test_booking
+"""
+import csv
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from airline.models import (
+    Account, Airplane, Airport, ArchivedTicket, AuditLog, Baggage, BaggageType, Class, Flight,
+    FlightRevenueSummary, FlightSchedule, Passenger, Payment, Role, Ticket, User
+)
+from airline.archive import archive_completed_flights
+from airline.cancellation import (
+    CancellationError, cancel_flight, cancel_payment, cancel_tickets, cancel_user_ticket
+)
+from airline.inventory import (
+    materialize_seats, prune_available_seats, ticket_status_counts, total_ticket_count
+)
+from airline.partitions import for_flight
+from airline.payments import FakeGateway, get_gateway, process_pending_payments
+from airline.rebooking import rebook_cancelled_flight
+from airline.reconciliation import reconcile_settlement
+from airline.schedules import generate_schedule_flights
+from airline.seat_layout import SeatLayout
+from airline.validation import validate_crud_data
+
+
+def _create_booking_fixtures(testcase):
+    """Маршрут SVO→LED, самолёт 4 ряда × 4 места (1 ряд бизнес), классы и покупатель."""
+    testcase.svo = Airport.objects.create(id_airport='SVO', name='Шереметьево', city='Москва', country='Россия')
+    testcase.led = Airport.objects.create(id_airport='LED', name='Пулково', city='Санкт-Петербург', country='Россия')
+    testcase.airplane = Airplane.objects.create(
+        model='Test 4x4', registration_number='GQ-TEST-001', capacity=16,
+        economy_capacity=12, business_capacity=4, first_capacity=0, rows=4, seats_row=4,
+    )
+    testcase.economy = Class.objects.create(class_name='ECONOMY')
+    testcase.business = Class.objects.create(class_name='BUSINESS')
+    role = Role.objects.create(role_name='USER')
+    account = Account.objects.create(email='buyer@test.local', password='hash', role_id=role)
+    testcase.user = User.objects.create(account_id=account, first_name='Иван', last_name='Тестов')
+    testcase.departure = timezone.now() + timedelta(days=2)
+
+
+def _create_flight(testcase, hours_offset=0, status='SCHEDULED'):
+    departure = testcase.departure + timedelta(hours=hours_offset)
+    return Flight.objects.create(
+        airplane_id=testcase.airplane, status=status,
+        departure_airport_id=testcase.svo, arrival_airport_id=testcase.led,
+        departure_time=departure, arrival_time=departure + timedelta(hours=1, minutes=30),
+    )
+
+
+def _sell_ticket(testcase, flight, seat, class_obj, passport):
+    passenger = Passenger.objects.create(
+        first_name='П', last_name=passport, passport_number=passport, birthday=date(1990, 1, 1))
+    payment = Payment.objects.create(
+        user_id=testcase.user, total_cost=Decimal('5000.00'), payment_method='ONLINE', status='COMPLETED')
+    return Ticket.objects.create(
+        flight_id=flight, class_id=class_obj, seat_number=seat, price=Decimal('5000.00'),
+        status='PAID', passenger_id=passenger, payment_id=payment,
+    )
+
+
+class RebookingTest(TestCase):
+    """Функциональный тест: пересадка пассажиров с отменённого рейса."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_rebook_cancelled_flight(self):
+        """Пересадка: план без изменений, затем перенос билетов с учётом класса и занятых мест."""
+        cancelled = _create_flight(self, status='CANCELLED')
+        alternative = _create_flight(self, hours_offset=3)
+        _create_flight(self, hours_offset=100)  # вне окна поиска
+
+        economy_1 = _sell_ticket(self, cancelled, '3A', self.economy, '1000 000001')
+        economy_2 = _sell_ticket(self, cancelled, '3B', self.economy, '1000 000002')
+        business = _sell_ticket(self, cancelled, '1A', self.business, '1000 000003')
+        # На альтернативном рейсе место 2A уже продано, 2B — свободная заготовка
+        _sell_ticket(self, alternative, '2A', self.economy, '1000 000004')
+        Ticket.objects.create(flight_id=alternative, class_id=self.economy, seat_number='2B')
+
+        plan = rebook_cancelled_flight(cancelled.id_flight, dry_run=True)
+        self.assertEqual(len(plan['moves']), 3)
+        self.assertEqual(plan['candidates'], [alternative.id_flight])
+        self.assertEqual(Ticket.objects.filter(flight_id=cancelled).count(), 3)
+
+        report = rebook_cancelled_flight(cancelled.id_flight)
+        self.assertEqual(len(report['moves']), 3)
+        self.assertEqual(report['unplaced'], [])
+
+        seats = dict(Ticket.objects.filter(flight_id=alternative, status='PAID')
+                     .values_list('id_ticket', 'seat_number'))
+        self.assertEqual(seats[business.id_ticket], '1A')
+        self.assertEqual(seats[economy_1.id_ticket], '2B')
+        self.assertEqual(seats[economy_2.id_ticket], '2C')
+        self.assertFalse(Ticket.objects.filter(flight_id=alternative, status='AVAILABLE').exists())
+        self.assertEqual(
+            AuditLog.objects.filter(table_name='Ticket', operation='UPDATE').count(), 3)
+
+    def test_rebook_skips_departed_flights(self):
+        """Пересадка: рейс того же маршрута, который уже вылетел, не предлагается."""
+        cancelled = _create_flight(self, hours_offset=-44, status='CANCELLED')  # вылет через 4 ч
+        _create_flight(self, hours_offset=-50)  # вылетел 2 ч назад, статус не обновлён
+        upcoming = _create_flight(self, hours_offset=-40)
+        ticket = _sell_ticket(self, cancelled, '3A', self.economy, '1000 000005')
+
+        report = rebook_cancelled_flight(cancelled.id_flight)
+        self.assertEqual(report['candidates'], [upcoming.id_flight])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.flight_id_id, upcoming.id_flight)
+
+    def test_cancel_flight_rebooks_first(self):
+        """Отмена рейса: пассажиры пересаживаются, возврат — только тем, кому не нашлось места."""
+        flight = _create_flight(self)
+        alternative = _create_flight(self, hours_offset=3)
+        economy = _sell_ticket(self, flight, '3A', self.economy, '1100 000001')
+        business = _sell_ticket(self, flight, '1A', self.business, '1100 000002')
+        # Бизнес-класс альтернативного рейса раскуплен
+        for i, seat in enumerate('ABCD'):
+            _sell_ticket(self, alternative, f'1{seat}', self.business, f'1100 00001{i}')
+
+        report = cancel_flight(flight.id_flight)
+        self.assertEqual(report['rebooked'], 1)
+        self.assertEqual(report['tickets_released'], 1)
+        self.assertEqual(report['payments_refunded'], [business.payment_id_id])
+        economy.refresh_from_db()
+        self.assertEqual((economy.flight_id_id, economy.status), (alternative.id_flight, 'PAID'))
+        self.assertEqual(Payment.objects.get(pk=economy.payment_id_id).status, 'COMPLETED')
+        self.assertEqual(Ticket.objects.get(pk=business.pk).status, 'AVAILABLE')
+
+        # Пересаживать после отмены больше некого; повторная отмена отклоняется
+        self.assertEqual(rebook_cancelled_flight(flight.id_flight)['moves'], [])
+        with self.assertRaisesMessage(CancellationError, 'запланированный или задержанный'):
+            cancel_flight(flight.id_flight)
+        with self.assertRaisesMessage(CancellationError, 'запланированный или задержанный'):
+            cancel_flight(_create_flight(self, hours_offset=-72, status='COMPLETED').id_flight)
+
+    def test_cancel_flight_holds_processing_payments(self):
+        """Отмена рейса: билеты платежа в обработке остаются и попадают в сводку, остальные возвращаются."""
+        flight = _create_flight(self)
+        paid = _sell_ticket(self, flight, '3A', self.economy, '1200 000001')
+        processing = _sell_ticket(self, flight, '3B', self.economy, '1200 000002')
+        Payment.objects.filter(pk=processing.payment_id_id).update(status='PROCESSING')
+
+        report = cancel_flight(flight.id_flight)
+        self.assertEqual(report['tickets_released'], 1)
+        self.assertEqual(report['payments_refunded'], [paid.payment_id_id])
+        self.assertEqual(report['tickets_held'], [processing.id_ticket])
+        self.assertEqual(report['payments_processing'], [processing.payment_id_id])
+        self.assertEqual(Ticket.objects.get(pk=paid.pk).status, 'AVAILABLE')
+        self.assertEqual(Ticket.objects.get(pk=processing.pk).status, 'PAID')
+        self.assertEqual(Flight.objects.get(pk=flight.pk).status, 'CANCELLED')
+
+        # Когда обработка закончилась, отложенный билет отменяется повторно
+        Payment.objects.filter(pk=processing.payment_id_id).update(status='COMPLETED')
+        report = cancel_payment(processing.payment_id_id)
+        self.assertEqual(report['payments_refunded'], [processing.payment_id_id])
+        self.assertEqual(Ticket.objects.get(pk=processing.pk).status, 'AVAILABLE')
+
+
+class CancellationTest(TestCase):
+    """Функциональный тест: отмена билетов и возврат платежа."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_cancel_payment_releases_seats(self):
+        """Отмена: билеты платежа возвращаются в продажу (AVAILABLE), платёж получает статус REFUNDED."""
+        flight = _create_flight(self)
+        ticket = _sell_ticket(self, flight, '2A', self.economy, '2000 000001')
+        payment = ticket.payment_id
+        # Второй билет того же платежа
+        second = Ticket.objects.create(
+            flight_id=flight, class_id=self.economy, seat_number='2B', price=Decimal('5000.00'),
+            status='PAID', passenger_id=ticket.passenger_id, payment_id=payment,
+        )
+
+        report = cancel_tickets([ticket.id_ticket])
+        self.assertEqual(report['tickets_released'], 1)
+        self.assertEqual(report['payments_refunded'], [])  # второй билет платежа ещё действует
+
+        report = cancel_payment(payment.id_payment)
+        self.assertEqual(report['tickets_released'], 1)
+        self.assertEqual(report['payments_refunded'], [payment.id_payment])
+        self.assertEqual(report['released_by_flight'], {flight.id_flight: 1})
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'REFUNDED')
+        for t in (ticket, second):
+            t.refresh_from_db()
+            self.assertEqual(t.status, 'AVAILABLE')
+            self.assertIsNone(t.passenger_id)
+            self.assertIsNone(t.payment_id)
+        with self.assertRaises(CancellationError):
+            cancel_payment(payment.id_payment)
+
+    def test_cancel_unpaid_booking(self):
+        """Отмена брони с несписанным платежом: платёж CANCELLED, к возврату — 0."""
+        flight = _create_flight(self)
+        paid = _sell_ticket(self, flight, '2A', self.economy, '2000 000002')
+        booked = _sell_ticket(self, flight, '2B', self.economy, '2000 000003')
+        Payment.objects.filter(pk=booked.payment_id_id).update(status='PENDING')
+        Ticket.objects.filter(pk=booked.pk).update(status='BOOKED')
+
+        report = cancel_tickets([paid.id_ticket, booked.id_ticket])
+        self.assertEqual(report['refund_amount'], Decimal('5000.00'))
+        self.assertEqual(report['payments_refunded'], [paid.payment_id_id])
+        self.assertEqual(report['payments_cancelled'], [booked.payment_id_id])
+        self.assertEqual(Payment.objects.get(pk=booked.payment_id_id).status, 'CANCELLED')
+        self.assertEqual(Payment.objects.get(pk=paid.payment_id_id).status, 'REFUNDED')
+
+        # Билеты платежа, который проводит обработчик, не отменяются
+        processing = _sell_ticket(self, flight, '2C', self.economy, '2000 000004')
+        Payment.objects.filter(pk=processing.payment_id_id).update(status='PROCESSING')
+        with self.assertRaisesMessage(CancellationError, 'ещё обрабатывается'):
+            cancel_tickets([processing.id_ticket])
+        self.assertEqual(Ticket.objects.get(pk=processing.pk).status, 'PAID')
+
+    def test_user_cancel_rules(self):
+        """Отмена пользователем: только свой BOOKED/PAID билет на будущий рейс SCHEDULED/DELAYED."""
+        account_id = self.user.account_id_id
+        flight = _create_flight(self)
+
+        def rejected(ticket, message, account=account_id):
+            with self.assertRaisesMessage(CancellationError, message):
+                cancel_user_ticket(ticket.id_ticket, account)
+            self.assertNotEqual(Ticket.objects.get(pk=ticket.pk).status, 'AVAILABLE')
+
+        other = Account.objects.create(email='other@test.local', password='hash',
+                                       role_id=self.user.account_id.role_id)
+        rejected(_sell_ticket(self, flight, '2A', self.economy, '2100 000001'), 'Билет не найден',
+                 account=other.id_account)
+
+        checked_in = _sell_ticket(self, flight, '2B', self.economy, '2100 000002')
+        Ticket.objects.filter(pk=checked_in.pk).update(status='CHECKED_IN')
+        rejected(checked_in, 'Билет уже отменён или использован')
+
+        for i, status in enumerate(('CANCELLED', 'COMPLETED')):
+            closed = _create_flight(self, hours_offset=5 + i, status=status)
+            rejected(_sell_ticket(self, closed, '2A', self.economy, f'2100 00001{i}'),
+                     'Рейс отменён или выполнен')
+
+        departed = _create_flight(self, hours_offset=-72)
+        rejected(_sell_ticket(self, departed, '2A', self.economy, '2100 000003'), 'Рейс уже вылетел')
+
+        processing = _sell_ticket(self, flight, '2C', self.economy, '2100 000004')
+        Payment.objects.filter(pk=processing.payment_id_id).update(status='PROCESSING')
+        rejected(processing, 'Платёж ещё обрабатывается')
+
+        delayed = _create_flight(self, hours_offset=6, status='DELAYED')
+        ticket = _sell_ticket(self, delayed, '2A', self.economy, '2100 000005')
+        self.assertEqual(cancel_user_ticket(ticket.id_ticket, account_id)['tickets_released'], 1)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).status, 'AVAILABLE')
+
+
+class TicketPurchaseTest(TestCase):
+    """Функциональный тест: покупка билета по тарифу класса."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_purchase_requires_class_fare(self):
+        """Класс без тарифа (base_price = 0) не продаётся, а тариф 0 не проходит проверку панелей и API."""
+        flight = _create_flight(self)
+        User.objects.filter(pk=self.user.pk).update(passport_number='4500 000001')
+        session = self.client.session
+        session.update({
+            'account_id': self.user.account_id_id, 'booking_flight_id': flight.id_flight,
+            'booking_class_id': self.economy.id_class, 'booking_seat_number': '3A',
+        })
+        session.save()
+        url = reverse('buy_ticket_confirm', args=[flight.id_flight])
+
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse('buy_ticket', args=[flight.id_flight]),
+                             fetch_redirect_response=False)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(validate_crud_data(Class, {'base_price': '0'}, 'update'),
+                         ['Поле «base price» должно быть больше нуля.'])
+
+        Class.objects.filter(pk=self.economy.pk).update(base_price=Decimal('5000.00'))
+        response = self.client.post(url)
+        payment = Payment.objects.get()
+        self.assertRedirects(response, reverse('payment_status', args=[payment.id_payment]),
+                             fetch_redirect_response=False)
+        self.assertEqual(payment.total_cost, Decimal('5000.00'))
+
+
+class SeatRecommendationTest(TestCase):
+    """Функциональный тест: подбор мест рядом для группы."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_recommend_adjacent_seats(self):
+        """Подбор: сначала один ряд по одну сторону прохода, затем через проход и соседние ряды."""
+        layout = SeatLayout(rows=4, seats_row=4, business_capacity=4)
+        masks = layout.occupancy(['2A', '3C', '4D', '9Z'])
+        self.assertEqual(masks[2], 0b0001)
+
+        blocks = layout.recommend_seat_blocks(masks, 2, 'ECONOMY', limit=10)
+        self.assertEqual(blocks[0], {'kind': 'row', 'seats': ['2C', '2D']})
+        self.assertTrue(all(b['kind'] == 'row' for b in blocks[:3]))
+        self.assertIn({'kind': 'row_aisle', 'seats': ['2B', '2C']}, blocks)
+        self.assertFalse(any(s.startswith('1') for b in blocks for s in b['seats']))  # ряд 1 — бизнес
+
+        blocks = layout.recommend_seat_blocks(masks, 4, 'ECONOMY')
+        self.assertEqual(blocks[0], {'kind': 'rows', 'seats': ['3A', '3B', '4A', '4B']})
+
+        flight = _create_flight(self)
+        _sell_ticket(self, flight, '2C', self.economy, '3000 000001')
+        session = self.client.session
+        session['account_id'] = self.user.account_id_id
+        session['booking_flight_id'] = flight.id_flight
+        session['booking_class_id'] = self.economy.id_class
+        session.save()
+        url = reverse('buy_ticket_seat_recommend', args=[flight.id_flight])
+        data = self.client.get(url, {'party': 3}).json()
+        self.assertEqual(data['class_name'], 'ECONOMY')
+        self.assertEqual(data['blocks'][0], {'kind': 'row_aisle', 'seats': ['3A', '3B', '3C']})
+        self.assertEqual(self.client.get(url, {'party': 0}).status_code, 400)
+
+
+class PaymentProcessingTest(TestCase):
+    """Функциональный тест: асинхронная обработка платежей PENDING."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def _book(self, flight, seat, passport):
+        ticket = _sell_ticket(self, flight, seat, self.economy, passport)
+        Payment.objects.filter(pk=ticket.payment_id_id).update(status='PENDING')
+        Ticket.objects.filter(pk=ticket.pk).update(status='BOOKED')
+        return ticket
+
+    def test_process_pending_payments(self):
+        """Обработчик: успешные платежи — COMPLETED и PAID, отказ — FAILED и место в продаже."""
+        flight = _create_flight(self)
+        paid = [self._book(flight, '2A', '4000 000001'), self._book(flight, '2B', '4000 000002')]
+
+        report = process_pending_payments(gateway=FakeGateway(latency_ms=0, failure_rate=0), workers=2)
+        self.assertEqual(report['processed'], 2)
+        self.assertEqual(sorted(report['completed']), sorted(t.payment_id_id for t in paid))
+        self.assertEqual(Ticket.objects.filter(flight_id=flight, status='PAID').count(), 2)
+        self.assertEqual(process_pending_payments(gateway=FakeGateway(latency_ms=0))['processed'], 0)
+
+        declined = self._book(flight, '3A', '4000 000009')
+        report = process_pending_payments(gateway=FakeGateway(latency_ms=0, failure_rate=1))
+        self.assertEqual(report['failed'], [declined.payment_id_id])
+        self.assertEqual(Payment.objects.get(pk=declined.payment_id_id).status, 'FAILED')
+        declined.refresh_from_db()
+        self.assertEqual(declined.status, 'AVAILABLE')
+        self.assertIsNone(declined.payment_id)
+
+    @override_settings(PAYMENT_CLAIM_TIMEOUT=60)
+    def test_payment_claim_recovery(self):
+        """Захват пачки: свежий PROCESSING не трогается, зависший забирается снова, шлюз идемпотентен."""
+        flight = _create_flight(self)
+        fresh = self._book(flight, '2A', '4000 000001')
+        stale = self._book(flight, '2B', '4000 000002')
+        now = timezone.now()
+        Payment.objects.filter(pk=fresh.payment_id_id).update(status='PROCESSING', claimed_at=now)
+        Payment.objects.filter(pk=stale.payment_id_id).update(
+            status='PROCESSING', claimed_at=now - timedelta(minutes=5))
+
+        gateway = FakeGateway(latency_ms=0, failure_rate=0)
+        report = process_pending_payments(gateway=gateway)
+        self.assertEqual(report['completed'], [stale.payment_id_id])
+        payment = Payment.objects.get(pk=stale.payment_id_id)
+        self.assertEqual((payment.status, payment.claimed_at), ('COMPLETED', None))
+        self.assertEqual(Payment.objects.get(pk=fresh.payment_id_id).status, 'PROCESSING')
+        # Повтор с тем же ключом идемпотентности возвращает прежний результат
+        gateway.failure_rate = 1
+        self.assertTrue(gateway.charge({'id_payment': stale.payment_id_id}, stale.payment_id_id))
+        # Шлюз из настроек один на процесс — ключи идемпотентности переживают проход
+        self.assertIs(get_gateway(), get_gateway())
+
+        # Результаты не применяются к платежу, который за время вызова шлюза забрал другой проход
+        class TakeoverGateway(FakeGateway):
+            def charge(self, payment, idempotency_key):
+                Payment.objects.filter(pk=payment['id_payment']).update(claimed_at=timezone.now())
+                return super().charge(payment, idempotency_key)
+
+        Payment.objects.filter(pk=fresh.payment_id_id).update(status='PENDING', claimed_at=None)
+        report = process_pending_payments(gateway=TakeoverGateway(latency_ms=0))
+        self.assertEqual(report['processed'], 0)
+        self.assertEqual(Payment.objects.get(pk=fresh.payment_id_id).status, 'PROCESSING')
+        self.assertEqual(Ticket.objects.get(pk=fresh.pk).status, 'BOOKED')
+
+
+class ReconciliationTest(TestCase):
+    """Функциональный тест: сверка платежей с файлом расчётов шлюза."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_reconcile_settlement_file(self):
+        """Сверка: переходы статусов применяются пакетно, расхождения попадают в отчёт."""
+        flight = _create_flight(self)
+        settled = _sell_ticket(self, flight, '2A', self.economy, '5000 000001')
+        declined = _sell_ticket(self, flight, '2B', self.economy, '5000 000002')
+        wrong_amount = _sell_ticket(self, flight, '2C', self.economy, '5000 000003')
+        Payment.objects.filter(pk__in=[t.payment_id_id for t in (settled, declined, wrong_amount)]) \
+            .update(status='PENDING')
+        # Платёж, захваченный обработчиком: сверка переводит его и снимает захват
+        Payment.objects.filter(pk=settled.payment_id_id).update(status='PROCESSING', claimed_at=timezone.now())
+        Ticket.objects.filter(flight_id=flight).update(status='BOOKED')
+
+        path = os.path.join(self.tmpdir.name, 'settlement.csv')
+        report_path = os.path.join(self.tmpdir.name, 'report.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['payment_id', 'amount', 'status', 'reference'])
+            writer.writerow([settled.payment_id_id, '5000.00', 'SETTLED', 'R1'])
+            writer.writerow([declined.payment_id_id, '5000.00', 'DECLINED', 'R2'])
+            writer.writerow([wrong_amount.payment_id_id, '4999.00', 'SETTLED', 'R3'])
+            writer.writerow([999999, '100.00', 'SETTLED', 'R4'])
+
+        summary = reconcile_settlement(path, report_path)
+        self.assertEqual(summary['lines'], 4)
+        self.assertEqual(summary['results'], {
+            'STATUS_UPDATE': 2, 'AMOUNT_MISMATCH': 1, 'UNKNOWN_PAYMENT': 1})
+        self.assertEqual(summary['payments_updated'], 2)
+        self.assertEqual(summary['tickets_paid'], 1)
+        self.assertEqual(summary['tickets_released'], 1)
+
+        settled_payment = Payment.objects.get(pk=settled.payment_id_id)
+        self.assertEqual((settled_payment.status, settled_payment.claimed_at), ('COMPLETED', None))
+        self.assertEqual(Payment.objects.get(pk=declined.payment_id_id).status, 'FAILED')
+        self.assertEqual(Payment.objects.get(pk=wrong_amount.payment_id_id).status, 'PENDING')
+        self.assertEqual(Ticket.objects.get(pk=settled.pk).status, 'PAID')
+        self.assertEqual(Ticket.objects.get(pk=declined.pk).status, 'AVAILABLE')
+
+        with open(report_path, newline='', encoding='utf-8') as f:
+            report = list(csv.DictReader(f))
+        self.assertEqual(sorted(r['result'] for r in report), ['AMOUNT_MISMATCH', 'UNKNOWN_PAYMENT'])
+        # Запись аудита на каждый изменённый платёж, без сводной записи
+        audit = {a.record_id: (a.old_data['status'], a.new_data['status'])
+                 for a in AuditLog.objects.filter(table_name='Payment')}
+        self.assertEqual(audit, {settled.payment_id_id: ('PROCESSING', 'COMPLETED'),
+                                 declined.payment_id_id: ('PENDING', 'FAILED')})
+
+
+class LazyInventoryTest(TestCase):
+    """Функциональный тест: режим lazy — строки билетов только для проданных мест."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    @override_settings(TICKET_INVENTORY_MODE='lazy')
+    def test_lazy_ticket_inventory(self):
+        """Режим lazy: свободные места считаются по схеме салона, отмена удаляет строку."""
+        flight = _create_flight(self)
+        self.assertEqual(materialize_seats([flight.id_flight]), 16)
+        self.assertEqual(Ticket.objects.filter(flight_id=flight, class_id=self.business).count(), 4)
+        self.assertEqual(materialize_seats([flight.id_flight]), 0)  # повторно ничего не создаётся
+
+        Ticket.objects.filter(flight_id=flight, seat_number='2A').delete()
+        sold = _sell_ticket(self, flight, '2A', self.economy, '6000 000001')
+        self.assertEqual(prune_available_seats(batch_size=5), 15)
+        self.assertEqual(list(Ticket.objects.values_list('id_ticket', flat=True)), [sold.id_ticket])
+
+        self.assertEqual(ticket_status_counts(), [
+            {'status': 'AVAILABLE', 'count': 15}, {'status': 'PAID', 'count': 1}])
+        self.assertEqual(total_ticket_count(), 16)
+
+        cancel_tickets([sold.id_ticket])
+        self.assertFalse(Ticket.objects.exists())
+        self.assertEqual(ticket_status_counts(), [{'status': 'AVAILABLE', 'count': 16}])
+        self.assertTrue(AuditLog.objects.filter(
+            table_name='Ticket', record_id=sold.id_ticket, operation='DELETE').exists())
+
+
+class FlightScheduleTest(TestCase):
+    """Функциональный тест: рейсы по регулярному расписанию."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_generate_schedule_flights(self):
+        """Рейсы создаются пачкой с местами, пересечения с рейсами самолёта обнаруживаются."""
+        start = timezone.localdate() + timedelta(days=7)
+        schedule = FlightSchedule.objects.create(
+            airplane_id=self.airplane, departure_airport_id=self.svo, arrival_airport_id=self.led,
+            days_of_week='1234567', departure_at=time(10, 0), flight_minutes=90,
+            valid_from=start, valid_to=start + timedelta(days=13),
+        )
+        # Самолёт уже летит на третий день периода в 10:30
+        busy_departure = timezone.make_aware(
+            datetime.combine(start + timedelta(days=2), time(10, 30)))
+        Flight.objects.create(
+            airplane_id=self.airplane, departure_airport_id=self.led, arrival_airport_id=self.svo,
+            departure_time=busy_departure, arrival_time=busy_departure + timedelta(hours=1),
+            status='SCHEDULED',
+        )
+
+        report = generate_schedule_flights(schedule)
+        self.assertEqual(report['slots'], 14)
+        self.assertEqual(len(report['conflicts']), 1)
+        self.assertEqual(report['created'], [])
+        self.assertEqual(Flight.objects.count(), 1)
+
+        report = generate_schedule_flights(schedule, skip_conflicts=True)
+        self.assertEqual(len(report['created']), 13)
+        self.assertEqual(report['seats'], 13 * 16)
+        self.assertEqual(Ticket.objects.filter(flight_id__in=report['created'], status='AVAILABLE').count(), 13 * 16)
+        self.assertTrue(AuditLog.objects.filter(table_name='FlightSchedule', record_id=schedule.id_schedule).exists())
+
+        # Повторный запуск: все вылеты заняты рейсами самого расписания
+        report = generate_schedule_flights(schedule, skip_conflicts=True)
+        self.assertEqual(len(report['conflicts']), 14)
+        self.assertEqual(report['created'], [])
+
+
+class TicketPartitionKeyTest(TestCase):
+    """Функциональный тест: ключ секции flight_departure у билетов и багажа."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_ticket_partition_key(self):
+        """Ключ секции совпадает с вылетом рейса и меняется при пересадке."""
+        cancelled = _create_flight(self, status='CANCELLED')
+        alternative = _create_flight(self, hours_offset=3)
+        ticket = _sell_ticket(self, cancelled, '3A', self.economy, '7000 000001')
+        self.assertEqual(ticket.flight_departure, cancelled.departure_time)
+
+        baggage_type = BaggageType.objects.create(
+            type_name='STANDARD', max_weight_kg=Decimal('23.00'), base_price=Decimal('1500.00'))
+        baggage = Baggage.objects.create(
+            ticket_id=Ticket.objects.get(pk=ticket.pk), baggage_type_id=baggage_type,
+            weight_kg=Decimal('20.00'), baggage_tag='GQTEST000001',
+        )
+        self.assertEqual(baggage.flight_departure, cancelled.departure_time)
+        self.assertEqual(list(for_flight(Ticket.objects, cancelled)), [ticket])
+
+        rebook_cancelled_flight(cancelled.id_flight)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.flight_id_id, alternative.id_flight)
+        self.assertEqual(ticket.flight_departure, alternative.departure_time)
+        self.assertEqual(list(for_flight(Ticket.objects, alternative)), [ticket])
+
+    def test_baggage_tag_unique_across_partitions(self):
+        """Бирка уникальна во всех секциях: тот же номер на рейсе другого месяца отклоняется."""
+        baggage_type = BaggageType.objects.create(
+            type_name='STANDARD', max_weight_kg=Decimal('23.00'), base_price=Decimal('1500.00'))
+        flights = [_create_flight(self), _create_flight(self, hours_offset=24 * 40)]
+        tickets = [_sell_ticket(self, f, '3A', self.economy, f'7000 00001{i}') for i, f in enumerate(flights)]
+        self.assertNotEqual(tickets[0].flight_departure.month, tickets[1].flight_departure.month)
+
+        Baggage.objects.create(ticket_id=tickets[0], baggage_type_id=baggage_type,
+                               weight_kg=Decimal('20.00'), baggage_tag='GQTAG0000001')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Baggage.objects.create(ticket_id=tickets[1], baggage_type_id=baggage_type,
+                                   weight_kg=Decimal('20.00'), baggage_tag='GQTAG0000001')
+        # После отмены билета с багажом бирка снова свободна
+        cancel_tickets([tickets[0].id_ticket])
+        Baggage.objects.create(ticket_id=tickets[1], baggage_type_id=baggage_type,
+                               weight_kg=Decimal('20.00'), baggage_tag='GQTAG0000001')
+
+
+class FlightArchiveTest(TestCase):
+    """Функциональный тест: перенос выполненных рейсов в архив."""
+
+    def setUp(self):
+        _create_booking_fixtures(self)
+
+    def test_archive_completed_flights(self):
+        """Старый рейс с билетами и багажом уходит в архив, выручка — в итоги рейса."""
+        old = _create_flight(self, hours_offset=-24 * 400, status='COMPLETED')
+        recent = _create_flight(self, hours_offset=-24 * 30, status='COMPLETED')
+        ticket = _sell_ticket(self, old, '3A', self.economy, '7100 000001')
+        _sell_ticket(self, old, '3B', self.economy, '7100 000002')
+        _sell_ticket(self, recent, '3A', self.economy, '7100 000003')
+        baggage_type = BaggageType.objects.create(
+            type_name='STANDARD', max_weight_kg=Decimal('23.00'), base_price=Decimal('1500.00'))
+        Baggage.objects.create(
+            ticket_id=ticket, baggage_type_id=baggage_type,
+            weight_kg=Decimal('20.00'), baggage_tag='GQARCH000001',
+        )
+
+        preview = archive_completed_flights(months=12, dry_run=True)
+        self.assertEqual(preview['flights'], 1)
+        self.assertTrue(Flight.objects.filter(pk=old.pk).exists())
+
+        summary = archive_completed_flights(months=12, batch_size=1)
+        self.assertEqual((summary['flights'], summary['tickets'], summary['baggage']), (1, 2, 1))
+        self.assertEqual(summary['revenue'], Decimal('10000.00'))
+
+        self.assertFalse(Flight.objects.filter(pk=old.pk).exists())
+        self.assertFalse(Ticket.objects.filter(flight_id=old.pk).exists())
+        self.assertFalse(Baggage.objects.filter(baggage_tag='GQARCH000001').exists())
+        self.assertEqual(Ticket.objects.filter(flight_id=recent).count(), 1)
+        self.assertTrue(Payment.objects.filter(pk=ticket.payment_id_id).exists())
+
+        archived = ArchivedTicket.objects.select_related('flight_id').get(pk=ticket.pk)
+        self.assertEqual(archived.flight_id.id_flight, old.id_flight)
+        self.assertEqual(archived.payment_id, ticket.payment_id_id)
+        self.assertEqual([b.baggage_tag for b in archived.baggage_items.all()], ['GQARCH000001'])
+
+        revenue = FlightRevenueSummary.objects.get(pk=old.pk)
+        self.assertEqual((revenue.tickets_sold, revenue.revenue), (2, Decimal('10000.00')))
+        audit = AuditLog.objects.get(table_name='Flight', operation='DELETE')
+        self.assertEqual(audit.record_id, old.pk)
+        self.assertEqual((audit.new_data['tickets_sold'], audit.new_data['revenue']), (2, '10000.00'))
+        self.assertEqual(archive_completed_flights(months=12)['flights'], 0)
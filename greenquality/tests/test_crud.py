@@ -3,9 +3,23 @@
 Запуск: из папки greenquality выполнить
   python manage.py test tests.test_crud
 """
-from datetime import date
-from django.test import TestCase
-from airline.models import Airport, Passenger, Role
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from airline.models import (
+    Account, Airplane, Airport, AuditLog, Class, Flight, Passenger, Payment, Role, Ticket, User
+)
+from airline import panel_import
+from airline.admin_views import BULK_MAX_RECORDS
+from airline.pagination import EstimatedCountPaginator
+from airline.panel_registry import PANELS, TABLES
 
 
 class AirportCRUDTest(TestCase):
@@ -95,3 +109,325 @@ class RoleCRUDTest(TestCase):
         pk = role.id_role
         role.delete()
         self.assertFalse(Role.objects.filter(id_role=pk).exists())
+
+
+class PanelRegistryTest(TestCase):
+    """Функциональный тест: панели администратора и менеджера по общему реестру таблиц."""
+
+    def _client(self, role_name):
+        account = Account.objects.create(
+            email=f'{role_name.lower()}@test.local', password='hash',
+            role_id=Role.objects.get_or_create(role_name=role_name)[0])
+        client = Client()
+        session = client.session
+        session['account_id'] = account.id_account
+        session.save()
+        return client
+
+    def test_panels_share_registry(self):
+        """Все таблицы панелей открываются; CRUD и права менеджера — по реестру."""
+        admin = self._client('ADMIN')
+        for table_name in PANELS['admin'].tables:
+            response = admin.get(reverse('admin_panel'), {'table': table_name})
+            self.assertEqual(response.status_code, 200, table_name)
+            self.assertIs(response.context['model_info'], TABLES[table_name])
+
+        response = admin.post(reverse('admin_crud'), {
+            'table_name': 'Passenger', 'action': 'create', 'first_name': 'Иван', 'last_name': 'Тестов',
+            'passport_number': '1234 567890', 'birthday': '1990-05-15',
+        })
+        self.assertRedirects(response, reverse('admin_panel') + '?table=Passenger', fetch_redirect_response=False)
+        self.assertEqual(Passenger.objects.get(passport_number='1234 567890').birthday, date(1990, 5, 15))
+
+        manager = self._client('MANAGER')
+        self.assertEqual(manager.get(reverse('manager_panel'), {'table': 'Role'}).context['selected_table'], 'Flight')
+        self.assertEqual(manager.get(reverse('manager_get_record'), {'table': 'Role', 'id': 1}).status_code, 403)
+        self.assertEqual(manager.get(reverse('manager_get_options'), {'model': 'Role'}).status_code, 400)
+        options = manager.get(reverse('manager_get_options'), {'model': 'Passenger'}).json()
+        self.assertEqual([o['text'] for o in options], ['Иван Тестов'])
+        self.assertEqual(admin.get(reverse('admin_get_record'), {'table': 'Role', 'id': 1}).status_code, 200)
+
+    @override_settings(PANEL_ESTIMATED_COUNT_MIN_ROWS=10)
+    def test_panel_estimated_count(self):
+        """Большая таблица без фильтров — оценка по статистике; фильтр и ?exact=1 — точное число."""
+        for i in range(12):
+            Airport.objects.create(id_airport=f'T{i:02d}', name=f'Аэропорт {i}', city='Город', country='Россия')
+        with connection.cursor() as cur:
+            cur.execute('ANALYZE')
+        for i in range(12, 15):
+            Airport.objects.create(id_airport=f'T{i:02d}', name=f'Аэропорт {i}', city='Город', country='Россия')
+
+        admin = self._client('ADMIN')
+        paginator = admin.get(reverse('admin_panel'), {'table': 'Airport'}).context['page_obj'].paginator
+        self.assertTrue(paginator.estimated)
+        self.assertEqual(paginator.count, 12)
+        # Страница после последней по оценке не ошибка
+        self.assertEqual(len(paginator.page(3).object_list), 0)
+
+        paginator = admin.get(reverse('admin_panel'), {'table': 'Airport', 'exact': '1'}).context['page_obj'].paginator
+        self.assertFalse(paginator.estimated)
+        self.assertEqual(paginator.count, 15)
+
+        paginator = EstimatedCountPaginator(Airport.objects.filter(city='Город'), 10)
+        self.assertEqual(paginator.count, 15)
+        self.assertFalse(paginator.estimated)
+
+    @override_settings(PANEL_OPTIONS_LIMIT=5)
+    def test_panel_option_search(self):
+        """Поиск связанной записи по началу имени, паспорту и номеру; повторный запрос — из кеша."""
+        cache.clear()
+        for i in range(30):
+            Passenger.objects.create(first_name='Иван', last_name=f'Петров{i:02d}',
+                                     passport_number=f'4500 {i:06d}', birthday=date(1990, 1, 1))
+        Passenger.objects.create(first_name='Анна', last_name='Сидорова', passport_number='4600 000001',
+                                 birthday=date(1990, 1, 1))
+        admin = self._client('ADMIN')
+        url = reverse('admin_get_options')
+
+        options = admin.get(url, {'model': 'Passenger', 'q': 'Анна Сид'}).json()
+        self.assertEqual([o['text'] for o in options], ['Анна Сидорова'])
+        options = admin.get(url, {'model': 'Passenger', 'q': 'Петров'}).json()
+        self.assertEqual(len(options), 5)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(admin.get(url, {'model': 'Passenger', 'q': 'Петров'}).json(), options)
+        self.assertFalse([q for q in queries.captured_queries if '"passengers"' in q['sql']])
+
+        first = Passenger.objects.get(passport_number='4500 000000')
+        options = admin.get(url, {'model': 'Passenger', 'q': '4600', 'selected': first.pk}).json()
+        self.assertEqual([o['value'] for o in options][0], first.pk)
+        self.assertEqual(len(options), 2)
+        options = admin.get(url, {'model': 'Passenger', 'q': str(first.pk)}).json()
+        self.assertIn(first.pk, [o['value'] for o in options])
+
+    def test_panel_bulk_operations(self):
+        """Массовое изменение поля и удаление: одна транзакция, аудит одним INSERT."""
+        for code in ('BA1', 'BA2', 'BA3'):
+            Airport.objects.create(id_airport=code, name=f'Аэропорт {code}', city='Старый', country='Россия')
+        admin = self._client('ADMIN')
+        url = reverse('admin_crud')
+
+        with CaptureQueriesContext(connection) as queries:
+            admin.post(url, {'table_name': 'Airport', 'action': 'bulk_update', 'field': 'city',
+                             'value': 'Новый', 'record_ids': ['BA1', 'BA2']})
+        self.assertEqual(sorted(Airport.objects.filter(city='Новый').values_list('pk', flat=True)), ['BA1', 'BA2'])
+        self.assertEqual(len([q for q in queries.captured_queries
+                              if q['sql'].startswith('INSERT INTO "audit_log"')]), 1)
+        entry = AuditLog.objects.get(table_name='Airport', operation='UPDATE', old_data__id_airport='BA1')
+        self.assertEqual((entry.old_data['city'], entry.new_data['city']), ('Старый', 'Новый'))
+
+        response = admin.post(url, {'table_name': 'Airport', 'action': 'bulk_update', 'field': 'id_airport',
+                                    'value': 'XXX', 'record_ids': ['BA3']}, follow=True)
+        self.assertContains(response, 'нельзя изменить для нескольких записей')
+
+        # Выбор больше BULK_MAX_RECORDS отклоняется целиком, данные не меняются
+        too_many = ['BA3'] + [f'Z{i:04d}' for i in range(BULK_MAX_RECORDS)]
+        response = admin.post(url, {'table_name': 'Airport', 'action': 'bulk_delete', 'record_ids': too_many},
+                              follow=True)
+        self.assertContains(response, 'Выбрано слишком много записей')
+        self.assertTrue(Airport.objects.filter(pk='BA3').exists())
+
+        admin.post(url, {'table_name': 'Airport', 'action': 'bulk_delete', 'record_ids': ['BA1', 'BA3']})
+        self.assertEqual(list(Airport.objects.filter(pk__startswith='BA').values_list('pk', flat=True)), ['BA2'])
+        self.assertEqual(AuditLog.objects.filter(table_name='Airport', operation='DELETE').count(), 2)
+
+        manager = self._client('MANAGER')
+        manager.post(reverse('manager_crud'), {'table_name': 'Airport', 'action': 'bulk_delete', 'record_ids': ['BA2']})
+        self.assertTrue(Airport.objects.filter(pk='BA2').exists())
+
+        # Массовая смена роли (QuerySet.update, без сигналов) действует сразу, несмотря на кеш принципалов
+        user_role = Role.objects.get_or_create(role_name='USER')[0]
+        self.assertEqual(manager.get(reverse('manager_panel')).status_code, 200)
+        account_id = manager.session['account_id']
+        admin.post(url, {'table_name': 'Account', 'action': 'bulk_update', 'field': 'role_id',
+                         'value': user_role.pk, 'record_ids': [account_id]})
+        self.assertEqual(Account.objects.get(pk=account_id).role_id_id, user_role.pk)
+        self.assertNotEqual(manager.get(reverse('manager_panel')).status_code, 200)
+
+    def test_panel_crud_query_count(self):
+        """Изменение билета: внешние ключи — по запросу на модель, запись читается один раз."""
+        svo = Airport.objects.create(id_airport='SVO', name='Шереметьево', city='Москва', country='Россия')
+        led = Airport.objects.create(id_airport='LED', name='Пулково', city='Санкт-Петербург', country='Россия')
+        airplane = Airplane.objects.create(
+            model='Test 2x2', registration_number='GQ-TEST-002', capacity=4,
+            economy_capacity=4, business_capacity=0, first_capacity=0, rows=2, seats_row=2,
+        )
+        departure = timezone.now() + timedelta(days=2)
+        flight = Flight.objects.create(
+            airplane_id=airplane, departure_airport_id=svo, arrival_airport_id=led,
+            departure_time=departure, arrival_time=departure + timedelta(hours=1),
+        )
+        economy = Class.objects.create(class_name='ECONOMY')
+        passenger = Passenger.objects.create(first_name='Иван', last_name='Тестов',
+                                             passport_number='4500 000001', birthday=date(1990, 1, 1))
+        admin = self._client('ADMIN')
+        buyer = User.objects.create(account_id=Account.objects.get(email='admin@test.local'),
+                                    first_name='Иван', last_name='Тестов')
+        payment = Payment.objects.create(user_id=buyer, total_cost=Decimal('5000.00'),
+                                         payment_method='ONLINE', status='COMPLETED')
+        ticket = Ticket.objects.create(flight_id=flight, class_id=economy, seat_number='1A',
+                                       price=Decimal('5000.00'), status='PAID',
+                                       passenger_id=passenger, payment_id=payment)
+        admin.get(reverse('admin_panel'))  # принципал — в кеше, как у повторного запроса
+        url = reverse('admin_crud')
+
+        def app_queries(data):
+            with CaptureQueriesContext(connection) as queries:
+                admin.post(url, data)
+            return [q['sql'] for q in queries.captured_queries if '"django_session"' not in q['sql']]
+
+        form = {'table_name': 'Ticket', 'flight_id': flight.pk, 'class_id': economy.pk, 'seat_number': '2B',
+                'price': '5500.00', 'status': 'PAID', 'passenger_id': passenger.pk, 'payment_id': payment.pk}
+        # Запись, 4 целевые модели (in_bulk), UPDATE, аудит (аккаунт + INSERT)
+        sql = app_queries({**form, 'action': 'update', 'record_id': ticket.pk})
+        self.assertEqual(len(sql), 8, sql)
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.seat_number, ticket.flight_departure), ('2B', flight.departure_time))
+        entry = AuditLog.objects.get(table_name='Ticket', operation='UPDATE')
+        self.assertEqual((entry.old_data['flight_id'], entry.old_data['seat_number']), (flight.pk, '1A'))
+
+        # Аэропорты вылета и прилёта — одним запросом
+        sql = app_queries({'table_name': 'Flight', 'action': 'create', 'airplane_id': airplane.pk,
+                           'departure_airport_id': 'LED', 'arrival_airport_id': 'SVO',
+                           'departure_time': departure.isoformat(),
+                           'arrival_time': (departure + timedelta(hours=1)).isoformat(),
+                           'status': 'SCHEDULED'})
+        self.assertEqual(len([q for q in sql if 'FROM "airports"' in q]), 1, sql)
+        self.assertEqual(Flight.objects.filter(departure_airport_id='LED').count(), 1)
+
+        sql = app_queries({**form, 'action': 'create', 'seat_number': '1B', 'payment_id': 999999})
+        self.assertFalse(Ticket.objects.filter(seat_number='1B').exists())
+        self.assertFalse([q for q in sql if q.startswith('INSERT INTO "tickets"')])
+
+    @override_settings(PANEL_EXPORT_CHUNK_SIZE=2)
+    def test_panel_export(self):
+        """Выгрузка таблицы в CSV и JSONL потоком: столбцы реестра, порядок панели, права панели."""
+        for code, name in (('EA1', 'Бета'), ('EA2', 'Альфа'), ('EA3', 'Гамма')):
+            Airport.objects.create(id_airport=code, name=name, city='Город', country='Россия')
+        admin = self._client('ADMIN')
+        url = reverse('admin_export')
+
+        response = admin.get(url, {'table': 'Airport', 'sort_by': 'name', 'order': 'desc', 'format': 'csv'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'id_airport,name,city,country')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['EA3', 'EA1', 'EA2'])
+
+        admin.post(reverse('admin_crud'), {'table_name': 'Airport', 'action': 'update', 'record_id': 'EA1',
+                                           'name': 'Бета-2', 'city': 'Город', 'country': 'Россия'})
+        response = admin.get(url, {'table': 'AuditLog', 'format': 'jsonl'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['old_data']['name'], rows[0]['changed_by']), ('Бета', Account.objects.get(
+            email='admin@test.local').pk))
+
+        manager = self._client('MANAGER')
+        response = manager.get(reverse('manager_export'), {'table': 'Airport', 'format': 'csv'})
+        self.assertRedirects(response, reverse('manager_panel'), fetch_redirect_response=False)
+        response = manager.get(reverse('manager_export'), {'table': 'Flight', 'format': 'xml'})
+        self.assertFalse(response.streaming)
+
+    def test_panel_csv_import(self):
+        """Загрузка CSV: добавление и обновление по ключу, ошибки строк не прерывают загрузку."""
+        Airport.objects.create(id_airport='IM1', name='Старое имя', city='Город', country='Россия')
+        admin = self._client('ADMIN')
+        # Временная таблица заполняется пачками — по строке, чтобы в файле их было несколько
+        self.addCleanup(setattr, panel_import, 'LOAD_CHUNK_SIZE', panel_import.LOAD_CHUNK_SIZE)
+        panel_import.LOAD_CHUNK_SIZE = 1
+        url = reverse('admin_crud')
+
+        def upload(table_name, content):
+            upload_file = SimpleUploadedFile('import.csv', content.encode('utf-8-sig'), content_type='text/csv')
+            return admin.post(url, {'table_name': table_name, 'action': 'import', 'import_file': upload_file},
+                              follow=True)
+
+        response = upload('Airport', 'id_airport,name,city,country\n'
+                                     'IM1,Новое имя,Город,Россия\n'
+                                     'IM2,Второй,Город,Россия\n'
+                                     'IM3,,Город,Россия\n'
+                                     'IM2,Дубликат,Город,Россия\n')
+        self.assertEqual(Airport.objects.get(pk='IM1').name, 'Новое имя')
+        self.assertEqual(Airport.objects.get(pk='IM2').name, 'Второй')
+        self.assertFalse(Airport.objects.filter(pk='IM3').exists())
+        self.assertContains(response, 'добавлено 1, обновлено 1')
+        self.assertContains(response, 'Строка 4:')
+        self.assertContains(response, 'Строка 5:')
+        audit = AuditLog.objects.get(table_name='Airport', operation='INSERT')
+        self.assertIsNone(audit.record_id)
+        self.assertEqual((audit.new_data['inserted'], audit.new_data['errors']), (1, 2))
+
+        # Внешние ключи — одним запросом на модель; нарушение CHECK отсеивает только свою строку
+        airplane = Airplane.objects.create(
+            model='Test 2x2', registration_number='GQ-TEST-003', capacity=4,
+            economy_capacity=4, business_capacity=0, first_capacity=0, rows=2, seats_row=2,
+        )
+        header = 'airplane_id,departure_airport_id,arrival_airport_id,departure_time,arrival_time,status\n'
+        with CaptureQueriesContext(connection) as queries:
+            response = upload('Flight', header
+                              + f'{airplane.pk},IM1,IM2,2030-01-01T10:00:00+00:00,2030-01-01T12:00:00+00:00,SCHEDULED\n'
+                              + f'{airplane.pk},IM1,XXX,2030-01-01T10:00:00+00:00,2030-01-01T12:00:00+00:00,SCHEDULED\n'
+                              + f'{airplane.pk},IM2,IM1,2030-01-02T10:00:00+00:00,2030-01-02T09:00:00+00:00,SCHEDULED\n'
+                              + f'{airplane.pk},IM2,IM1,2030-01-03T10:00:00+00:00,2030-01-03T12:00:00+00:00,BOGUS\n')
+        self.assertEqual(Flight.objects.count(), 1)
+        self.assertEqual(len([q for q in queries.captured_queries if 'FROM "airports"' in q['sql']]), 1)
+        self.assertContains(response, 'добавлено 1, обновлено 0')
+        for line in (3, 4, 5):
+            self.assertContains(response, f'Строка {line}:')
+
+        self.assertContains(upload('Airport', 'code,name\nIM9,x\n'), 'Неизвестный столбец')
+        self.assertContains(upload('Account', 'email\na@b.c\n'), 'нельзя загружать из файла')
+
+        # Загрузка ролей идёт в обход сигналов моделей — кеш принципалов всё равно сбрасывается
+        manager = self._client('MANAGER')
+        self.assertEqual(manager.get(reverse('manager_panel')).status_code, 200)
+        role = Role.objects.get(role_name='MANAGER')
+        upload('Role', f'id_role,role_name\n{role.pk},FORMER_MANAGER\n')
+        self.assertEqual(Role.objects.get(pk=role.pk).role_name, 'FORMER_MANAGER')
+        self.assertNotEqual(manager.get(reverse('manager_panel')).status_code, 200)
+
+    def test_panel_filters_and_search(self):
+        """Фильтры столбцов и поиск: сочетаются с сортировкой, пагинацией и выгрузкой, состояние — в ссылках."""
+        svo = Airport.objects.create(id_airport='SVO', name='Шереметьево', city='Москва', country='Россия')
+        led = Airport.objects.create(id_airport='LED', name='Пулково', city='Санкт-Петербург', country='Россия')
+        airplane = Airplane.objects.create(
+            model='Test 4x4', registration_number='GQ-TEST-004', capacity=16,
+            economy_capacity=16, business_capacity=0, first_capacity=0, rows=4, seats_row=4,
+        )
+        departure = timezone.now() + timedelta(days=2)
+        flight = Flight.objects.create(airplane_id=airplane, departure_airport_id=svo, arrival_airport_id=led,
+                                       departure_time=departure, arrival_time=departure + timedelta(hours=1))
+        economy = Class.objects.create(class_name='ECONOMY')
+        admin = self._client('ADMIN')
+        buyer = User.objects.create(account_id=Account.objects.get(email='admin@test.local'),
+                                    first_name='Иван', last_name='Тестов')
+        payment = Payment.objects.create(user_id=buyer, total_cost=Decimal('1.00'), payment_method='ONLINE')
+        for i in range(12):
+            passenger = Passenger.objects.create(first_name='Пассажир', last_name=f'Smith{i:02d}',
+                                                 passport_number=f'4700 {i:06d}', birthday=date(1990, 1, 1))
+            Ticket.objects.create(flight_id=flight, class_id=economy, seat_number=f'{i + 1}A',
+                                  price=Decimal(1000 + i * 100), status='PAID' if i % 2 else 'BOOKED',
+                                  passenger_id=passenger, payment_id=payment)
+        url = reverse('admin_panel')
+
+        def seats(params):
+            response = admin.get(url, {'table': 'Ticket', **params})
+            return response, [t.seat_number for t in response.context['objects']]
+
+        response, found = seats({'f_status': 'PAID', 'f_price_from': '1500', 'sort_by': 'price', 'order': 'asc'})
+        self.assertEqual(found, ['6A', '8A', '10A', '12A'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+        self.assertContains(response, 'f_price_from=1500&amp;f_status=PAID&sort_by=seat_number')
+
+        # Поиск по месту и по фамилии/паспорту пассажира
+        self.assertEqual(seats({'q': '12a'})[1], ['12A'])
+        self.assertEqual(seats({'q': 'smith03'})[1], ['4A'])
+        self.assertEqual(seats({'q': 'smith05 4700', 'f_status': 'PAID'})[1], ['6A'])
+        self.assertEqual(seats({'q': '4700', 'f_status': 'BOOKED'})[0].context['page_obj'].paginator.count, 6)
+        # Некорректные значения фильтров пропускаются
+        response, found = seats({'f_status': 'NOPE', 'f_price_from': 'abc', 'f_flight_id': 'x'})
+        self.assertEqual(len(found), 10)
+        self.assertEqual(response.context['filter_values'], {})
+
+        response = admin.get(reverse('admin_export'), {'table': 'Ticket', 'format': 'csv', 'f_status': 'BOOKED',
+                                                       'f_price_to': '1400'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 1 + 3)
@@ -0,0 +1,25 @@
+"""
+Функциональный тест: индексы горячих запросов.
+Запуск: из папки greenquality выполнить
+  python manage.py test tests.test_indexes
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from airline.index_advisor import HOT_QUERIES, explain_hot_queries
+
+
+class HotQueryIndexTest(TestCase):
+    """Функциональный тест: горячие запросы не читают таблицы целиком."""
+
+    def test_hot_queries_use_indexes(self):
+        """EXPLAIN каждого горячего запроса без последовательного чтения таблиц."""
+        results = explain_hot_queries(min_rows=0)
+        self.assertEqual(len(results), len(HOT_QUERIES))
+        self.assertEqual([r['name'] for r in results if r['flagged']], [])
+
+        out = StringIO()
+        call_command('index_advisor', '--min-rows', '0', '--strict', stdout=out)
+        self.assertIn(f'Запросов: {len(HOT_QUERIES)}', out.getvalue())
@@ -15,6 +15,38 @@ from django.test.runner import DiscoverRunner
     'test_api_airports_list_and_create': 'API аэропортов: список, создание, чтение по id',
     'test_api_flights_list_search_upcoming': 'API рейсов: список, поиск, предстоящие',
     'test_export_statistics': 'Экспорт статистики (CSV/PDF) для менеджера',
+    'test_rebook_cancelled_flight': 'Пересадка пассажиров с отменённого рейса',
+    'test_cancel_payment_releases_seats': 'Отмена билетов и возврат платежа',
+    'test_recommend_adjacent_seats': 'Подбор мест рядом для группы',
+    'test_process_pending_payments': 'Асинхронная обработка платежей',
+    'test_reconcile_settlement_file': 'Сверка платежей с файлом расчётов',
+    'test_lazy_ticket_inventory': 'Режим lazy: места без строк билетов',
+    'test_generate_schedule_flights': 'Рейсы по регулярному расписанию',
+    'test_ticket_partition_key': 'Ключ секции билетов и багажа',
+    'test_archive_completed_flights': 'Перенос выполненных рейсов в архив',
+    'test_hot_queries_use_indexes': 'Индексы горячих запросов (EXPLAIN)',
+    'test_principal_cache': 'Кеш роли пользователя из сессии',
+    'test_page_views_do_not_write_session': 'Просмотр страниц без записи сессии',
+    'test_api_token_auth': 'Токены API: выдача, проверка без сессии, отзыв',
+    'test_login_throttle_and_rehash': 'Ограничение попыток входа и пересчёт хеша пароля',
+    'test_purge_expired_sessions': 'Удаление истёкших сессий пачками',
+    'test_panels_share_registry': 'Панели администратора и менеджера по реестру таблиц',
+    'test_panel_estimated_count': 'Оценка числа записей в пагинации панели',
+    'test_panel_option_search': 'Поиск связанных записей в формах панели',
+    'test_panel_bulk_operations': 'Массовые операции в панели с пакетным аудитом',
+    'test_panel_crud_query_count': 'Число запросов CRUD панели со связанными записями',
+    'test_panel_export': 'Выгрузка таблицы панели в CSV и JSONL',
+    'test_panel_csv_import': 'Загрузка CSV в таблицу панели с отчётом об ошибках строк',
+    'test_panel_filters_and_search': 'Фильтры столбцов и поиск в панели',
+    'test_validation_plan_shared': 'Общий план проверки данных для панелей и API',
+    'test_payment_claim_recovery': 'Захват платежей обработчиком и повтор зависших',
+    'test_user_cancel_rules': 'Правила отмены билета пользователем',
+    'test_cancel_flight_rebooks_first': 'Отмена рейса с пересадкой и возвратом оставшимся',
+    'test_cancel_unpaid_booking': 'Отмена брони без списания: платёж CANCELLED',
+    'test_rebook_skips_departed_flights': 'Пересадка только на невылетевшие рейсы',
+    'test_baggage_tag_unique_across_partitions': 'Уникальность бирки багажа во всех секциях',
+    'test_purchase_requires_class_fare': 'Покупка билета только по заданному тарифу класса',
+    'test_cancel_flight_holds_processing_payments': 'Отмена рейса при платежах в обработке',
 }
 
 
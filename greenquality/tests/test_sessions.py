@@ -0,0 +1,57 @@
+"""
+Тесты сессий (без записи при просмотре страниц, удаление истёкших).
+Запуск: из папки greenquality выполнить
+  python manage.py test tests.test_sessions
+"""
+from datetime import timedelta
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from airline.session_cleanup import purge_expired_sessions, session_table_stats
+from tests.helpers import login_as_admin
+
+
+class SessionWritesTest(TestCase):
+    """Интеграционный тест: просмотр страниц не перезаписывает сессию."""
+
+    def test_page_views_do_not_write_session(self):
+        """Страницы вошедшего администратора: флаги роли в шаблоне, без записи в django_session."""
+        client = Client()
+        login_as_admin(client)
+
+        with CaptureQueriesContext(connection) as queries:
+            for page in ('index', 'flights', 'about'):
+                response = client.get(reverse(page))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['is_admin'])
+        writes = [q['sql'] for q in queries.captured_queries
+                  if 'django_session' in q['sql'] and not q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertEqual(writes, [])
+        self.assertNotIn('is_admin', client.session)
+
+
+class SessionPurgeTest(TestCase):
+    """Функциональный тест: удаление истёкших сессий пачками."""
+
+    def test_purge_expired_sessions(self):
+        """Истёкшие сессии удаляются пачками по batch_size, действующие остаются."""
+        for i in range(5):
+            store = SessionStore()
+            store['n'] = i
+            store.create()
+        live = SessionStore()
+        live.create()
+        Session.objects.exclude(session_key=live.session_key).update(
+            expire_date=timezone.now() - timedelta(days=1))
+        self.assertEqual(session_table_stats()['expired'], 5)
+
+        self.assertEqual(purge_expired_sessions(batch_size=2, max_batches=1), {'purged': 2, 'batches': 1})
+        self.assertEqual(purge_expired_sessions(batch_size=2), {'purged': 3, 'batches': 2})
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [live.session_key])
+        self.assertEqual(session_table_stats()['expired'], 0)
@@ -0,0 +1,43 @@
+"""
+Функциональный тест: проверка данных по правилам форм панелей (общий план проверки).
+Запуск: из папки greenquality выполнить
+  python manage.py test tests.test_validation
+"""
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airline.models import Airplane, Passenger
+from airline.validation import validate_crud_data, validation_plan
+from tests.helpers import login_as_admin
+
+
+class ValidationPlanTest(TestCase):
+    """Функциональный тест: план проверки строится один раз и общий для панелей и API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        login_as_admin(self.client)
+
+    def test_validation_plan_shared(self):
+        """Правила форм панелей из кешированного плана; API отклоняет те же значения."""
+        validation_plan.cache_clear()
+        self.assertIs(validation_plan(Passenger), validation_plan(Passenger))
+        self.assertEqual(validation_plan.cache_info().misses, 1)
+
+        errors = validate_crud_data(Passenger, {'first_name': 'Иван', 'passport_number': 'AB-1'}, 'create')
+        self.assertEqual(len(errors), 3)  # фамилия и дата рождения обязательны, паспорт — только цифры
+        passport_error = 'Поле «passport number» должно содержать только цифры и пробелы.'
+        self.assertIn(passport_error, errors)
+        self.assertEqual(validate_crud_data(Passenger, {'passport_number': 'AB-1'}, 'update'), [passport_error])
+        self.assertEqual(validate_crud_data(Airplane, {'rows': '-1', 'capacity': 'x'}, 'update'),
+                         ['Поле «capacity» должно быть целым числом.', 'Поле «rows» должно быть не меньше нуля.'])
+
+        payload = {'first_name': 'Иван', 'last_name': 'Тестов', 'passport_number': 'AB-1', 'birthday': '1990-01-01'}
+        response = self.client.post(reverse('passenger-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Passenger.objects.exists())
+        payload['passport_number'] = '4500 123456'
+        self.assertEqual(self.client.post(reverse('passenger-list'), payload, format='json').status_code,
+                         status.HTTP_201_CREATED)
@@ -4,10 +4,17 @@
 -- =============================================================================
 
 -- Удаление таблиц в обратном порядке зависимостей (для повторного запуска)
+DROP TABLE IF EXISTS api_token_revocations CASCADE;
+DROP TABLE IF EXISTS baggage_tags CASCADE;
+DROP TABLE IF EXISTS archive_baggage CASCADE;
+DROP TABLE IF EXISTS archive_tickets CASCADE;
+DROP TABLE IF EXISTS archive_flights CASCADE;
+DROP TABLE IF EXISTS flight_revenue_summary CASCADE;
 DROP TABLE IF EXISTS baggage CASCADE;
 DROP TABLE IF EXISTS tickets CASCADE;
 DROP TABLE IF EXISTS payments CASCADE;
 DROP TABLE IF EXISTS audit_log CASCADE;
+DROP TABLE IF EXISTS flight_schedules CASCADE;
 DROP TABLE IF EXISTS flights CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 DROP TABLE IF EXISTS passengers CASCADE;
@@ -57,7 +64,8 @@ CREATE TABLE passengers (
 
 CREATE TABLE class (
     id_class SERIAL PRIMARY KEY,
-    class_name VARCHAR(50) NOT NULL UNIQUE
+    class_name VARCHAR(50) NOT NULL UNIQUE,
+    base_price NUMERIC(8, 2) NOT NULL DEFAULT 0
 );
 
 CREATE TABLE baggage_types (
@@ -94,7 +102,7 @@ CREATE TABLE users (
 CREATE TABLE audit_log (
     id_audit SERIAL PRIMARY KEY,
     table_name VARCHAR(50) NOT NULL,
-    record_id INTEGER NOT NULL,
+    record_id INTEGER,
     operation VARCHAR(10) NOT NULL,
     old_data JSONB,
     new_data JSONB,
@@ -115,17 +123,34 @@ CREATE TABLE flights (
     CONSTRAINT check_departure_before_arrival CHECK (departure_time < arrival_time)
 );
 
+CREATE TABLE flight_schedules (
+    id_schedule SERIAL PRIMARY KEY,
+    airplane_id INTEGER NOT NULL REFERENCES airplanes(id_airplane) ON DELETE CASCADE,
+    departure_airport_id VARCHAR(3) NOT NULL REFERENCES airports(id_airport) ON DELETE CASCADE,
+    arrival_airport_id VARCHAR(3) NOT NULL REFERENCES airports(id_airport) ON DELETE CASCADE,
+    days_of_week VARCHAR(7) NOT NULL,
+    departure_at TIME NOT NULL,
+    flight_minutes INTEGER NOT NULL CHECK (flight_minutes >= 0),
+    valid_from DATE NOT NULL,
+    valid_to DATE NOT NULL,
+    CONSTRAINT check_schedule_period CHECK (valid_from <= valid_to)
+);
+
 CREATE TABLE payments (
     id_payment SERIAL PRIMARY KEY,
     payment_date TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     total_cost NUMERIC(9, 2) NOT NULL,
     user_id INTEGER NOT NULL REFERENCES users(id_user) ON DELETE CASCADE,
     payment_method VARCHAR(30) NOT NULL,
-    status VARCHAR(20) NOT NULL DEFAULT 'PENDING'
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    claimed_at TIMESTAMP WITH TIME ZONE
 );
 
+-- tickets и baggage секционированы по месяцу вылета рейса (flight_departure),
+-- секции создаёт ensure_ticket_partitions (scripts/partitions.sql).
+-- Ключ секции входит в первичный ключ и уникальные ограничения
 CREATE TABLE tickets (
-    id_ticket SERIAL PRIMARY KEY,
+    id_ticket SERIAL,
     flight_id INTEGER NOT NULL REFERENCES flights(id_flight) ON DELETE CASCADE,
     class_id INTEGER NOT NULL REFERENCES class(id_class) ON DELETE CASCADE,
     seat_number VARCHAR(5) NOT NULL,
@@ -133,17 +158,77 @@ CREATE TABLE tickets (
     status VARCHAR(20) NOT NULL DEFAULT 'AVAILABLE',
     passenger_id INTEGER REFERENCES passengers(id_passenger) ON DELETE CASCADE,
     payment_id INTEGER REFERENCES payments(id_payment) ON DELETE SET NULL,
-    CONSTRAINT unique_flight_seat UNIQUE (flight_id, seat_number)
-);
+    flight_departure TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id_ticket, flight_departure),
+    CONSTRAINT unique_flight_seat UNIQUE (flight_id, seat_number, flight_departure)
+) PARTITION BY RANGE (flight_departure);
 
 CREATE TABLE baggage (
-    id_baggage SERIAL PRIMARY KEY,
-    ticket_id INTEGER NOT NULL REFERENCES tickets(id_ticket) ON DELETE CASCADE,
+    id_baggage SERIAL,
+    ticket_id INTEGER NOT NULL,
     baggage_type_id INTEGER NOT NULL REFERENCES baggage_types(id_baggage_type) ON DELETE CASCADE,
     weight_kg NUMERIC(5, 2) NOT NULL,
-    baggage_tag VARCHAR(12) NOT NULL UNIQUE,
+    -- Уникальность бирки в пределах секции; глобально — реестр baggage_tags (partitions.sql)
+    baggage_tag VARCHAR(12) NOT NULL,
     status VARCHAR(20) NOT NULL DEFAULT 'REGISTERED',
-    registered_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+    registered_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    flight_departure TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id_baggage, flight_departure),
+    CONSTRAINT baggage_tag_unique UNIQUE (baggage_tag, flight_departure),
+    CONSTRAINT baggage_ticket_fk FOREIGN KEY (ticket_id, flight_departure)
+        REFERENCES tickets(id_ticket, flight_departure) ON DELETE CASCADE ON UPDATE CASCADE
+) PARTITION BY RANGE (flight_departure);
+
+-- Архив выполненных рейсов (airline/archive.py, команда archive_flights).
+-- Номера самолёта, аэропортов, пассажира и платежа — без внешних ключей
+CREATE TABLE archive_flights (
+    id_flight INTEGER PRIMARY KEY,
+    airplane_id INTEGER NOT NULL,
+    departure_airport_id VARCHAR(3) NOT NULL,
+    arrival_airport_id VARCHAR(3) NOT NULL,
+    departure_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    arrival_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR(30) NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE TABLE archive_tickets (
+    id_ticket INTEGER PRIMARY KEY,
+    flight_id INTEGER NOT NULL REFERENCES archive_flights(id_flight) ON DELETE CASCADE,
+    class_id INTEGER NOT NULL,
+    seat_number VARCHAR(5) NOT NULL,
+    price NUMERIC(8, 2) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    passenger_id INTEGER,
+    payment_id INTEGER
+);
+
+CREATE TABLE archive_baggage (
+    id_baggage INTEGER PRIMARY KEY,
+    ticket_id INTEGER NOT NULL REFERENCES archive_tickets(id_ticket) ON DELETE CASCADE,
+    baggage_type_id INTEGER NOT NULL,
+    weight_kg NUMERIC(5, 2) NOT NULL,
+    baggage_tag VARCHAR(12) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    registered_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Итоги архивных рейсов для отчётов о выручке (v_airports_revenue_report)
+CREATE TABLE flight_revenue_summary (
+    id_flight INTEGER PRIMARY KEY,
+    departure_airport_id VARCHAR(3) NOT NULL,
+    arrival_airport_id VARCHAR(3) NOT NULL,
+    departure_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    tickets_sold INTEGER NOT NULL,
+    revenue NUMERIC(12, 2) NOT NULL
+);
+
+-- Отозванные токены REST API (до истечения срока действия токена)
+CREATE TABLE api_token_revocations (
+    jti VARCHAR(32) PRIMARY KEY,
+    account_id INTEGER NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- =============================================================================
@@ -152,10 +237,38 @@ CREATE TABLE baggage (
 
 CREATE INDEX idx_accounts_role ON accounts(role_id);
 CREATE INDEX idx_audit_log_changed_by ON audit_log(changed_by);
+CREATE INDEX idx_audit_log_table_changed ON audit_log(table_name, changed_at);
 CREATE INDEX idx_flights_airplane ON flights(airplane_id);
 CREATE INDEX idx_flights_departure_airport ON flights(departure_airport_id);
 CREATE INDEX idx_flights_arrival_airport ON flights(arrival_airport_id);
 CREATE INDEX idx_flights_departure_time ON flights(departure_time);
 CREATE INDEX idx_tickets_flight ON tickets(flight_id);
 CREATE INDEX idx_tickets_passenger ON tickets(passenger_id);
+CREATE INDEX idx_tickets_payment ON tickets(payment_id);
+CREATE INDEX idx_tickets_flight_status ON tickets(flight_id, status);
+CREATE INDEX idx_payments_user_date ON payments(user_id, payment_date);
+CREATE INDEX idx_payments_status_date ON payments(status, payment_date);
 CREATE INDEX idx_baggage_ticket ON baggage(ticket_id);
+CREATE INDEX idx_baggage_tag ON baggage(baggage_tag);
+CREATE INDEX idx_archive_tickets_flight ON archive_tickets(flight_id);
+CREATE INDEX idx_archive_tickets_passenger ON archive_tickets(passenger_id);
+CREATE INDEX idx_archive_tickets_payment ON archive_tickets(payment_id);
+CREATE INDEX idx_archive_baggage_ticket ON archive_baggage(ticket_id);
+CREATE INDEX idx_archive_baggage_tag ON archive_baggage(baggage_tag);
+CREATE INDEX idx_api_token_revocations_expires ON api_token_revocations(expires_at);
+-- Поиск в списках выбора форм панелей: UPPER(поле) LIKE UPPER('запрос%')
+CREATE INDEX idx_passengers_last_name_prefix ON passengers (UPPER(last_name::text) text_pattern_ops);
+CREATE INDEX idx_passengers_first_name_prefix ON passengers (UPPER(first_name::text) text_pattern_ops);
+CREATE INDEX idx_passengers_passport_prefix ON passengers (UPPER(passport_number::text) text_pattern_ops);
+CREATE INDEX idx_users_last_name_prefix ON users (UPPER(last_name::text) text_pattern_ops);
+CREATE INDEX idx_users_first_name_prefix ON users (UPPER(first_name::text) text_pattern_ops);
+CREATE INDEX idx_accounts_email_prefix ON accounts (UPPER(email::text) text_pattern_ops);
+-- Поиск и фильтры таблиц панелей
+CREATE INDEX idx_flights_status_departure ON flights(status, departure_time);
+CREATE INDEX idx_airports_name_prefix ON airports (UPPER(name::text) text_pattern_ops);
+CREATE INDEX idx_airports_city_prefix ON airports (UPPER(city::text) text_pattern_ops);
+CREATE INDEX idx_airplanes_model_prefix ON airplanes (UPPER(model::text) text_pattern_ops);
+CREATE INDEX idx_airplanes_registration_prefix ON airplanes (UPPER(registration_number::text) text_pattern_ops);
+CREATE INDEX idx_tickets_seat_prefix ON tickets (UPPER(seat_number::text) text_pattern_ops);
+CREATE INDEX idx_baggage_tag_prefix ON baggage (UPPER(baggage_tag::text) text_pattern_ops);
+CREATE INDEX idx_audit_log_table_prefix ON audit_log (UPPER(table_name::text) text_pattern_ops);
@@ -4,7 +4,8 @@
 -- =============================================================================
 
 -- Очистка существующих данных (для повторного заполнения)
-TRUNCATE TABLE baggage, tickets, payments, audit_log, flights, users, passengers,
+TRUNCATE TABLE api_token_revocations, archive_baggage, archive_tickets, archive_flights, flight_revenue_summary,
+    baggage, tickets, payments, audit_log, flights, users, passengers,
     accounts, baggage_types, class, airplanes, airports, roles
 RESTART IDENTITY CASCADE;
 
@@ -19,10 +20,10 @@ INSERT INTO roles (role_name) VALUES
 -- =============================================================================
 -- Классы обслуживания
 -- =============================================================================
-INSERT INTO class (class_name) VALUES
-    ('ECONOMY'),
-    ('BUSINESS'),
-    ('FIRST');
+INSERT INTO class (class_name, base_price) VALUES
+    ('ECONOMY', 5000.00),
+    ('BUSINESS', 15000.00),
+    ('FIRST', 30000.00);
 
 -- =============================================================================
 -- Аэропорты
@@ -0,0 +1,175 @@
+-- =============================================================================
+-- GreenQuality: Секционирование tickets и baggage по месяцу вылета
+-- Ключ секции — flight_departure (копия flights.departure_time): билет и его
+-- багаж лежат в секции месяца вылета рейса (tickets_2026_10, baggage_2026_10).
+-- Границы секций — по UTC. Запросы с условием на flight_departure читают
+-- только нужные секции (partition pruning).
+--
+-- 1. ensure_ticket_partitions — создание секций на N месяцев вперёд
+--    (вызывается командой ticket_partitions и триггером рейсов)
+-- 2. Триггеры рейсов: секция месяца вылета создаётся до вставки рейса,
+--    при переносе вылета билеты (и по FK — багаж) переезжают в новую секцию
+-- 3. Ключ секции билета и багажа берётся из рейса и билета при вставке
+--    и при смене рейса/билета
+-- 4. Реестр бирок baggage_tags: глобальная уникальность baggage_tag
+--    (уникальный индекс секционированной таблицы обязан включать ключ секции)
+-- Требуется PostgreSQL 15+ (перенос строк между секциями при наличии FK).
+-- =============================================================================
+
+DROP TRIGGER IF EXISTS tr_flights_ticket_partitions ON flights;
+DROP TRIGGER IF EXISTS tr_flights_move_tickets ON flights;
+DROP TRIGGER IF EXISTS tr_tickets_flight_departure ON tickets;
+DROP TRIGGER IF EXISTS tr_baggage_flight_departure ON baggage;
+DROP TRIGGER IF EXISTS tr_baggage_tags ON baggage;
+
+DROP FUNCTION IF EXISTS flights_ticket_partitions();
+DROP FUNCTION IF EXISTS flights_move_tickets();
+DROP FUNCTION IF EXISTS tickets_flight_departure();
+DROP FUNCTION IF EXISTS baggage_flight_departure();
+DROP FUNCTION IF EXISTS baggage_tags_sync();
+DROP FUNCTION IF EXISTS ensure_ticket_partitions(TIMESTAMP WITH TIME ZONE, INTEGER);
+
+-- =============================================================================
+-- 1. Секции tickets/baggage на p_months месяцев, начиная с месяца p_from.
+--    Возвращает число созданных таблиц; на несекционированной БД ничего не делает
+-- =============================================================================
+CREATE OR REPLACE FUNCTION ensure_ticket_partitions(
+    p_from TIMESTAMP WITH TIME ZONE,
+    p_months INTEGER DEFAULT 1
+)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+    parent TEXT;
+    created INTEGER := 0;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tickets')) THEN
+        RETURN 0;
+    END IF;
+
+    FOR i IN 0 .. GREATEST(p_months, 1) - 1 LOOP
+        month_start := (date_trunc('month', p_from AT TIME ZONE 'UTC') + make_interval(months => i))::DATE;
+        -- tickets раньше baggage: секция багажа ссылается на секционированную tickets
+        FOREACH parent IN ARRAY ARRAY['tickets', 'baggage'] LOOP
+            partition_name := parent || '_' || to_char(month_start, 'YYYY_MM');
+            IF to_regclass(partition_name) IS NULL THEN
+                BEGIN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                        partition_name, parent,
+                        month_start::TEXT || ' 00:00:00+00',
+                        (month_start + INTERVAL '1 month')::DATE::TEXT || ' 00:00:00+00'
+                    );
+                    created := created + 1;
+                EXCEPTION WHEN duplicate_table THEN
+                    NULL;  -- секцию уже создал параллельный сеанс
+                END;
+            END IF;
+        END LOOP;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =============================================================================
+-- 2. Триггеры рейсов
+-- =============================================================================
+
+-- Секция месяца вылета должна существовать до того, как триггер генерации
+-- создаст места рейса. Обычно секции уже созданы заранее (ticket_partitions),
+-- тогда это две проверки to_regclass без DDL
+CREATE OR REPLACE FUNCTION flights_ticket_partitions()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ensure_ticket_partitions(NEW.departure_time, 1);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Перенос вылета: ключ секции билетов меняется вместе с рейсом,
+-- багаж переезжает по FK (ticket_id, flight_departure) ON UPDATE CASCADE
+CREATE OR REPLACE FUNCTION flights_move_tickets()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE tickets SET flight_departure = NEW.departure_time
+    WHERE flight_id = NEW.id_flight AND flight_departure = OLD.departure_time;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_flights_ticket_partitions
+    BEFORE INSERT OR UPDATE OF departure_time ON flights
+    FOR EACH ROW EXECUTE FUNCTION flights_ticket_partitions();
+
+CREATE TRIGGER tr_flights_move_tickets
+    AFTER UPDATE OF departure_time ON flights
+    FOR EACH ROW
+    WHEN (NEW.departure_time IS DISTINCT FROM OLD.departure_time)
+    EXECUTE FUNCTION flights_move_tickets();
+
+-- =============================================================================
+-- 3. Ключ секции билета и багажа
+--    flight_departure билета — вылет его рейса, багажа — ключ его билета.
+--    Код (Ticket.save, Baggage.save) заполняет его сам; триггер исправляет
+--    значение, если его не передали или передали неверное. Перенести строку
+--    в другую секцию BEFORE-триггер не может — такую вставку PostgreSQL
+--    отклонит, а не сохранит билет в чужой секции
+-- =============================================================================
+CREATE OR REPLACE FUNCTION tickets_flight_departure()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT departure_time INTO NEW.flight_departure FROM flights WHERE id_flight = NEW.flight_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION baggage_flight_departure()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT flight_departure INTO NEW.flight_departure FROM tickets WHERE id_ticket = NEW.ticket_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_tickets_flight_departure
+    BEFORE INSERT OR UPDATE OF flight_id, flight_departure ON tickets
+    FOR EACH ROW EXECUTE FUNCTION tickets_flight_departure();
+
+CREATE TRIGGER tr_baggage_flight_departure
+    BEFORE INSERT OR UPDATE OF ticket_id, flight_departure ON baggage
+    FOR EACH ROW EXECUTE FUNCTION baggage_flight_departure();
+
+-- =============================================================================
+-- 4. Реестр бирок. baggage_tag_unique (baggage_tag, flight_departure) проверяет
+--    бирку только внутри секции; несекционированная baggage_tags с первичным
+--    ключом по бирке не даёт выдать одну бирку двум местам багажа разных
+--    месяцев. Перенос багажа между секциями (смена вылета) — это DELETE и
+--    INSERT строки: запись реестра удаляется и добавляется заново
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS baggage_tags (
+    baggage_tag VARCHAR(12) PRIMARY KEY,
+    id_baggage INTEGER NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION baggage_tags_sync()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM baggage_tags WHERE baggage_tag = OLD.baggage_tag AND id_baggage = OLD.id_baggage;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO baggage_tags (baggage_tag, id_baggage) VALUES (NEW.baggage_tag, NEW.id_baggage);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tr_baggage_tags
+    AFTER INSERT OR DELETE OR UPDATE OF baggage_tag ON baggage
+    FOR EACH ROW EXECUTE FUNCTION baggage_tags_sync();
+
+INSERT INTO baggage_tags (baggage_tag, id_baggage)
+SELECT baggage_tag, id_baggage FROM baggage
+ON CONFLICT DO NOTHING;
@@ -12,6 +12,7 @@ DROP VIEW IF EXISTS v_audit_operations_report CASCADE;
 
 DROP FUNCTION IF EXISTS calc_flight_revenue(INTEGER);
 DROP FUNCTION IF EXISTS calc_flight_occupancy(INTEGER);
+DROP FUNCTION IF EXISTS flight_total_seats(INTEGER);
 DROP FUNCTION IF EXISTS calc_user_payments_in_period(INTEGER, TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE);
 
 -- =============================================================================
@@ -19,38 +20,53 @@ DROP FUNCTION IF EXISTS calc_user_payments_in_period(INTEGER, TIMESTAMP WITH TIM
 -- =============================================================================
 
 -- 1. Расчёт общей выручки по рейсу (сумма оплаченных/забронированных билетов)
+--    Условие на flight_departure (ключ секции tickets) — читается одна секция
 CREATE OR REPLACE FUNCTION calc_flight_revenue(p_flight_id INTEGER)
 RETURNS NUMERIC(12, 2) AS $$
 DECLARE
     total NUMERIC(12, 2);
+    departure TIMESTAMP WITH TIME ZONE;
 BEGIN
+    SELECT f.departure_time INTO departure FROM flights f WHERE f.id_flight = p_flight_id;
+
     SELECT COALESCE(SUM(t.price), 0)
     INTO total
     FROM tickets t
     WHERE t.flight_id = p_flight_id
+      AND t.flight_departure = departure
       AND t.status IN ('PAID', 'BOOKED', 'CHECKED_IN');
 
     RETURN total;
 END;
 $$ LANGUAGE plpgsql;
 
--- 2. Расчёт загрузки рейса (процент занятых мест от общего числа мест)
+-- 2. Число мест рейса по схеме салона (rows × seats_row, как в airline/seat_layout.py).
+--    Не зависит от того, созданы ли строки tickets для свободных мест
+CREATE OR REPLACE FUNCTION flight_total_seats(p_flight_id INTEGER)
+RETURNS INTEGER AS $$
+    SELECT COALESCE(NULLIF(a.rows, 0), 30) * LEAST(COALESCE(NULLIF(a.seats_row, 0), 6), 8)
+    FROM flights f
+    JOIN airplanes a ON a.id_airplane = f.airplane_id
+    WHERE f.id_flight = p_flight_id;
+$$ LANGUAGE sql STABLE;
+
+-- 3. Расчёт загрузки рейса (процент занятых мест от общего числа мест)
 CREATE OR REPLACE FUNCTION calc_flight_occupancy(p_flight_id INTEGER)
 RETURNS NUMERIC(5, 2) AS $$
 DECLARE
     total_seats INT;
     occupied_seats INT;
     result_pct NUMERIC(5, 2);
+    departure TIMESTAMP WITH TIME ZONE;
 BEGIN
-    SELECT COUNT(*)
-    INTO total_seats
-    FROM tickets t
-    WHERE t.flight_id = p_flight_id;
+    total_seats := COALESCE(flight_total_seats(p_flight_id), 0);
+    SELECT f.departure_time INTO departure FROM flights f WHERE f.id_flight = p_flight_id;
 
     SELECT COUNT(*)
     INTO occupied_seats
     FROM tickets t
     WHERE t.flight_id = p_flight_id
+      AND t.flight_departure = departure
       AND t.status IN ('PAID', 'BOOKED', 'CHECKED_IN');
 
     IF total_seats = 0 THEN
@@ -62,7 +78,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- 3. Расчёт суммы платежей пользователя за период
+-- 4. Расчёт суммы платежей пользователя за период
 CREATE OR REPLACE FUNCTION calc_user_payments_in_period(
     p_user_id INTEGER,
     p_date_from TIMESTAMP WITH TIME ZONE,
@@ -101,26 +117,34 @@ SELECT
     arr.id_airport AS arrival_airport_code,
     arr.name AS arrival_airport_name,
     arr.city AS arrival_city,
-    (SELECT COUNT(*) FROM tickets t WHERE t.flight_id = f.id_flight) AS total_seats,
-    (SELECT COUNT(*) FROM tickets t WHERE t.flight_id = f.id_flight AND t.status IN ('PAID', 'BOOKED', 'CHECKED_IN')) AS occupied_seats,
+    flight_total_seats(f.id_flight) AS total_seats,
+    (SELECT COUNT(*) FROM tickets t WHERE t.flight_id = f.id_flight AND t.flight_departure = f.departure_time AND t.status IN ('PAID', 'BOOKED', 'CHECKED_IN')) AS occupied_seats,
     calc_flight_revenue(f.id_flight) AS revenue
 FROM flights f
 JOIN airports dep ON f.departure_airport_id = dep.id_airport
 JOIN airports arr ON f.arrival_airport_id = arr.id_airport
 ORDER BY f.departure_time DESC;
 
--- 2. Отчёт по выручке по аэропортам (вылеты и прилёты)
+-- 2. Отчёт по выручке по аэропортам (вылеты и прилёты).
+--    Рейсы, перенесённые в архив, учитываются по итогам flight_revenue_summary
 CREATE OR REPLACE VIEW v_airports_revenue_report AS
+WITH flight_revenue AS (
+    SELECT f.departure_airport_id, f.arrival_airport_id, calc_flight_revenue(f.id_flight) AS revenue
+    FROM flights f
+    UNION ALL
+    SELECT s.departure_airport_id, s.arrival_airport_id, s.revenue
+    FROM flight_revenue_summary s
+)
 SELECT
     a.id_airport,
     a.name AS airport_name,
     a.city,
     a.country,
-    COALESCE(SUM(CASE WHEN f.departure_airport_id = a.id_airport THEN calc_flight_revenue(f.id_flight) ELSE 0 END), 0) AS revenue_departures,
-    COALESCE(SUM(CASE WHEN f.arrival_airport_id = a.id_airport THEN calc_flight_revenue(f.id_flight) ELSE 0 END), 0) AS revenue_arrivals,
-    COALESCE(SUM(calc_flight_revenue(f.id_flight)), 0) AS revenue_total
+    COALESCE(SUM(CASE WHEN r.departure_airport_id = a.id_airport THEN r.revenue ELSE 0 END), 0) AS revenue_departures,
+    COALESCE(SUM(CASE WHEN r.arrival_airport_id = a.id_airport THEN r.revenue ELSE 0 END), 0) AS revenue_arrivals,
+    COALESCE(SUM(r.revenue), 0) AS revenue_total
 FROM airports a
-LEFT JOIN flights f ON (f.departure_airport_id = a.id_airport OR f.arrival_airport_id = a.id_airport)
+LEFT JOIN flight_revenue r ON (r.departure_airport_id = a.id_airport OR r.arrival_airport_id = a.id_airport)
 GROUP BY a.id_airport, a.name, a.city, a.country;
 
 -- 3. Отчёт по операциям аудита (таблица, тип операции, количество за последние записи)
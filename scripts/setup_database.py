@@ -133,6 +133,7 @@ def main():
             step = "[2/5]" if do_all else "[1/3]"
             print(f"\n{step} Создание таблиц (create_tables.sql)...")
             run_sql_file(conn, 'create_tables.sql', 'Таблицы созданы')
+            run_sql_file(conn, 'partitions.sql', 'Секционирование tickets/baggage настроено')
             conn.commit()
 
         if args.create or do_all:
@@ -1,7 +1,8 @@
 -- =============================================================================
 -- GreenQuality: Триггеры БД
--- 1-2. Триггеры аудита (INSERT, UPDATE/DELETE)
--- 3. Триггер генерации билетов при создании рейса
+-- 1-2. Триггеры аудита (INSERT, UPDATE/DELETE); при переносе в архив не пишутся —
+--      airline/archive.py пишет запись DELETE на каждый перенесённый рейс
+-- 3. Генерация мест рейса (триггер и materialize_flight_seats)
 -- =============================================================================
 
 -- Удаление существующих триггеров и функций
@@ -16,6 +17,7 @@ DROP TRIGGER IF EXISTS tr_generate_tickets_after_flight_insert ON flights;
 DROP FUNCTION IF EXISTS audit_trigger_insert();
 DROP FUNCTION IF EXISTS audit_trigger_update_delete();
 DROP FUNCTION IF EXISTS generate_tickets_for_flight();
+DROP FUNCTION IF EXISTS materialize_flight_seats(INTEGER[]);
 
 -- =============================================================================
 -- 1. Триггер аудита для INSERT
@@ -53,6 +55,13 @@ DECLARE
     tbl_name TEXT;
     op TEXT;
 BEGIN
+    -- Перенос в архив (airline/archive.py, параметр транзакции greenquality.archiving)
+    -- пишет сам запись DELETE на каждый рейс (record_id — id рейса, в new_data — итоги
+    -- рейса); построчные записи по билетам и багажу рейса не нужны
+    IF COALESCE(current_setting('greenquality.archiving', true), '') = 'on' THEN
+        RETURN COALESCE(NEW, OLD);
+    END IF;
+
     tbl_name := TG_TABLE_NAME;
     op := TG_OP;
 
@@ -88,9 +97,13 @@ CREATE TRIGGER audit_flights_update_delete
     AFTER UPDATE OR DELETE ON flights
     FOR EACH ROW EXECUTE FUNCTION audit_trigger_update_delete();
 
+-- Свободные места (AVAILABLE) создаёт генерация билетов рейса и пишет по ним
+-- одну сводную запись (record_id — NULL); построчно аудируются только реальные
+-- продажи. Удаление билетов при переносе в архив построчно не аудируется:
+-- archive.py пишет по записи DELETE на каждый перенесённый рейс
 CREATE TRIGGER audit_tickets_insert
     AFTER INSERT ON tickets
-    FOR EACH ROW EXECUTE FUNCTION audit_trigger_insert();
+    FOR EACH ROW WHEN (NEW.status <> 'AVAILABLE') EXECUTE FUNCTION audit_trigger_insert();
 
 CREATE TRIGGER audit_tickets_update_delete
     AFTER UPDATE OR DELETE ON tickets
@@ -105,43 +118,94 @@ CREATE TRIGGER audit_users_update_delete
     FOR EACH ROW EXECUTE FUNCTION audit_trigger_update_delete();
 
 -- =============================================================================
--- 3. Триггер генерации билетов при создании рейса
+-- 3. Генерация билетов (мест) рейсов
+-- materialize_flight_seats создаёт недостающие места для набора рейсов одним
+-- INSERT ... SELECT по generate_series (ряды × места). Класс места
+-- определяется зоной ряда, как в airline/seat_layout.py: первые
+-- ceil(first_capacity / seats_row) рядов — FIRST, следующие
+-- ceil(business_capacity / seats_row) — BUSINESS, остальные — ECONOMY
+-- (если класса нет в таблице class — ECONOMY). Начальная цена — class.base_price.
+-- Уже существующие места пропускаются (unique_flight_seat). Ключ секции
+-- flight_departure — время вылета рейса (scripts/partitions.sql).
+--
+-- Режим «ленивых» мест: при
+--   ALTER DATABASE greenquality SET greenquality.ticket_inventory = 'lazy';
+-- триггер не создаёт места, строка билета появляется только при продаже
+-- (см. airline/inventory.py и команду ticket_inventory).
 -- =============================================================================
-CREATE OR REPLACE FUNCTION generate_tickets_for_flight()
-RETURNS TRIGGER AS $$
+CREATE OR REPLACE FUNCTION materialize_flight_seats(p_flight_ids INTEGER[])
+RETURNS INTEGER AS $$
 DECLARE
-    a_rows INT;
-    a_seats_row INT;
-    r INT;
-    s INT;
-    seat_letters TEXT[] := ARRAY['A','B','C','D','E','F','G','H'];
-    seat_num TEXT;
     economy_class_id INT;
+    generated INT;
 BEGIN
-    SELECT COALESCE(rows, 30), COALESCE(seats_row, 6)
-    INTO a_rows, a_seats_row
-    FROM airplanes WHERE id_airplane = NEW.airplane_id;
-
     SELECT id_class INTO economy_class_id FROM class WHERE class_name = 'ECONOMY' LIMIT 1;
 
     IF economy_class_id IS NULL THEN
         RAISE EXCEPTION 'Класс ECONOMY не найден в таблице class';
     END IF;
 
-    FOR r IN 1..a_rows LOOP
-        FOR s IN 1..a_seats_row LOOP
-            seat_num := r::TEXT || seat_letters[s];
-            INSERT INTO tickets (flight_id, class_id, seat_number, price, status, passenger_id, payment_id)
-            VALUES (NEW.id_flight, economy_class_id, seat_num, 0, 'AVAILABLE', NULL, NULL);
-        END LOOP;
-    END LOOP;
+    INSERT INTO tickets (flight_id, class_id, seat_number, price, status, passenger_id, payment_id,
+                         flight_departure)
+    SELECT f.id_flight,
+           COALESCE(c.id_class, economy_class_id),
+           r::TEXT || (ARRAY['A','B','C','D','E','F','G','H'])[s],
+           COALESCE(c.base_price, 0),
+           'AVAILABLE', NULL, NULL,
+           f.departure_time
+    FROM flights f
+    JOIN LATERAL (
+        SELECT COALESCE(NULLIF(a.rows, 0), 30) AS n_rows,
+               LEAST(COALESCE(NULLIF(a.seats_row, 0), 6), 8) AS per_row,
+               COALESCE(a.first_capacity, 0) AS first_capacity,
+               COALESCE(a.business_capacity, 0) AS business_capacity
+        FROM airplanes a WHERE a.id_airplane = f.airplane_id
+    ) a ON TRUE
+    CROSS JOIN LATERAL (
+        SELECT LEAST(a.n_rows, CEIL(a.first_capacity::NUMERIC / a.per_row)::INT) AS first_rows
+    ) z1
+    CROSS JOIN LATERAL (
+        SELECT LEAST(a.n_rows - z1.first_rows,
+                     CEIL(a.business_capacity::NUMERIC / a.per_row)::INT) AS business_rows
+    ) z2
+    CROSS JOIN LATERAL generate_series(1, a.n_rows) AS r
+    CROSS JOIN LATERAL generate_series(1, a.per_row) AS s
+    LEFT JOIN class c ON c.class_name = CASE
+        WHEN r <= z1.first_rows THEN 'FIRST'
+        WHEN r <= z1.first_rows + z2.business_rows THEN 'BUSINESS'
+        ELSE 'ECONOMY'
+    END
+    WHERE f.id_flight = ANY(p_flight_ids)
+    ORDER BY f.id_flight, r, s
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS generated = ROW_COUNT;
+    RETURN generated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Триггер: места нового рейса; вместо записи аудита на каждое место — одна сводная.
+-- record_id — NULL: сводная запись не относится к одному билету (рейс — в new_data)
+CREATE OR REPLACE FUNCTION generate_tickets_for_flight()
+RETURNS TRIGGER AS $$
+DECLARE
+    generated INT;
+BEGIN
+    IF COALESCE(current_setting('greenquality.ticket_inventory', true), '') = 'lazy' THEN
+        RETURN NEW;
+    END IF;
+
+    generated := materialize_flight_seats(ARRAY[NEW.id_flight]);
+
+    INSERT INTO audit_log (table_name, record_id, operation, old_data, new_data, changed_by)
+    VALUES ('tickets', NULL, 'INSERT', NULL,
+            jsonb_build_object('flight_id', NEW.id_flight, 'generated_seats', generated),
+            NULL);
 
     RETURN NEW;
-EXCEPTION WHEN OTHERS THEN
-    RAISE;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER tr_generate_tickets_after_flight_insert
     AFTER INSERT ON flights
-    FOR EACH ROW EXECUTE FUNCTION generate_tickets_for_flight();
\ No newline at end of file
+    FOR EACH ROW EXECUTE FUNCTION generate_tickets_for_flight();